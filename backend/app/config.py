@@ -24,11 +24,15 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: str
     AWS_S3_BUCKET: str
     AWS_REGION: str = "us-east-1"
+    # Custom S3 endpoint (MinIO, LocalStack, moto); None for AWS
+    AWS_S3_ENDPOINT_URL: Optional[str] = None
     
     # Google OAuth
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
     GOOGLE_REDIRECT_URI: str = "http://localhost:8000/api/v1/auth/google/callback"
+    # Point at scripts/fake_google_certs.py to verify tokens offline
+    GOOGLE_OAUTH_CERTS_URL: str = "https://www.googleapis.com/oauth2/v1/certs"
     
     # JWT
     JWT_SECRET_KEY: str
@@ -36,11 +40,23 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 30
     
+    # Password hashing (bcrypt runs in a dedicated thread pool)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    
+    # Auth cache (per-process user snapshots, invalidated via Redis pub/sub)
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    
     # Rate Limiting
     RATE_LIMIT_FREE_PER_MINUTE: int = 1
     RATE_LIMIT_FREE_PER_DAY: int = 5
     RATE_LIMIT_PRO_PER_MINUTE: int = 3
     RATE_LIMIT_PRO_PER_DAY: int = 50
+    # In-process token bucket in front of Redis (burst 0 disables it)
+    RATE_LIMIT_LOCAL_BURST: int = 5
+    RATE_LIMIT_LOCAL_REFILL_PER_SECOND: float = 1.0
     
     # Quotas
     FREE_CREDITS_DEFAULT: int = 5
@@ -48,6 +64,9 @@ class Settings(BaseSettings):
     FREE_MONTHLY_LIMIT: int = 20
     PRO_DAILY_LIMIT: int = 50
     PRO_MONTHLY_LIMIT: int = 500
+    QUOTA_SYNC_INTERVAL_SECONDS: int = 30
+    QUOTA_SYNC_BATCH_SIZE: int = 500
+    QUOTA_REFUND_ON_FAILURE: bool = True
     
     # Image Processing
     MAX_IMAGE_SIZE_MB: int = 10
@@ -55,10 +74,38 @@ class Settings(BaseSettings):
     MIN_IMAGE_RESOLUTION: tuple = (512, 512)
     MAX_IMAGE_RESOLUTION: tuple = (2048, 2048)
     
+    # Result encoding per plan: webp, jpeg (progressive, optimized) or png
+    OUTPUT_FORMAT_FREE: str = "webp"
+    OUTPUT_QUALITY_FREE: int = 80
+    OUTPUT_FORMAT_PRO: str = "webp"
+    OUTPUT_QUALITY_PRO: int = 90
+    OUTPUT_FORMAT_ENTERPRISE: str = "png"
+    OUTPUT_QUALITY_ENTERPRISE: int = 95
+    
     # Job Settings
     JOB_TIMEOUT_SECONDS: int = 120
     JOB_POLL_INTERVAL_SECONDS: int = 2
     
+    # Job state cache (Redis)
+    # Active jobs must outlive queue wait + processing; finished jobs only see
+    # a few trailing polls before the client switches to the result view.
+    JOB_CACHE_ACTIVE_TTL_SECONDS: int = 15 * 60
+    JOB_CACHE_TERMINAL_TTL_SECONDS: int = 60 * 60
+    JOBS_TOTAL_CACHE_TTL_SECONDS: int = 5 * 60
+    
+    # Presigned download URLs (cached in-process well before they expire)
+    PRESIGNED_URL_EXPIRATION_SECONDS: int = 60 * 60
+    PRESIGNED_URL_CACHE_TTL_SECONDS: int = 30 * 60
+    PRESIGNED_URL_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Storage serving (keys are immutable, so cache for a year)
+    STORAGE_CACHE_MAX_AGE_SECONDS: int = 365 * 24 * 60 * 60
+    STORAGE_PROXY_CHUNK_BYTES: int = 64 * 1024
+    # Hand out signed /storage proxy URLs for S3 objects (False: presigned S3 URLs)
+    STORAGE_PROXY_DOWNLOADS: bool = True
+    # Internal nginx location for X-Accel-Redirect (zero-copy sendfile)
+    STORAGE_ACCEL_REDIRECT_PREFIX: Optional[str] = None
+    
     # CORS
     # Include all local dev origins; override via .env as a JSON array
     CORS_ORIGINS: list[str] = [
@@ -71,6 +118,22 @@ class Settings(BaseSettings):
     # Sentry (optional)
     SENTRY_DSN: Optional[str] = None
     
+    # Tracing: OpenTelemetry export ("none", "console" or "otlp") and the
+    # sampling policy shared with Sentry performance monitoring
+    TRACING_EXPORTER: str = "none"
+    OTEL_EXPORTER_OTLP_ENDPOINT: str = "http://localhost:4318"
+    TRACES_SAMPLE_RATE: float = 0.1
+    TRACES_IGNORED_PATHS: list[str] = ["/health", "/metrics"]
+    
+    # Sampling profiler: defaults for API requests and worker jobs; admins
+    # can override them at runtime via /api/v1/admin/profiling
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.01
+    PROFILING_INTERVAL_MS: int = 5
+    
+    # Accounts allowed to use the admin endpoints
+    ADMIN_EMAILS: list[str] = []
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
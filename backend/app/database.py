@@ -2,6 +2,7 @@
 Database configuration and session management
 """
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -18,6 +19,40 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching asyncio driver."""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+def _async_engine_options(url: str) -> dict:
+    """
+    Pool options for the async engine
+    
+    aiosqlite takes no pool arguments; concurrent SQLite writers wait on the
+    file lock for up to 30s instead of failing with "database is locked".
+    """
+    if url.startswith("sqlite"):
+        return {"connect_args": {"timeout": 30}}
+    return {"pool_size": 10, "max_overflow": 20}
+
+
+# Async engine for the FastAPI routers (the GPU worker and scripts stay sync)
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    echo=settings.DEBUG,
+    **_async_engine_options(settings.DATABASE_URL)
+)
+
+# Objects stay usable after commit; lazy loads are not possible on AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
@@ -34,6 +69,15 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency for getting an async database session
+    Usage: db: AsyncSession = Depends(get_async_db)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
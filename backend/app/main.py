@@ -3,26 +3,73 @@ Main FastAPI application
 """
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
-from contextlib import asynccontextmanager
-from pathlib import Path
-import sentry_sdk
-from sentry_sdk.integrations.fastapi import FastApiIntegration
+from fastapi.responses import JSONResponse, Response
+from contextlib import asynccontextmanager, suppress
+from starlette.background import BackgroundTask, BackgroundTasks
+from starlette.concurrency import run_in_threadpool
+from io import BytesIO
+import uuid
+import asyncio
 
 from app.config import settings
-from app.database import init_db
-from app.routers import auth, jobs, user, results
+from app.database import init_db, SessionLocal
+from app.services.job_service import JobService, profiling_policy
+from app.services.storage_service import storage_service
+from app.utils.auth_cache import start_invalidation_listener
+from app.utils.metrics import latest_metrics
+from app.utils.profiling import StackSampler, profile_key
+from app.utils.tracing import (
+    SpanKind,
+    configure_tracing,
+    extract_context,
+    sentry_traces_sampler,
+    shutdown_tracing,
+    span,
+)
+from app.routers import admin, auth, jobs, user, results, storage
 
 
 # Initialize Sentry (optional)
 if settings.SENTRY_DSN:
+    import sentry_sdk
+    from sentry_sdk.integrations.fastapi import FastApiIntegration
+
     sentry_sdk.init(
         dsn=settings.SENTRY_DSN,
         integrations=[FastApiIntegration()],
-        traces_sample_rate=1.0,
+        traces_sampler=sentry_traces_sampler(
+            settings.TRACES_SAMPLE_RATE,
+            settings.TRACES_IGNORED_PATHS
+        ),
     )
 
+# Initialize OpenTelemetry (optional)
+configure_tracing(
+    "api",
+    exporter=settings.TRACING_EXPORTER,
+    otlp_endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT,
+    sample_rate=settings.TRACES_SAMPLE_RATE,
+)
+
+
+def _sync_quotas_once() -> int:
+    """Write one batch of Redis quota counters back to the database."""
+    db = SessionLocal()
+    try:
+        return JobService.sync_quotas(db)
+    finally:
+        db.close()
+
+
+async def quota_sync_loop():
+    """Periodically reconcile Redis quota counters to the quotas table"""
+    while True:
+        await asyncio.sleep(settings.QUOTA_SYNC_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(_sync_quotas_once)
+        except Exception as e:
+            print(f"⚠️  Quota sync failed: {e}")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -31,11 +78,21 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Virtual Try-On API...")
     init_db()
     print("✅ Database initialized")
+    quota_sync_task = asyncio.create_task(quota_sync_loop())
+    auth_listener = start_invalidation_listener()
     
     yield
     
     # Shutdown
     print("👋 Shutting down...")
+    quota_sync_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await quota_sync_task
+    with suppress(Exception):
+        await run_in_threadpool(_sync_quotas_once)
+    if auth_listener is not None:
+        auth_listener.stop()
+    shutdown_tracing()
 
 
 # Create FastAPI app
@@ -58,10 +115,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Local storage static serving for development fallback
-local_storage_dir = Path(__file__).resolve().parents[1] / "local_storage"
-local_storage_dir.mkdir(parents=True, exist_ok=True)
-app.mount("/local-storage", StaticFiles(directory=local_storage_dir), name="local-storage")
+
+# Request tracing (continues an incoming traceparent header when present)
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    if request.url.path in settings.TRACES_IGNORED_PATHS:
+        return await call_next(request)
+
+    with span(
+        f"{request.method} {request.url.path}",
+        kind=SpanKind.SERVER,
+        context=extract_context(request.headers),
+        **{"http.method": request.method, "http.target": request.url.path}
+    ) as current:
+        response = await call_next(request)
+        # Name the span after the route template, not the concrete path
+        route = request.scope.get("route")
+        if route is not None:
+            current.update_name(f"{request.method} {route.path}")
+        current.set_attribute("http.status_code", response.status_code)
+        return response
+
+
+def _save_request_profile(sampler: StackSampler, method: str, path: str):
+    """Upload a request's collapsed stacks to storage."""
+    name = "-".join(part for part in path.split("/") if part)[:80] or "root"
+    key = profile_key("api", f"{method.lower()}-{name}-{uuid.uuid4().hex[:12]}")
+    try:
+        storage_service.upload_file(BytesIO(sampler.collapsed().encode("utf-8")), key, "text/plain")
+        print(f"🔬 Profiled {method} {path} ({sampler.samples} samples): {key}")
+    except Exception as e:
+        print(f"⚠️  Failed to save profile: {e}")
+
+
+# Sampling profiler (opt-in; see PROFILING_* and /api/v1/admin/profiling).
+# Samples the event loop thread, so stacks of requests running concurrently
+# on the same loop can show up in a request's profile.
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    if request.url.path in settings.TRACES_IGNORED_PATHS or not profiling_policy.should_profile():
+        return await call_next(request)
+
+    with StackSampler(interval_seconds=settings.PROFILING_INTERVAL_MS / 1000) as sampler:
+        response = await call_next(request)
+
+    # Upload after the response has been sent
+    task = BackgroundTask(run_in_threadpool, _save_request_profile, sampler, request.method, request.url.path)
+    if response.background is None:
+        response.background = task
+    else:
+        response.background = BackgroundTasks([response.background, task])
+    return response
 
 
 # Global exception handler
@@ -102,6 +206,15 @@ app.include_router(
     tags=["User"]
 )
 
+app.include_router(
+    admin.router,
+    prefix="/api/v1/admin",
+    tags=["Admin"]
+)
+
+# Stored uploads/results (immutable, cacheable; local storage or S3 proxy)
+app.include_router(storage.router)
+
 
 # Health check endpoint
 @app.get("/health")
@@ -114,6 +227,14 @@ async def health_check():
     }
 
 
+# Prometheus metrics (cache hit rates, password pool; pipeline stages are on the worker)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = latest_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -1,8 +1,7 @@
 """
 Job database model for try-on processing
 """
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Enum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Enum, Index, LargeBinary, JSON, Uuid
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
@@ -23,26 +22,63 @@ class Job(Base):
     """Virtual try-on job model"""
     __tablename__ = "jobs"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4, index=True)
+    user_id = Column(Uuid, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False, index=True)
     
     # Image URLs
     user_image_url = Column(Text, nullable=False)
     garment_image_url = Column(Text, nullable=False)
     result_image_url = Column(Text)
+    # Quick low-resolution draft published while the full result is generated
+    preview_url = Column(Text)
+    
+    # Object locations, so the worker fetches by key instead of parsing URLs
+    # (bucket is NULL for local development storage)
+    storage_bucket = Column(String(63))
+    user_image_key = Column(Text)
+    garment_image_key = Column(Text)
+    result_image_key = Column(Text)
+    preview_key = Column(Text)
+    
+    # Input fingerprints (raw SHA-256 digests and byte sizes)
+    user_image_sha256 = Column(LargeBinary(32))
+    garment_image_sha256 = Column(LargeBinary(32))
+    user_image_size = Column(Integer)
+    garment_image_size = Column(Integer)
     
     # Error handling
     error_message = Column(Text)
     
     # Performance metrics
     processing_time_ms = Column(Integer)
+    # Milliseconds per stage, e.g. {"queue_wait": 850, "download": 120, "vton": 9100, ...}
+    stage_timings = Column(JSON)
+    # Quality tier the worker ran the job at ("draft", "standard", "hd")
+    quality_tier = Column(String(16))
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     started_at = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
     
+    __table_args__ = (
+        # Keyset pagination of a user's history: WHERE user_id = ? AND
+        # (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+        Index("ix_jobs_user_created_id", user_id, created_at.desc(), id.desc()),
+    )
+    
+    # Columns loaded for list views (see to_summary_dict)
+    SUMMARY_COLUMNS = (
+        "id",
+        "status",
+        "result_image_url",
+        "error_message",
+        "processing_time_ms",
+        "created_at",
+        "completed_at",
+    )
+    
     def __repr__(self):
         return f"<Job {self.id} - {self.status}>"
     
@@ -55,9 +91,25 @@ class Job(Base):
             "user_image_url": self.user_image_url,
             "garment_image_url": self.garment_image_url,
             "result_image_url": self.result_image_url,
+            "result_image_key": self.result_image_key,
+            "preview_url": self.preview_url,
+            "preview_key": self.preview_key,
             "error_message": self.error_message,
             "processing_time_ms": self.processing_time_ms,
+            "quality_tier": self.quality_tier,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None
         }
+    
+    def to_summary_dict(self):
+        """Convert to dictionary for list views (SUMMARY_COLUMNS only)"""
+        return {
+            "id": str(self.id),
+            "status": self.status.value,
+            "result_image_url": self.result_image_url,
+            "error_message": self.error_message,
+            "processing_time_ms": self.processing_time_ms,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None
+        }
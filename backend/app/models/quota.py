@@ -1,8 +1,7 @@
 """
 Quota database model for tracking usage limits
 """
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Uuid
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -11,7 +10,7 @@ class Quota(Base):
     """User quota tracking model"""
     __tablename__ = "quotas"
     
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Uuid, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
     
     # Limits
     daily_limit = Column(Integer, default=5, nullable=False)
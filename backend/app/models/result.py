@@ -1,8 +1,7 @@
 """
 Result database model for storing generated images
 """
-from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey, Index, Uuid
 from sqlalchemy.sql import func
 import uuid
 from app.database import Base
@@ -12,14 +11,20 @@ class Result(Base):
     """Generated try-on result model"""
     __tablename__ = "results"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4, index=True)
+    job_id = Column(Uuid, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Uuid, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Image URLs
     image_url = Column(Text, nullable=False)
+    preview_url = Column(Text)
     thumbnail_url = Column(Text)
     
+    # Storage keys of the images above (signed for download)
+    image_key = Column(Text)
+    preview_key = Column(Text)
+    thumbnail_key = Column(Text)
+    
     # User preferences
     is_favorite = Column(Boolean, default=False, nullable=False)
     
@@ -29,6 +34,21 @@ class Result(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
+    __table_args__ = (
+        # Gallery pages only ever show live results, so the partial indexes
+        # stay small and skip soft-deleted rows entirely.
+        Index(
+            "ix_results_user_live_created",
+            user_id, created_at.desc(), id.desc(),
+            postgresql_where=deleted_at.is_(None),
+        ),
+        Index(
+            "ix_results_user_favorites_created",
+            user_id, created_at.desc(), id.desc(),
+            postgresql_where=(deleted_at.is_(None) & is_favorite.is_(True)),
+        ),
+    )
+    
     def __repr__(self):
         return f"<Result {self.id}>"
     
@@ -39,8 +59,26 @@ class Result(Base):
             "job_id": str(self.job_id),
             "user_id": str(self.user_id),
             "image_url": self.image_url,
+            "preview_url": self.preview_url,
             "thumbnail_url": self.thumbnail_url,
             "is_favorite": self.is_favorite,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "deleted_at": self.deleted_at.isoformat() if self.deleted_at else None
         }
+    
+    def to_gallery_dict(self):
+        """
+        Convert to dictionary for gallery listings (thumbnail first)
+        
+        Missing derivatives stay None rather than falling back to the
+        full-resolution image; the gallery shows a placeholder instead.
+        """
+        return {
+            "id": str(self.id),
+            "job_id": str(self.job_id),
+            "thumbnail_url": self.thumbnail_url,
+            "preview_url": self.preview_url,
+            "image_url": self.image_url,
+            "is_favorite": self.is_favorite,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
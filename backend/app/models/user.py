@@ -1,8 +1,7 @@
 """
 User database model
 """
-from sqlalchemy import Column, String, Integer, DateTime, Enum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, DateTime, Enum, Uuid
 from sqlalchemy.sql import func
 import uuid
 import enum
@@ -20,7 +19,7 @@ class User(Base):
     """User account model"""
     __tablename__ = "users"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4, index=True)
     google_id = Column(String(255), unique=True, nullable=True, index=True)
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=True)
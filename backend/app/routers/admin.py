@@ -0,0 +1,42 @@
+"""
+Admin API routes
+"""
+from fastapi import APIRouter, Depends
+from starlette.concurrency import run_in_threadpool
+
+from app.schemas.admin import ProfilingStatusResponse, ProfilingUpdate
+from app.services.job_service import profiling_policy
+from app.utils.auth import get_admin_user
+
+router = APIRouter(dependencies=[Depends(get_admin_user)])
+
+
+@router.get("/profiling", response_model=ProfilingStatusResponse)
+async def get_profiling():
+    """
+    Get the effective profiling settings
+    """
+    return await run_in_threadpool(profiling_policy.status)
+
+
+@router.put("/profiling", response_model=ProfilingStatusResponse)
+async def update_profiling(update: ProfilingUpdate):
+    """
+    Profile a fraction of API requests and worker jobs
+    
+    Applies to every process within a few seconds and expires after
+    duration_seconds. Profiles are written to storage under profiles/.
+    """
+    await run_in_threadpool(
+        profiling_policy.override, update.enabled, update.sample_rate, update.duration_seconds
+    )
+    return await run_in_threadpool(profiling_policy.status)
+
+
+@router.delete("/profiling", response_model=ProfilingStatusResponse)
+async def clear_profiling():
+    """
+    Drop the override and return to the environment defaults
+    """
+    await run_in_threadpool(profiling_policy.clear)
+    return await run_in_threadpool(profiling_policy.status)
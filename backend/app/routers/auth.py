@@ -2,13 +2,13 @@
 Authentication API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
-import bcrypt
+import uuid
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User, PlanType
 from app.schemas.auth import (
     GoogleLoginRequest,
@@ -18,6 +18,8 @@ from app.schemas.auth import (
     EmailLoginRequest,
 )
 from app.utils.jwt import create_access_token, create_refresh_token, verify_token
+from app.utils.passwords import hash_password, verify_password, needs_rehash
+from app.utils.google_auth import google_verifier
 from app.config import settings
 
 router = APIRouter()
@@ -26,7 +28,7 @@ router = APIRouter()
 @router.post("/google/login", response_model=TokenResponse)
 async def google_login(
     payload: GoogleLoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate user with Google OAuth
@@ -38,12 +40,8 @@ async def google_login(
     4. Generate JWT tokens
     """
     try:
-        # Verify Google token
-        idinfo = id_token.verify_oauth2_token(
-            payload.credential,
-            requests.Request(),
-            settings.GOOGLE_CLIENT_ID
-        )
+        # Verify Google token (certs are cached; a refetch would block)
+        idinfo = await run_in_threadpool(google_verifier.verify, payload.credential)
         
         # Extract user information
         google_id = idinfo['sub']
@@ -52,7 +50,7 @@ async def google_login(
         picture = idinfo.get('picture')
         
         # Get or create user
-        user = db.query(User).filter(User.google_id == google_id).first()
+        user = await db.scalar(select(User).where(User.google_id == google_id))
         
         if user:
             # Update existing user
@@ -73,11 +71,11 @@ async def google_login(
             )
             db.add(user)
         
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         
         # Generate JWT tokens
-        access_token = create_access_token(str(user.id))
+        access_token = create_access_token(str(user.id), plan=user.plan.value)
         refresh_token = create_refresh_token(str(user.id))
         
         return TokenResponse(
@@ -99,21 +97,18 @@ async def google_login(
 
 
 @router.post("/register", response_model=TokenResponse)
-async def register(payload: RegisterRequest, db: Session = Depends(get_db)):
+async def register(payload: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Register a user with email/password.
     If a Google-only account exists for the email without a password, upgrade it.
     """
     email = payload.email.lower()
 
-    existing = db.query(User).filter(User.email == email).first()
+    existing = await db.scalar(select(User).where(User.email == email))
     if existing and existing.password_hash:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-    password_hash = bcrypt.hashpw(
-        payload.password.encode("utf-8"),
-        bcrypt.gensalt()
-    ).decode("utf-8")
+    password_hash = await hash_password(payload.password)
 
     if existing:
         # Upgrade Google-only account
@@ -131,10 +126,10 @@ async def register(payload: RegisterRequest, db: Session = Depends(get_db)):
         )
         db.add(user)
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
-    access_token = create_access_token(str(user.id))
+    access_token = create_access_token(str(user.id), plan=user.plan.value)
     refresh_token = create_refresh_token(str(user.id))
 
     return TokenResponse(
@@ -145,27 +140,28 @@ async def register(payload: RegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(payload: EmailLoginRequest, db: Session = Depends(get_db)):
+async def login(payload: EmailLoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Login with email/password"""
     email = payload.email.lower()
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
 
     if not user or not user.password_hash:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    is_valid = bcrypt.checkpw(
-        payload.password.encode("utf-8"),
-        user.password_hash.encode("utf-8")
-    )
+    is_valid = await verify_password(payload.password, user.password_hash)
 
     if not is_valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
+    # Transparently upgrade hashes made with an older cost factor
+    if needs_rehash(user.password_hash):
+        user.password_hash = await hash_password(payload.password)
+
     user.last_login = datetime.utcnow()
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
-    access_token = create_access_token(str(user.id))
+    access_token = create_access_token(str(user.id), plan=user.plan.value)
     refresh_token = create_refresh_token(str(user.id))
 
     return TokenResponse(
@@ -178,7 +174,7 @@ async def login(payload: EmailLoginRequest, db: Session = Depends(get_db)):
 @router.post("/refresh", response_model=TokenResponse)
 async def refresh_token(
     payload: RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Refresh JWT access token using refresh token
@@ -191,7 +187,7 @@ async def refresh_token(
             detail="Invalid refresh token"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, uuid.UUID(user_id))
     
     if user is None:
         raise HTTPException(
@@ -200,7 +196,7 @@ async def refresh_token(
         )
     
     # Generate new tokens
-    access_token = create_access_token(str(user.id))
+    access_token = create_access_token(str(user.id), plan=user.plan.value)
     new_refresh_token = create_refresh_token(str(user.id))
     
     return TokenResponse(
@@ -1,13 +1,14 @@
 """
 Jobs API routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from PIL import Image
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 import io
 import os
+from typing import Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User, JobStatus
 from app.schemas.job import (
     JobCreateResponse,
@@ -15,11 +16,13 @@ from app.schemas.job import (
     JobResultResponse,
     JobListResponse
 )
-from app.utils.auth import get_current_user
-from app.services.job_service import JobService
+from app.utils.auth import get_current_user, get_token_user
+from app.utils.rate_limit import enforce_rate_limit
+from app.services.job_service import JobService, gallery_derivatives, output_encoding
 from app.services.storage_service import storage_service
-from app.services.local_tryon_service import LocalTryonService
 from app.config import settings
+from app.utils.metrics import RESULT_BYTES
+from app.utils.tracing import span
 
 router = APIRouter()
 
@@ -28,6 +31,66 @@ def _pipeline_mode() -> str:
     return os.getenv("TRYON_PIPELINE_MODE", "local").strip().lower()
 
 
+async def _abandon_job(db: AsyncSession, job_id: Optional[str], user: User, reason: str) -> None:
+    """
+    Clean up after create_job failed: mark the job FAILED if its row was
+    already written and is still pending, then give the reserved quota back
+    """
+    if job_id is not None:
+        try:
+            await db.rollback()
+            job = await JobService.get_job(db, job_id)
+            if job.status == JobStatus.PENDING:
+                await JobService.update_job_status(db, job_id, JobStatus.FAILED, error_message=reason)
+        except Exception as e:
+            print(f"⚠️  Failed to mark job {job_id} as failed: {e}")
+    JobService.refund_quota(user)
+
+
+def _store_gallery_derivatives(job_id: str, result_path) -> tuple[dict, dict]:
+    """
+    Encode and store the thumbnail and preview of a locally generated result
+    
+    Returns:
+        (dict of derivative name ("thumbnail", "preview") -> URL,
+         dict of derivative name -> storage key)
+    """
+    urls, keys = {}, {}
+    for name, derivative in gallery_derivatives.generate(str(result_path)).items():
+        keys[name] = storage_service.generate_result_key(job_id, f"{name}.{derivative.extension}")
+        urls[name] = storage_service.upload_file(io.BytesIO(derivative.data), keys[name], derivative.content_type)
+    return urls, keys
+
+
+def _generate_local_result(job_id: str, user_key: str, garment_key: str, plan) -> tuple[str, dict, dict]:
+    """
+    Run the local try-on on stored inputs and store the result with its
+    gallery derivatives
+    
+    Decoding, compositing and encoding are CPU bound, so create_job runs this
+    in the threadpool instead of on the event loop.
+    
+    Returns:
+        (result key, dict of derivative URLs, dict of derivative keys)
+    """
+    from app.services.local_tryon_service import LocalTryonService
+
+    output_format, quality = output_encoding.for_plan(plan)
+    result_key = storage_service.generate_result_key(job_id, f"output.{output_format.extension}")
+    result_local_path = storage_service.local_path_for_key(result_key)
+
+    LocalTryonService.generate(
+        person_image_path=str(storage_service.local_path_for_key(user_key)),
+        garment_image_path=str(storage_service.local_path_for_key(garment_key)),
+        output_path=str(result_local_path),
+        output_format=output_format,
+        quality=quality,
+    )
+    RESULT_BYTES.labels(kind="written").inc(result_local_path.stat().st_size)
+    derivative_urls, derivative_keys = _store_gallery_derivatives(job_id, result_local_path)
+    return result_key, derivative_urls, derivative_keys
+
+
 def validate_image(file: UploadFile) -> tuple[bool, str]:
     """
     Validate uploaded image
@@ -35,6 +98,8 @@ def validate_image(file: UploadFile) -> tuple[bool, str]:
     Returns:
         (is_valid, error_message)
     """
+    from PIL import Image
+
     # Check file size
     file.file.seek(0, 2)  # Seek to end
     file_size = file.file.tell()
@@ -75,12 +140,16 @@ def validate_image(file: UploadFile) -> tuple[bool, str]:
         return False, f"Invalid image: {str(e)}"
 
 
-@router.post("/create", response_model=JobCreateResponse)
+@router.post(
+    "/create",
+    response_model=JobCreateResponse,
+    dependencies=[Depends(enforce_rate_limit)]
+)
 async def create_job(
     user_image: UploadFile = File(..., description="Photo of the user"),
     garment_image: UploadFile = File(..., description="Photo of the garment/clothing"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new virtual try-on job
@@ -109,49 +178,55 @@ async def create_job(
         )
     
     # Check quota
-    has_quota, quota_message = JobService.check_quota(db, current_user)
+    has_quota, quota_message = await JobService.check_quota(db, current_user)
     if not has_quota:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=quota_message
         )
     
+    # Set once the job row exists
+    created_job_id = None
     try:
         # Generate job ID
         from uuid import uuid4
         job_id = str(uuid4())
         
-        # Upload user image to S3
-        user_key = storage_service.generate_job_key(
-            str(current_user.id),
-            job_id,
-            "user.jpg"
-        )
-        user_image_url = storage_service.upload_file(
-            user_image.file,
-            user_key,
-            user_image.content_type
-        )
-        
-        # Upload garment image to S3
-        garment_key = storage_service.generate_job_key(
-            str(current_user.id),
-            job_id,
-            "garment.jpg"
-        )
-        garment_image_url = storage_service.upload_file(
-            garment_image.file,
-            garment_key,
-            garment_image.content_type
-        )
+        with span("storage.upload_inputs", **{"job.id": job_id}):
+            # Upload user image to S3
+            user_key = storage_service.generate_job_key(
+                str(current_user.id),
+                job_id,
+                "user.jpg"
+            )
+            user_upload = storage_service.upload_input(
+                user_image.file,
+                user_key,
+                user_image.content_type
+            )
+            user_image_url = user_upload.url
+            
+            # Upload garment image to S3
+            garment_key = storage_service.generate_job_key(
+                str(current_user.id),
+                job_id,
+                "garment.jpg"
+            )
+            garment_upload = storage_service.upload_input(
+                garment_image.file,
+                garment_key,
+                garment_image.content_type
+            )
         
         # Create job in database
-        job = JobService.create_job(
+        job = await JobService.create_job(
             db,
             current_user,
-            user_image_url,
-            garment_image_url
+            user_upload,
+            garment_upload,
+            job_id=job_id
         )
+        created_job_id = str(job.id)
 
         mode = _pipeline_mode()
 
@@ -169,29 +244,26 @@ async def create_job(
         # Local development fallback when using dummy AWS credentials:
         # complete immediately so the app is usable without GPU worker setup.
         if storage_service.use_local_storage and mode != "production":
-            result_url = user_image_url
             try:
-                user_local_path = storage_service.local_path_for_key(user_key)
-                garment_local_path = storage_service.local_path_for_key(garment_key)
-                result_key = storage_service.generate_result_key(job_id, "output.jpg")
-                result_local_path = storage_service.local_path_for_key(result_key)
-
-                LocalTryonService.generate(
-                    person_image_path=str(user_local_path),
-                    garment_image_path=str(garment_local_path),
-                    output_path=str(result_local_path),
+                result_key, derivative_urls, derivative_keys = await run_in_threadpool(
+                    _generate_local_result, job_id, user_key, garment_key, current_user.plan
                 )
                 result_url = storage_service.local_url_for_key(result_key)
             except Exception:
                 # Graceful fallback for local mode if try-on synthesis fails.
                 result_url = user_image_url
+                result_key = user_key
+                derivative_urls = derivative_keys = None
 
-            job = JobService.update_job_status(
+            job = await JobService.update_job_status(
                 db,
                 str(job.id),
                 JobStatus.COMPLETED,
                 result_url=result_url,
                 processing_time_ms=0,
+                result_key=result_key,
+                derivative_urls=derivative_urls,
+                derivative_keys=derivative_keys,
             )
             return JobCreateResponse(
                 job_id=str(job.id),
@@ -204,12 +276,13 @@ async def create_job(
 
         if not queued:
             # Local development fallback when Redis/worker is unavailable
-            job = JobService.update_job_status(
+            job = await JobService.update_job_status(
                 db,
                 str(job.id),
                 JobStatus.COMPLETED,
                 result_url=user_image_url,
                 processing_time_ms=0,
+                result_key=user_key,
             )
             return JobCreateResponse(
                 job_id=str(job.id),
@@ -223,7 +296,12 @@ async def create_job(
             message="Job created successfully and queued for processing"
         )
         
+    except HTTPException as e:
+        # The job never reached the queue, so give the reserved quota back
+        await _abandon_job(db, created_job_id, current_user, str(e.detail))
+        raise
     except Exception as e:
+        await _abandon_job(db, created_job_id, current_user, str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create job: {str(e)}"
@@ -233,8 +311,8 @@ async def create_job(
 @router.get("/{job_id}/status", response_model=JobStatusResponse)
 async def get_job_status(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_token_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get job processing status
@@ -242,30 +320,32 @@ async def get_job_status(
     Poll this endpoint every 2-3 seconds to check progress
     """
     try:
-        job = JobService.get_job(db, job_id, current_user)
+        job = await JobService.get_job_state(db, job_id, current_user)
+        job_status = job["status"]
         
         # Calculate progress
         progress = None
         estimated_time = None
         
-        if job.status == JobStatus.PENDING:
+        if job_status == JobStatus.PENDING.value:
             progress = 0
             estimated_time = 20
-        elif job.status == JobStatus.PROCESSING:
+        elif job_status == JobStatus.PROCESSING.value:
             progress = 50
             estimated_time = 10
-        elif job.status == JobStatus.COMPLETED:
+        elif job_status == JobStatus.COMPLETED.value:
             progress = 100
             estimated_time = 0
         
         return JobStatusResponse(
-            job_id=str(job.id),
-            status=job.status.value,
+            job_id=job["id"],
+            status=job_status,
             progress=progress,
             estimated_time_remaining=estimated_time,
-            created_at=job.created_at,
-            started_at=job.started_at,
-            completed_at=job.completed_at
+            preview_url=storage_service.signed_url(job.get("preview_key"), job.get("preview_url")),
+            created_at=job["created_at"],
+            started_at=job["started_at"],
+            completed_at=job["completed_at"]
         )
         
     except ValueError as e:
@@ -278,26 +358,26 @@ async def get_job_status(
 @router.get("/{job_id}/result", response_model=JobResultResponse)
 async def get_job_result(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_token_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get job result with download URL
     """
     try:
-        job = JobService.get_job(db, job_id, current_user)
+        job = await JobService.get_job_state(db, job_id, current_user)
         
-        result_url = None
-        if job.result_image_url:
-            # Generate signed URL for download
-            result_url = job.result_image_url
+        # Signed download URL (cached, so polling reuses the same URL)
+        result_url = storage_service.signed_url(job.get("result_image_key"), job["result_image_url"])
         
         return JobResultResponse(
-            job_id=str(job.id),
-            status=job.status.value,
+            job_id=job["id"],
+            status=job["status"],
             result_url=result_url,
-            processing_time_ms=job.processing_time_ms,
-            error_message=job.error_message
+            preview_url=storage_service.signed_url(job.get("preview_key"), job.get("preview_url")),
+            processing_time_ms=job["processing_time_ms"],
+            quality_tier=job.get("quality_tier"),
+            error_message=job["error_message"]
         )
         
     except ValueError as e:
@@ -309,20 +389,31 @@ async def get_job_result(
 
 @router.get("/", response_model=JobListResponse)
 async def list_jobs(
-    page: int = 1,
-    page_size: int = 20,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    page_size: int = Query(20, ge=1, le=100),
+    include_total: bool = False,
+    current_user: User = Depends(get_token_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    List user's jobs with pagination
+    List user's jobs, newest first
+    
+    Pass the returned next_cursor as ?cursor= to fetch the next page.
     """
-    jobs, total = JobService.list_user_jobs(db, current_user, page, page_size)
+    try:
+        jobs, next_cursor, total = await JobService.list_user_jobs(
+            db, current_user, cursor, page_size, include_total
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     return JobListResponse(
-        jobs=[job.to_dict() for job in jobs],
+        jobs=[job.to_summary_dict() for job in jobs],
+        next_cursor=next_cursor,
         total=total,
-        page=page,
         page_size=page_size
     )
 
@@ -331,13 +422,13 @@ async def list_jobs(
 async def delete_job(
     job_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cancel or delete a job
     """
     try:
-        JobService.delete_job(db, job_id, current_user)
+        await JobService.delete_job(db, job_id, current_user)
         return {"message": "Job deleted successfully"}
     except ValueError as e:
         raise HTTPException(
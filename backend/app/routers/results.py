@@ -1,29 +1,97 @@
 """
-Placeholder Results API routes to satisfy frontend calls.
-These return empty responses but allow the UI to function without 404s
-until a real results feature is implemented.
+Results (gallery) API routes
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 
-from app.utils.auth import get_current_user
+from app.database import get_async_db
+from app.models import User
+from app.schemas.result import ResultListResponse, FavoriteResponse
+from app.services.result_service import ResultService
+from app.services.storage_service import storage_service
+from app.utils.auth import get_current_user, get_token_user
 
 
 router = APIRouter(prefix="/results", tags=["Results"])
 
 
-@router.get("")
-async def list_results(page: int = 1, limit: int = 20, current_user=Depends(get_current_user)):
-    """Return an empty results list (placeholder)."""
-    return {"results": [], "page": page, "limit": limit, "total": 0}
+def _gallery_item(result) -> dict:
+    """Gallery dict with presigned (cached) image URLs."""
+    item = result.to_gallery_dict()
+    for name in ("thumbnail", "preview", "image"):
+        item[f"{name}_url"] = storage_service.signed_url(getattr(result, f"{name}_key"), item[f"{name}_url"])
+    return item
 
 
-@router.post("/{result_id}/favorite")
-async def favorite_result(result_id: str, current_user=Depends(get_current_user)):
-    """Acknowledge favorite action (placeholder)."""
-    return {"result_id": result_id, "favorited": True}
+@router.get("", response_model=ResultListResponse)
+async def list_results(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    favorites: bool = False,
+    page: Optional[int] = Query(None, deprecated=True, description="Ignored; use cursor"),
+    current_user: User = Depends(get_token_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List user's results, newest first
+    
+    Items carry a thumbnail_url for the grid (null when the result has no
+    derivatives; show a placeholder); image_url is the full-resolution
+    output and should only be fetched when a result is opened. Pass the
+    returned next_cursor as ?cursor= to fetch the next page.
+    """
+    try:
+        results, next_cursor = await ResultService.list_results(
+            db, current_user, cursor, limit, favorites
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return ResultListResponse(
+        results=[_gallery_item(result) for result in results],
+        next_cursor=next_cursor,
+        limit=limit
+    )
+
+
+@router.post("/{result_id}/favorite", response_model=FavoriteResponse)
+async def favorite_result(
+    result_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Toggle the favorite flag of a result
+    """
+    try:
+        is_favorite = await ResultService.toggle_favorite(db, result_id, current_user)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    return FavoriteResponse(result_id=result_id, is_favorite=is_favorite)
 
 
 @router.delete("/{result_id}")
-async def delete_result(result_id: str, current_user=Depends(get_current_user)):
-    """Acknowledge delete action (placeholder)."""
-    return {"result_id": result_id, "deleted": True}
+async def delete_result(
+    result_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Remove a result from the gallery
+    """
+    try:
+        await ResultService.delete_result(db, result_id, current_user)
+        return {"message": "Result deleted successfully"}
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
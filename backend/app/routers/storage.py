@@ -0,0 +1,216 @@
+"""
+Storage serving routes
+
+Serves stored uploads and results with long-lived immutable caching,
+content-hash ETags, conditional GETs and single byte ranges:
+
+- /local-storage/{key}: objects in the local development storage directory
+- /storage/{key}: the configured backend, proxying S3 when it is in use. The
+  bucket is private, so this route only serves URLs signed with
+  storage_service.storage_proxy_url (HMAC of key and expiry), and browsers
+  may only cache them privately until the signature expires. Job results and
+  the gallery link here when STORAGE_PROXY_DOWNLOADS is set.
+
+Zero-copy note: uvicorn has no ASGI sendfile support, so full local files are
+streamed by FileResponse in chunks from a thread. When a reverse proxy sits in
+front of the API, set STORAGE_ACCEL_REDIRECT_PREFIX and the API only answers
+with X-Accel-Redirect so nginx sends the file itself with sendfile(2).
+"""
+from fastapi import APIRouter, HTTPException, Request, status
+from typing import Optional
+import time
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pathlib import Path
+
+from app.config import settings
+from app.services.output_encoding import content_type_for_path
+from app.services.storage_service import storage_service
+from app.utils.http_cache import (
+    FileETagCache,
+    etag_matches,
+    http_date,
+    immutable_cache_control,
+    iter_file_range,
+    last_modified,
+    not_modified_since,
+    parse_range,
+)
+
+
+router = APIRouter(tags=["Storage"])
+
+# Content hashes of local files, keyed by (path, mtime, size)
+etag_cache = FileETagCache()
+
+
+def _cache_headers(etag: str, modified: str = None, cache_control: str = None) -> dict:
+    headers = {
+        "Cache-Control": cache_control or immutable_cache_control(settings.STORAGE_CACHE_MAX_AGE_SECONDS),
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+    }
+    if modified:
+        headers["Last-Modified"] = modified
+    return headers
+
+
+def _local_path(key: str) -> Path:
+    """Resolve a key inside the local storage directory (no traversal)."""
+    root = storage_service.local_storage_dir.resolve()
+    path = storage_service.local_path_for_key(key).resolve()
+    if root not in path.parents or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return path
+
+
+def _if_range_matches(if_range: Optional[str], etag: str, modified: Optional[str]) -> bool:
+    """
+    Whether a range request's If-Range validator still matches (RFC 9110 13.1.5)
+    
+    If-Range carries either a strong ETag or a Last-Modified date; a weak or
+    stale validator means the full representation must be sent.
+    """
+    if if_range is None:
+        return True
+    if if_range.startswith("W/"):
+        return False
+    if if_range.startswith('"'):
+        return if_range == etag
+    return modified is not None and if_range == modified
+
+
+async def _serve_local(request: Request, key: str, cache_control: str = None) -> Response:
+    path = _local_path(key)
+    stat_result = path.stat()
+    etag = await run_in_threadpool(etag_cache.get, path, stat_result)
+    modified = http_date(stat_result.st_mtime)
+    headers = _cache_headers(etag, modified, cache_control)
+    media_type = content_type_for_path(key)
+
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, etag) or (
+        if_none_match is None and not_modified_since(request.headers.get("if-modified-since"), stat_result.st_mtime)
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    if _if_range_matches(request.headers.get("if-range"), etag, modified):
+        try:
+            byte_range = parse_range(request.headers.get("range"), stat_result.st_size)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{stat_result.st_size}"}
+            )
+
+    if byte_range is not None:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        if request.method == "HEAD":
+            return Response(status_code=status.HTTP_206_PARTIAL_CONTENT, headers=headers, media_type=media_type)
+        return StreamingResponse(
+            iter_file_range(path, start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            headers=headers,
+            media_type=media_type
+        )
+
+    if settings.STORAGE_ACCEL_REDIRECT_PREFIX:
+        headers["X-Accel-Redirect"] = settings.STORAGE_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + key
+        return Response(headers=headers, media_type=media_type)
+
+    return FileResponse(path, headers=headers, media_type=media_type, stat_result=stat_result)
+
+
+async def _serve_s3(request: Request, key: str, cache_control: str = None) -> Response:
+    from botocore.exceptions import BotoCoreError, ClientError, ParamValidationError
+
+    s3 = storage_service.s3_client
+    params = {"Bucket": storage_service.bucket, "Key": key}
+    # S3 evaluates If-None-Match and Range itself; GetObject has no If-Range,
+    # so it is checked here against the object's current validators
+    if request.headers.get("if-none-match"):
+        params["IfNoneMatch"] = request.headers["if-none-match"]
+    try:
+        if request.method == "GET" and request.headers.get("range"):
+            if_range = request.headers.get("if-range")
+            if if_range is None:
+                params["Range"] = request.headers["range"]
+            else:
+                head = await run_in_threadpool(s3.head_object, Bucket=storage_service.bucket, Key=key)
+                if _if_range_matches(if_range, head["ETag"], last_modified(head.get("LastModified"))):
+                    params["Range"] = request.headers["range"]
+
+        operation = s3.head_object if request.method == "HEAD" else s3.get_object
+        obj = await run_in_threadpool(operation, **params)
+    except ParamValidationError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid conditional or range header")
+    except BotoCoreError:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Storage backend error")
+    except ClientError as e:
+        code = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if code == status.HTTP_304_NOT_MODIFIED:
+            headers = {"Cache-Control": cache_control or immutable_cache_control(settings.STORAGE_CACHE_MAX_AGE_SECONDS)}
+            etag = e.response.get("ResponseMetadata", {}).get("HTTPHeaders", {}).get("etag")
+            if etag:
+                headers["ETag"] = etag
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        if code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE:
+            return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        if code in (status.HTTP_403_FORBIDDEN, status.HTTP_404_NOT_FOUND):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Storage backend error")
+
+    # S3 ETags are the MD5 of the content for single-part uploads
+    headers = _cache_headers(obj["ETag"], last_modified(obj.get("LastModified")), cache_control)
+    headers["Content-Length"] = str(obj["ContentLength"])
+    media_type = obj.get("ContentType") or content_type_for_path(key)
+
+    if request.method == "HEAD":
+        return Response(headers=headers, media_type=media_type)
+
+    status_code = status.HTTP_200_OK
+    if obj.get("ContentRange"):
+        headers["Content-Range"] = obj["ContentRange"]
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+
+    return StreamingResponse(
+        obj["Body"].iter_chunks(settings.STORAGE_PROXY_CHUNK_BYTES),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type
+    )
+
+
+@router.api_route("/local-storage/{key:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_local_object(key: str, request: Request):
+    """
+    Serve an object from local development storage
+    """
+    return await _serve_local(request, key)
+
+
+@router.api_route("/storage/{key:path}", methods=["GET", "HEAD"])
+async def serve_object(
+    key: str,
+    request: Request,
+    expires: Optional[int] = None,
+    signature: Optional[str] = None
+):
+    """
+    Serve a stored object from local storage or S3
+    
+    Requires a URL signed by storage_service.storage_proxy_url.
+    """
+    if not storage_service.verify_storage_signature(key, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired storage signature")
+    
+    # Signed URLs are per user and expire, so only the browser may cache them, until expiry
+    max_age = min(settings.STORAGE_CACHE_MAX_AGE_SECONDS, max(0, expires - int(time.time())))
+    cache_control = f"private, max-age={max_age}, immutable"
+    
+    if storage_service.use_local_storage:
+        return await _serve_local(request, key, cache_control)
+    return await _serve_s3(request, key, cache_control)
@@ -2,26 +2,34 @@
 User API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User, Quota
 from app.schemas.user import UserProfileResponse, QuotaResponse
-from app.utils.auth import get_current_user
+from app.utils.auth import get_current_user, get_token_user
+from app.services.job_service import quota_counter
+from datetime import datetime, timezone
 
 router = APIRouter()
 
 
+def _live_quota(user: User, quota: Quota) -> dict:
+    """Quota payload with usage taken from the Redis counters when present."""
+    return quota_counter.apply_usage(str(user.id), quota.to_dict(), datetime.now(timezone.utc))
+
+
 @router.get("/profile", response_model=UserProfileResponse)
 async def get_profile(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current user's profile information
     """
     # Get quota information
-    quota = db.query(Quota).filter(Quota.user_id == current_user.id).first()
+    quota = await db.scalar(select(Quota).where(Quota.user_id == current_user.id))
     
     if not quota:
         # Create default quota
@@ -32,8 +40,8 @@ async def get_profile(
             monthly_limit=settings.FREE_MONTHLY_LIMIT
         )
         db.add(quota)
-        db.commit()
-        db.refresh(quota)
+        await db.commit()
+        await db.refresh(quota)
     
     return UserProfileResponse(
         id=str(current_user.id),
@@ -42,20 +50,20 @@ async def get_profile(
         profile_picture_url=current_user.profile_picture_url,
         plan=current_user.plan.value,
         credits_remaining=current_user.credits_remaining,
-        quota=QuotaResponse(**quota.to_dict()),
+        quota=QuotaResponse(**_live_quota(current_user, quota)),
         created_at=current_user.created_at
     )
 
 
 @router.get("/quota", response_model=QuotaResponse)
 async def get_quota(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_token_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current user's quota and usage information
     """
-    quota = db.query(Quota).filter(Quota.user_id == current_user.id).first()
+    quota = await db.scalar(select(Quota).where(Quota.user_id == current_user.id))
     
     if not quota:
         raise HTTPException(
@@ -63,4 +71,4 @@ async def get_quota(
             detail="Quota information not found"
         )
     
-    return QuotaResponse(**quota.to_dict())
+    return QuotaResponse(**_live_quota(current_user, quota))
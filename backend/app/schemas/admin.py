@@ -0,0 +1,19 @@
+"""
+Admin Pydantic schemas
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class ProfilingUpdate(BaseModel):
+    """Runtime profiling override for every API and worker process"""
+    enabled: bool
+    sample_rate: float = Field(0.05, ge=0, le=1, description="Fraction of jobs/requests to profile")
+    duration_seconds: int = Field(3600, ge=1, le=7 * 24 * 3600, description="Override lifetime")
+
+
+class ProfilingStatusResponse(BaseModel):
+    """Effective profiling settings"""
+    enabled: bool
+    sample_rate: float
+    override_expires_in_seconds: Optional[int]
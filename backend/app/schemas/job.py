@@ -19,6 +19,7 @@ class JobStatusResponse(BaseModel):
     status: str
     progress: Optional[int] = Field(None, description="Progress percentage (0-100)")
     estimated_time_remaining: Optional[int] = Field(None, description="Seconds remaining")
+    preview_url: Optional[str] = Field(None, description="Draft result, available while processing")
     created_at: datetime
     started_at: Optional[datetime]
     completed_at: Optional[datetime]
@@ -32,8 +33,10 @@ class JobResultResponse(BaseModel):
     job_id: str
     status: str
     result_url: Optional[str] = None
+    preview_url: Optional[str] = Field(None, description="Draft result published before the full result")
     thumbnail_url: Optional[str] = None
     processing_time_ms: Optional[int] = None
+    quality_tier: Optional[str] = Field(None, description="draft, standard or hd")
     error_message: Optional[str] = None
     
     class Config:
@@ -41,8 +44,8 @@ class JobResultResponse(BaseModel):
 
 
 class JobListResponse(BaseModel):
-    """List of jobs response"""
+    """List of jobs response (keyset paginated)"""
     jobs: list
-    total: int
-    page: int
+    next_cursor: Optional[str] = Field(None, description="Pass as ?cursor= to fetch the next page")
+    total: Optional[int] = Field(None, description="Only returned when include_total=true")
     page_size: int
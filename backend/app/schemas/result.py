@@ -0,0 +1,18 @@
+"""
+Result Pydantic schemas
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class ResultListResponse(BaseModel):
+    """Gallery page of results (keyset paginated)"""
+    results: list
+    next_cursor: Optional[str] = Field(None, description="Pass as ?cursor= to fetch the next page")
+    limit: int
+
+
+class FavoriteResponse(BaseModel):
+    """Favorite toggle response"""
+    result_id: str
+    is_favorite: bool
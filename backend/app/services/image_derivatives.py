@@ -0,0 +1,147 @@
+"""
+Derivative generation for try-on results
+
+A finished result is stored three times: a small thumbnail for gallery grids,
+a web-size preview for the result page and the full-resolution image for
+download. Previews are encoded as AVIF or WebP when this Pillow build can
+write them, falling back to JPEG; the full-resolution format can be chosen
+per plan (see output_encoding).
+
+Encoding is CPU bound, so derivatives are encoded in parallel in a process
+pool. This module deliberately does not import app.config so the GPU worker
+can use it with its own environment-based configuration.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from app.services.output_encoding import OutputFormat, encode_image, resolve_format
+
+
+@dataclass(frozen=True)
+class DerivativeSpec:
+    """One output size: longest edge in pixels (None keeps the original) and quality."""
+    name: str
+    max_edge: Optional[int]
+    quality: int
+
+
+@dataclass(frozen=True)
+class EncodedImage:
+    """An encoded derivative ready for upload."""
+    name: str
+    data: bytes
+    content_type: str
+    extension: str
+    width: int
+    height: int
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+def default_specs(thumbnail_edge: int = 320, preview_edge: int = 1280) -> tuple[DerivativeSpec, ...]:
+    """Thumbnail, preview and full-resolution specs."""
+    return (
+        DerivativeSpec("thumbnail", thumbnail_edge, 75),
+        DerivativeSpec("preview", preview_edge, 82),
+        DerivativeSpec("full", None, 90),
+    )
+
+
+def encode_derivative(source_path: str, spec: DerivativeSpec, fmt: OutputFormat) -> EncodedImage:
+    """
+    Resize and encode one derivative
+
+    Top-level so it can run in a process pool.
+
+    Args:
+        source_path: Full-resolution result on local disk
+        spec: Output size and quality
+        fmt: Output format; JPEG is used if encoding in it fails
+
+    Returns:
+        EncodedImage
+    """
+    from PIL import Image
+
+    with Image.open(source_path) as source:
+        image = source.convert("RGB")
+
+    if spec.max_edge and max(image.size) > spec.max_edge:
+        image.thumbnail((spec.max_edge, spec.max_edge), Image.Resampling.LANCZOS)
+
+    data, fmt = encode_image(image, fmt, spec.quality)
+    return EncodedImage(spec.name, data, fmt.content_type, fmt.extension, image.width, image.height)
+
+
+class DerivativeGenerator:
+    """Encodes all derivatives of a result in parallel."""
+
+    def __init__(
+        self,
+        specs: Sequence[DerivativeSpec] = None,
+        formats: Sequence[str] = ("avif", "webp"),
+        max_workers: int = 3
+    ):
+        self.specs = tuple(specs or default_specs())
+        self.formats = tuple(formats)
+        self.max_workers = max_workers
+        self._format: Optional[OutputFormat] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def format(self) -> OutputFormat:
+        """Preview format: the first of formats this Pillow build can write"""
+        # Resolved on first use; probing encoders loads Pillow
+        if self._format is None:
+            self._format = resolve_format(self.formats)
+        return self._format
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Created on first use so the worker forks after its own startup
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _plan(self, full_output: Optional[tuple[OutputFormat, int]]) -> list[tuple[DerivativeSpec, OutputFormat]]:
+        plan = []
+        for spec in self.specs:
+            fmt = self.format
+            if spec.max_edge is None and full_output:
+                fmt, quality = full_output
+                spec = DerivativeSpec(spec.name, spec.max_edge, quality)
+            plan.append((spec, fmt))
+        return plan
+
+    def generate(
+        self,
+        source_path: str,
+        full_output: Optional[tuple[OutputFormat, int]] = None
+    ) -> dict[str, EncodedImage]:
+        """
+        Encode every spec of one result
+
+        Args:
+            source_path: Full-resolution result on local disk
+            full_output: (format, quality) for the full-resolution derivative,
+                e.g. from OutputEncodingPolicy.for_plan; defaults to self.format
+
+        Returns:
+            Dict of spec name -> EncodedImage
+        """
+        plan = self._plan(full_output)
+        if self.max_workers <= 1:
+            return {spec.name: encode_derivative(source_path, spec, fmt) for spec, fmt in plan}
+
+        futures = {
+            spec.name: self._pool().submit(encode_derivative, source_path, spec, fmt)
+            for spec, fmt in plan
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,144 @@
+"""
+Write-through job state cache in Redis
+
+Each job is mirrored as a compact hash (``job_state:<job_id>``) holding only
+the fields the status/result endpoints need, so polling does not hit Postgres.
+Writers (JobService and the GPU worker) update the hash after every committed
+status change; readers fall back to the database on a miss and repopulate.
+"""
+from datetime import datetime
+from typing import Optional
+
+from app.utils.metrics import record_cache
+
+
+# Fields mirrored from the Job row. Everything is stored as strings; an empty
+# string means "not set".
+JOB_STATE_FIELDS = (
+    "user_id",
+    "status",
+    "result_image_url",
+    "result_image_key",
+    "preview_url",
+    "preview_key",
+    "error_message",
+    "processing_time_ms",
+    "quality_tier",
+    "created_at",
+    "started_at",
+    "completed_at",
+)
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# Atomically write the hash unless the job was already cancelled: a worker
+# finishing late must not resurrect a job the user cancelled.
+# KEYS[1] = job state key
+# ARGV[1] = ttl seconds, ARGV[2..] = field/value pairs (status first)
+_WRITE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'status')
+if current == 'cancelled' and ARGV[3] ~= 'cancelled' then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+return 1
+"""
+
+
+def _encode(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return str(value.value)
+    return str(value)
+
+
+class JobStateCache:
+    """Compact per-job Redis hash with status-dependent TTLs"""
+
+    def __init__(self, redis_client, active_ttl: int, terminal_ttl: int):
+        """
+        Args:
+            redis_client: Redis client created with decode_responses=True
+            active_ttl: TTL in seconds for pending/processing jobs
+            terminal_ttl: TTL in seconds for completed/failed/cancelled jobs
+        """
+        self.redis = redis_client
+        self.active_ttl = active_ttl
+        self.terminal_ttl = terminal_ttl
+        self._write = redis_client.register_script(_WRITE_SCRIPT)
+
+    @staticmethod
+    def key(job_id: str) -> str:
+        return f"job_state:{job_id}"
+
+    def ttl_for(self, status: str) -> int:
+        """Active jobs only need to outlive the processing window; finished
+        jobs are polled once or twice more and then viewed from the gallery."""
+        return self.terminal_ttl if status in TERMINAL_STATUSES else self.active_ttl
+
+    @staticmethod
+    def snapshot(job) -> dict:
+        """Build the cached representation of a Job row."""
+        return {field: _encode(getattr(job, field)) for field in JOB_STATE_FIELDS}
+
+    def write(self, job_id: str, state: dict) -> bool:
+        """
+        Write (or overwrite) a job's cached state
+
+        Args:
+            job_id: Job UUID
+            state: Mapping of JOB_STATE_FIELDS to values; must contain 'status'
+
+        Returns:
+            True if written, False if skipped (job cancelled) or Redis failed
+        """
+        encoded = {field: _encode(value) for field, value in state.items()}
+        status = encoded["status"]
+        args = [self.ttl_for(status), "status", status]
+        for field, value in encoded.items():
+            if field != "status":
+                args.extend([field, value])
+
+        try:
+            return bool(self._write(keys=[self.key(job_id)], args=args))
+        except Exception:
+            return False
+
+    def write_job(self, job) -> bool:
+        """Write-through helper for a freshly committed Job row."""
+        return self.write(str(job.id), self.snapshot(job))
+
+    def read(self, job_id: str) -> Optional[dict]:
+        """
+        Read a job's cached state
+
+        Returns:
+            Dict keyed like Job.to_dict() (None for unset fields), or None on
+            a miss or Redis error
+        """
+        try:
+            raw = self.redis.hgetall(self.key(job_id))
+        except Exception:
+            return None
+
+        if not raw or "status" not in raw:
+            record_cache("job_state", False)
+            return None
+
+        record_cache("job_state", True)
+        state = {field: (raw.get(field) or None) for field in JOB_STATE_FIELDS}
+        state["id"] = job_id
+        if state["processing_time_ms"] is not None:
+            state["processing_time_ms"] = int(state["processing_time_ms"])
+        return state
+
+    def invalidate(self, job_id: str) -> None:
+        """Drop a job's cached state."""
+        try:
+            self.redis.delete(self.key(job_id))
+        except Exception:
+            pass
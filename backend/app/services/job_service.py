@@ -1,21 +1,80 @@
 """
 Job service for managing virtual try-on jobs
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select, func
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Job, JobStatus, User, Result, Quota
 from app.config import settings
+from app.services.job_cache import JobStateCache
+from app.services.quota_service import (
+    QuotaCounter,
+    RESERVED,
+    NEEDS_SEED,
+    DAILY_LIMIT_REACHED,
+    MONTHLY_LIMIT_REACHED,
+    start_of_day,
+    start_of_month,
+)
+from app.services.image_derivatives import DerivativeGenerator, default_specs
+from app.services.output_encoding import OutputEncodingPolicy
+from app.services.storage_service import StoredObject
+from app.utils.pagination import apply_keyset, split_page
+from app.utils.metrics import record_cache
+from app.utils.tracing import SpanKind, inject_context, span
+from app.utils.profiling import ProfilingPolicy
 from datetime import datetime, timedelta, timezone
 import redis
 import json
+import time
 import uuid
 
 # Redis client for job queue
 redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
 
+# Write-through cache for job status polling
+job_state_cache = JobStateCache(
+    redis_client,
+    active_ttl=settings.JOB_CACHE_ACTIVE_TTL_SECONDS,
+    terminal_ttl=settings.JOB_CACHE_TERMINAL_TTL_SECONDS,
+)
+
+# Atomic quota counters (reconciled to the quotas table in the background)
+quota_counter = QuotaCounter(redis_client)
+
+# Which jobs/requests are profiled (admin override shared via Redis)
+profiling_policy = ProfilingPolicy(
+    redis_client,
+    enabled=settings.PROFILING_ENABLED,
+    sample_rate=settings.PROFILING_SAMPLE_RATE
+)
+
+# Result format and quality per plan tier
+output_encoding = OutputEncodingPolicy({
+    "free": (settings.OUTPUT_FORMAT_FREE, settings.OUTPUT_QUALITY_FREE),
+    "pro": (settings.OUTPUT_FORMAT_PRO, settings.OUTPUT_QUALITY_PRO),
+    "enterprise": (settings.OUTPUT_FORMAT_ENTERPRISE, settings.OUTPUT_QUALITY_ENTERPRISE),
+})
+
+# Gallery thumbnail and preview of results generated in the API (local mode);
+# the full-resolution result is already encoded per plan
+gallery_derivatives = DerivativeGenerator(
+    specs=[spec for spec in default_specs() if spec.max_edge is not None],
+    max_workers=1,
+)
+
 
 class JobService:
     """Service for job management"""
 
+    @staticmethod
+    def _job_uuid(job_id) -> uuid.UUID:
+        """Parse a job id from a URL or queue payload."""
+        try:
+            return uuid.UUID(str(job_id))
+        except ValueError:
+            raise ValueError("Job not found")
+    
     @staticmethod
     def _to_utc(dt: datetime) -> datetime:
         """Normalize datetime to timezone-aware UTC."""
@@ -24,14 +83,10 @@ class JobService:
         return dt.astimezone(timezone.utc)
     
     @staticmethod
-    def check_quota(db: Session, user: User) -> tuple[bool, str]:
-        """
-        Check if user has available quota
-        
-        Returns:
-            (has_quota, message)
-        """
-        quota = db.query(Quota).filter(Quota.user_id == user.id).first()
+    async def _get_or_create_quota(db: AsyncSession, user: User) -> Quota:
+        """Load the user's quota row, creating it with default limits."""
+        result = await db.execute(select(Quota).where(Quota.user_id == user.id))
+        quota = result.scalar_one_or_none()
         
         if not quota:
             # Create initial quota
@@ -41,40 +96,130 @@ class JobService:
                 monthly_limit=settings.FREE_MONTHLY_LIMIT
             )
             db.add(quota)
-            db.commit()
+            await db.commit()
+            await db.refresh(quota)
         
-        # Check if quota needs reset
-        now = datetime.now(timezone.utc)
+        return quota
+    
+    @staticmethod
+    def _quota_seed(quota: Quota, now: datetime) -> dict:
+        """Current-period counters and limits from the quotas table."""
         daily_reset_at = JobService._to_utc(quota.last_daily_reset)
         monthly_reset_at = JobService._to_utc(quota.last_monthly_reset)
         
-        # Daily reset
-        if (now - daily_reset_at).days >= 1:
+        return {
+            "daily_used": quota.daily_used if daily_reset_at >= start_of_day(now) else 0,
+            "monthly_used": quota.monthly_used if monthly_reset_at >= start_of_month(now) else 0,
+            "daily_limit": quota.daily_limit,
+            "monthly_limit": quota.monthly_limit,
+        }
+    
+    @staticmethod
+    def _limit_message(code: int, usage: dict) -> str:
+        if code == DAILY_LIMIT_REACHED:
+            return f"Daily limit reached ({usage['daily_limit']}). Resets at midnight UTC."
+        return f"Monthly limit reached ({usage['monthly_limit']}). Upgrade to Pro for more."
+    
+    @staticmethod
+    async def check_quota(db: AsyncSession, user: User) -> tuple[bool, str]:
+        """
+        Check and reserve one unit of the user's quota
+        
+        The check and the increment happen in a single Redis script, so
+        concurrent requests cannot both pass on the last remaining unit.
+        Limits are cached in the Redis quota hash with the counters, so the
+        quotas table is only read (and the row created) when the hash or its
+        limits are missing: the first job in a month, or the first after a
+        plan or limit change. Call refund_quota() if the job is not created
+        after all.
+        
+        Returns:
+            (has_quota, message)
+        """
+        now = datetime.now(timezone.utc)
+        user_id = str(user.id)
+        
+        try:
+            code, usage = quota_counter.reserve(user_id, now)
+            if code == NEEDS_SEED:
+                quota = await JobService._get_or_create_quota(db, user)
+                seed = JobService._quota_seed(quota, now)
+                code, usage = quota_counter.reserve(user_id, now, seed=seed)
+        except redis.RedisError:
+            return await JobService._check_quota_db(db, user, now)
+        
+        if code != RESERVED:
+            return False, JobService._limit_message(code, usage)
+        
+        return True, "Quota available"
+    
+    @staticmethod
+    async def _check_quota_db(db: AsyncSession, user: User, now: datetime) -> tuple[bool, str]:
+        """Fallback reservation against the quotas table when Redis is down."""
+        await JobService._get_or_create_quota(db, user)
+        result = await db.execute(
+            select(Quota).where(Quota.user_id == user.id).with_for_update()
+        )
+        quota = result.scalar_one()
+        
+        # Calendar-aligned resets
+        if JobService._to_utc(quota.last_daily_reset) < start_of_day(now):
             quota.daily_used = 0
             quota.last_daily_reset = now
         
-        # Monthly reset
-        if (now - monthly_reset_at).days >= 30:
+        if JobService._to_utc(quota.last_monthly_reset) < start_of_month(now):
             quota.monthly_used = 0
             quota.last_monthly_reset = now
         
-        db.commit()
+        usage = {"daily_limit": quota.daily_limit, "monthly_limit": quota.monthly_limit}
         
         # Check limits
         if quota.daily_used >= quota.daily_limit:
-            return False, f"Daily limit reached ({quota.daily_limit}). Resets at midnight UTC."
+            await db.commit()
+            return False, JobService._limit_message(DAILY_LIMIT_REACHED, usage)
         
         if quota.monthly_used >= quota.monthly_limit:
-            return False, f"Monthly limit reached ({quota.monthly_limit}). Upgrade to Pro for more."
+            await db.commit()
+            return False, JobService._limit_message(MONTHLY_LIMIT_REACHED, usage)
+        
+        quota.daily_used += 1
+        quota.monthly_used += 1
+        await db.commit()
         
         return True, "Quota available"
     
     @staticmethod
-    def create_job(
-        db: Session,
+    def refund_quota(user: User, charged_at: datetime = None) -> bool:
+        """
+        Give back one unit of quota reserved by check_quota()
+        
+        Args:
+            user: User object
+            charged_at: When the unit was reserved (defaults to now)
+        
+        Returns:
+            True if quota was refunded
+        """
+        charged_at = charged_at or datetime.now(timezone.utc)
+        return quota_counter.refund(str(user.id), charged_at)
+    
+    @staticmethod
+    def sync_quotas(db: Session, batch_size: int = None) -> int:
+        """
+        Reconcile Redis quota counters to the quotas table
+        
+        Returns:
+            Number of quota rows updated
+        """
+        return quota_counter.sync_dirty(db, batch_size or settings.QUOTA_SYNC_BATCH_SIZE)
+    
+    @staticmethod
+    async def create_job(
+        db: AsyncSession,
         user: User,
-        user_image_url: str,
-        garment_image_url: str
+        user_image: StoredObject,
+        garment_image: StoredObject,
+        job_id: str = None
     ) -> Job:
         """
         Create a new try-on job
@@ -82,8 +227,9 @@ class JobService:
         Args:
             db: Database session
             user: User object
-            user_image_url: S3 URL of user image
-            garment_image_url: S3 URL of garment image
+            user_image: Uploaded user image
+            garment_image: Uploaded garment image
+            job_id: Id the inputs were stored under (generated if None)
         
         Returns:
             Created Job object
@@ -91,21 +237,31 @@ class JobService:
         job = Job(
             user_id=user.id,
             status=JobStatus.PENDING,
-            user_image_url=user_image_url,
-            garment_image_url=garment_image_url
+            user_image_url=user_image.url,
+            garment_image_url=garment_image.url,
+            storage_bucket=user_image.bucket,
+            user_image_key=user_image.key,
+            garment_image_key=garment_image.key,
+            user_image_sha256=user_image.sha256,
+            garment_image_sha256=garment_image.sha256,
+            user_image_size=user_image.size,
+            garment_image_size=garment_image.size
         )
+        if job_id:
+            # Keep the job id in sync with the storage keys
+            job.id = JobService._job_uuid(job_id)
         
         db.add(job)
-        db.commit()
-        db.refresh(job)
+        await db.commit()
+        await db.refresh(job)
+        job_state_cache.write_job(job)
         
-        # Increment quota
-        quota = db.query(Quota).filter(Quota.user_id == user.id).first()
-        if quota:
-            quota.daily_used += 1
-            quota.monthly_used += 1
-            db.commit()
+        try:
+            redis_client.delete(JobService._jobs_total_key(user.id))
+        except redis.RedisError:
+            pass
         
+        # Quota was already consumed by check_quota()
         return job
     
     @staticmethod
@@ -113,31 +269,41 @@ class JobService:
         """
         Add job to Redis queue for processing
         
+        The current trace context is carried in the payload so the worker
+        continues the request's trace.
+        
         Args:
             job_id: Job UUID
         
         Returns:
             True if successful
         """
-        job_data = {
-            "job_id": str(job_id),
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        try:
-            redis_client.lpush("job_queue", json.dumps(job_data))
-            return True
-        except Exception:
-            return False
+        with span("queue.enqueue", kind=SpanKind.PRODUCER, **{"job.id": str(job_id)}):
+            job_data = {
+                "job_id": str(job_id),
+                "timestamp": datetime.utcnow().isoformat(),
+                # Unix time, for the worker's queue wait metric
+                "enqueued_at": time.time(),
+                "trace_context": inject_context()
+            }
+            
+            try:
+                redis_client.lpush("job_queue", json.dumps(job_data))
+                return True
+            except Exception:
+                return False
     
     @staticmethod
-    def update_job_status(
-        db: Session,
+    async def update_job_status(
+        db: AsyncSession,
         job_id: str,
         status: JobStatus,
         result_url: str = None,
         error_message: str = None,
-        processing_time_ms: int = None
+        processing_time_ms: int = None,
+        result_key: str = None,
+        derivative_urls: dict = None,
+        derivative_keys: dict = None
     ) -> Job:
         """
         Update job status
@@ -149,11 +315,15 @@ class JobService:
             result_url: Optional result URL
             error_message: Optional error message
             processing_time_ms: Optional processing time
+            result_key: Optional storage key of the result
+            derivative_urls: Optional "thumbnail"/"preview" URLs for the gallery
+            derivative_keys: Optional storage keys of those derivatives
         
         Returns:
             Updated Job object
         """
-        job = db.query(Job).filter(Job.id == job_id).first()
+        result = await db.execute(select(Job).where(Job.id == JobService._job_uuid(job_id)))
+        job = result.scalar_one_or_none()
         
         if not job:
             raise ValueError(f"Job {job_id} not found")
@@ -169,29 +339,40 @@ class JobService:
         if result_url:
             job.result_image_url = result_url
         
+        if result_key:
+            job.result_image_key = result_key
+        
         if error_message:
             job.error_message = error_message
         
         if processing_time_ms:
             job.processing_time_ms = processing_time_ms
         
-        db.commit()
-        db.refresh(job)
+        await db.commit()
+        await db.refresh(job)
+        job_state_cache.write_job(job)
         
         # Create result entry if completed
         if status == JobStatus.COMPLETED and result_url:
+            derivative_urls = derivative_urls or {}
+            derivative_keys = derivative_keys or {}
             result = Result(
                 job_id=job.id,
                 user_id=job.user_id,
-                image_url=result_url
+                image_url=result_url,
+                preview_url=derivative_urls.get("preview"),
+                thumbnail_url=derivative_urls.get("thumbnail"),
+                image_key=result_key,
+                preview_key=derivative_keys.get("preview"),
+                thumbnail_key=derivative_keys.get("thumbnail")
             )
             db.add(result)
-            db.commit()
+            await db.commit()
         
         return job
     
     @staticmethod
-    def get_job(db: Session, job_id: str, user: User = None) -> Job:
+    async def get_job(db: AsyncSession, job_id: str, user: User = None) -> Job:
         """
         Get job by ID
         
@@ -203,12 +384,13 @@ class JobService:
         Returns:
             Job object
         """
-        query = db.query(Job).filter(Job.id == job_id)
+        query = select(Job).where(Job.id == JobService._job_uuid(job_id))
         
         if user:
-            query = query.filter(Job.user_id == user.id)
+            query = query.where(Job.user_id == user.id)
         
-        job = query.first()
+        result = await db.execute(query)
+        job = result.scalar_one_or_none()
         
         if not job:
             raise ValueError("Job not found")
@@ -216,43 +398,158 @@ class JobService:
         return job
     
     @staticmethod
-    def list_user_jobs(
-        db: Session,
+    async def get_job_state(db: AsyncSession, job_id: str, user: User) -> dict:
+        """
+        Get job state for polling endpoints, served from the Redis cache
+        
+        Falls back to the database on a cache miss and repopulates the cache.
+        
+        Args:
+            db: Database session
+            job_id: Job UUID
+            user: Owner of the job
+        
+        Returns:
+            Dict keyed like Job.to_dict()
+        """
+        state = job_state_cache.read(job_id)
+        if state is not None:
+            if state["user_id"] != str(user.id):
+                raise ValueError("Job not found")
+            return state
+        
+        job = await JobService.get_job(db, job_id, user)
+        job_state_cache.write_job(job)
+        return job.to_dict()
+    
+    @staticmethod
+    def _jobs_total_key(user_id) -> str:
+        return f"jobs_total:{user_id}"
+    
+    @staticmethod
+    async def count_user_jobs(db: AsyncSession, user: User) -> int:
+        """
+        Count a user's jobs, cached in Redis for JOBS_TOTAL_CACHE_TTL_SECONDS
+        
+        The cached value is dropped whenever the user creates a job, so it can
+        only lag behind deletions by at most the TTL.
+        """
+        key = JobService._jobs_total_key(user.id)
+        try:
+            cached = redis_client.get(key)
+            record_cache("jobs_total", cached is not None)
+            if cached is not None:
+                return int(cached)
+        except redis.RedisError:
+            pass
+        
+        total = await db.scalar(
+            select(func.count()).select_from(Job).where(Job.user_id == user.id)
+        )
+        
+        try:
+            redis_client.setex(key, settings.JOBS_TOTAL_CACHE_TTL_SECONDS, total)
+        except redis.RedisError:
+            pass
+        return total
+    
+    @staticmethod
+    async def list_user_jobs(
+        db: AsyncSession,
         user: User,
-        page: int = 1,
-        page_size: int = 20
-    ) -> tuple[list, int]:
+        cursor: str = None,
+        page_size: int = 20,
+        include_total: bool = False
+    ) -> tuple[list, str, int]:
         """
-        List user's jobs with pagination
+        List user's jobs, newest first, with keyset pagination
+        
+        Only Job.SUMMARY_COLUMNS are loaded; serialize with to_summary_dict().
+        
+        Args:
+            db: Database session
+            user: User object
+            cursor: Cursor returned with the previous page (None for the first)
+            page_size: Jobs per page
+            include_total: Also return the (cached) total job count
         
         Returns:
-            (jobs, total_count)
+            (jobs, next_cursor, total_count or None)
+        
+        Raises:
+            ValueError: If the cursor is malformed
         """
-        query = db.query(Job).filter(Job.user_id == user.id).order_by(Job.created_at.desc())
+        query = (
+            select(Job)
+            .options(load_only(*(getattr(Job, name) for name in Job.SUMMARY_COLUMNS)))
+            .where(Job.user_id == user.id)
+        )
+        query = apply_keyset(query, Job.created_at, Job.id, cursor, page_size)
         
-        total = query.count()
-        jobs = query.offset((page - 1) * page_size).limit(page_size).all()
+        result = await db.execute(query)
+        jobs, next_cursor = split_page(result.scalars().all(), page_size)
         
-        return jobs, total
+        total = await JobService.count_user_jobs(db, user) if include_total else None
+        
+        return jobs, next_cursor, total
     
     @staticmethod
-    def delete_job(db: Session, job_id: str, user: User) -> bool:
+    async def delete_job(db: AsyncSession, job_id: str, user: User) -> bool:
         """
         Delete a job (soft delete by setting status to CANCELLED)
         
         Returns:
             True if successful
         """
-        job = db.query(Job).filter(
-            Job.id == job_id,
-            Job.user_id == user.id
-        ).first()
+        result = await db.execute(
+            select(Job).where(
+                Job.id == JobService._job_uuid(job_id),
+                Job.user_id == user.id
+            )
+        )
+        job = result.scalar_one_or_none()
         
         if not job:
             raise ValueError("Job not found")
         
         if job.status in [JobStatus.PENDING, JobStatus.PROCESSING]:
             job.status = JobStatus.CANCELLED
-            db.commit()
+            await db.commit()
+            # Mark the cached state cancelled (rather than deleting it) so a
+            # worker that is mid-flight cannot overwrite it on completion.
+            job_state_cache.write_job(job)
         
         return True
+
+
+@event.listens_for(Quota, "after_update")
+def _track_quota_limit_changes(mapper, connection, target: Quota):
+    """Remember quotas whose limits changed in this transaction."""
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ("daily_limit", "monthly_limit")):
+        if state.session is not None:
+            state.session.info.setdefault("quota_limit_invalidations", set()).add(str(target.user_id))
+
+
+@event.listens_for(User, "after_update")
+def _track_plan_changes(mapper, connection, target: User):
+    """A plan change usually comes with new limits."""
+    state = inspect(target)
+    if state.attrs["plan"].history.has_changes() and state.session is not None:
+        state.session.info.setdefault("quota_limit_invalidations", set()).add(str(target.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_quota_limits(session: Session):
+    """Drop cached limits once the change is durable, so the reload sees it."""
+    user_ids = session.info.pop("quota_limit_invalidations", ())
+    if user_ids:
+        try:
+            quota_counter.forget_limits(*user_ids)
+        except redis.RedisError as e:
+            print(f"⚠️  Cached quota limits not cleared: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_quota_limit_changes(session: Session):
+    session.info.pop("quota_limit_invalidations", None)
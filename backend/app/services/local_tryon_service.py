@@ -8,8 +8,14 @@ without requiring GPU diffusion models.
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Optional
 from PIL import Image, ImageFilter, ImageEnhance, ImageChops
 
+from app.services.output_encoding import OutputFormat, encode_image, format_for_path
+
+# Canvas the garment is placed on (person photos are normalized to it)
+WORKING_SIZE = (768, 1024)
+
 
 class LocalTryonService:
     """Simple image-based virtual try-on for local development."""
@@ -65,15 +71,34 @@ class LocalTryonService:
         return mask.filter(ImageFilter.GaussianBlur(3))
 
     @staticmethod
-    def generate(person_image_path: str, garment_image_path: str, output_path: str) -> str:
-        """Generate a local try-on output image and save it to output_path."""
-        person = Image.open(person_image_path).convert("RGB")
-        garment = Image.open(garment_image_path).convert("RGB")
+    def _fit_size(size: tuple[int, int], max_edge: int) -> tuple[int, int]:
+        """Scale size down so its longer edge is at most max_edge."""
+        scale = min(1.0, max_edge / max(size))
+        return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
 
-        # Normalize person size for stable placement, then back to original resolution.
-        original_size = person.size
-        person_work = person.resize((768, 1024), Image.Resampling.LANCZOS)
-        garment_work = garment.resize((720, 960), Image.Resampling.LANCZOS)
+    @staticmethod
+    def composite(
+        person: Image.Image,
+        garment: Image.Image,
+        working_size: tuple[int, int] = WORKING_SIZE,
+    ) -> Image.Image:
+        """
+        Place the garment on the person at working_size.
+
+        Args:
+            person: Person photo (RGB)
+            garment: Garment photo (RGB)
+            working_size: Canvas (width, height) the composite is built on
+
+        Returns:
+            RGB composite at working_size with the face and hair untouched
+        """
+        person_work = person.resize(working_size, Image.Resampling.LANCZOS)
+        # 720x960 at the default working size
+        garment_work = garment.resize(
+            (round(working_size[0] * 0.9375), round(working_size[1] * 0.9375)),
+            Image.Resampling.LANCZOS,
+        )
 
         garment_rgba = LocalTryonService._extract_garment_alpha(garment_work)
 
@@ -121,20 +146,70 @@ class LocalTryonService:
         original_rgb = person_work.convert("RGB")
         blended_rgb.paste(original_rgb, mask=protect)
 
+        # The blurred mask feathers its edge into the garment, so only fully
+        # protected pixels are guaranteed to be copied from the original.
+        core = protect.point(lambda px: 255 if px == 255 else 0)
         black = Image.new("RGB", blended_rgb.size, (0, 0, 0))
-        protected_generated = Image.composite(blended_rgb, black, protect)
-        protected_original = Image.composite(original_rgb, black, protect)
+        protected_generated = Image.composite(blended_rgb, black, core)
+        protected_original = Image.composite(original_rgb, black, core)
         if protected_generated.tobytes() != protected_original.tobytes():
             raise ValueError("Local mode face/hair protection validation failed")
 
-        final_image = blended_rgb.resize(original_size, Image.Resampling.LANCZOS)
+        return blended_rgb
+
+    @staticmethod
+    def draft(person_image_path, garment_image_path, max_edge: int = 512) -> Image.Image:
+        """
+        Quick low-resolution composite for a preview.
+
+        JPEG inputs are decoded at reduced scale and the composite is built
+        on a canvas no larger than max_edge, instead of rendering at full
+        working size and shrinking the result.
+
+        Args:
+            person_image_path: Person photo (path or file object)
+            garment_image_path: Garment photo (path or file object)
+            max_edge: Longer edge of the draft in pixels
+
+        Returns:
+            RGB draft in the person photo's aspect ratio
+        """
+        working_size = LocalTryonService._fit_size(WORKING_SIZE, max_edge)
+        with Image.open(person_image_path) as person, Image.open(garment_image_path) as garment:
+            output_size = LocalTryonService._fit_size(person.size, max_edge)
+            person.draft("RGB", working_size)
+            garment.draft("RGB", working_size)
+            draft = LocalTryonService.composite(person.convert("RGB"), garment.convert("RGB"), working_size)
+        return draft.resize(output_size, Image.Resampling.LANCZOS)
+
+    @staticmethod
+    def generate(
+        person_image_path: str,
+        garment_image_path: str,
+        output_path: str,
+        output_format: Optional[OutputFormat] = None,
+        quality: int = 90,
+    ) -> str:
+        """
+        Generate a local try-on output image and save it to output_path.
+
+        Inputs may be paths or file objects (e.g. in-memory downloads).
+        The output is encoded as output_format, or as the format implied by
+        output_path's extension, so a ``.png`` path gets a real PNG.
+        """
+        person = Image.open(person_image_path).convert("RGB")
+        garment = Image.open(garment_image_path).convert("RGB")
+
+        # Normalize person size for stable placement, then back to original resolution.
+        original_size = person.size
+        final_image = LocalTryonService.composite(person, garment).resize(original_size, Image.Resampling.LANCZOS)
 
         if final_image.size != original_size:
             raise ValueError(f"Output size mismatch: expected {original_size}, got {final_image.size}")
 
         out_path = Path(output_path)
         out_path.parent.mkdir(parents=True, exist_ok=True)
-        final_image.save(out_path, format="JPEG", quality=95)
+        data, _ = encode_image(final_image, output_format or format_for_path(out_path), quality)
+        out_path.write_bytes(data)
 
         return str(out_path)
-
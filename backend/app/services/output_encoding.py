@@ -0,0 +1,172 @@
+"""
+Output image encoding
+
+Chooses how a try-on result is stored: WebP, JPEG (optimized Huffman tables,
+progressive) or lossless PNG, per plan tier. The format decides the Pillow
+encoder, the stored Content-Type and the file extension together, so the three
+can never disagree.
+
+Like image_derivatives, this module does not import app.config; the API and
+the GPU worker build their own OutputEncodingPolicy from their settings.
+Pillow is imported on first use, not when the module is loaded.
+"""
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Sequence
+import mimetypes
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    """An output encoding and the metadata stored alongside it."""
+    name: str
+    pil_format: str
+    content_type: str
+    extension: str
+    lossless: bool = False
+
+    def save_options(self, quality: int) -> dict:
+        """Pillow save() keyword arguments for this format."""
+        if self.name == "jpeg":
+            return {"quality": quality, "optimize": True, "progressive": True}
+        if self.name == "webp":
+            return {"quality": quality, "method": 4}
+        if self.name == "avif":
+            return {"quality": quality, "speed": 6}
+        # PNG: lossless, quality does not apply
+        return {"optimize": True}
+
+
+OUTPUT_FORMATS = {
+    "avif": OutputFormat("avif", "AVIF", "image/avif", "avif"),
+    "webp": OutputFormat("webp", "WEBP", "image/webp", "webp"),
+    "jpeg": OutputFormat("jpeg", "JPEG", "image/jpeg", "jpg"),
+    "png": OutputFormat("png", "PNG", "image/png", "png", lossless=True),
+}
+
+FALLBACK_FORMAT = OUTPUT_FORMATS["jpeg"]
+
+# Extension (without dot) -> format, for callers that only have a file name
+_EXTENSIONS = {fmt.extension: fmt for fmt in OUTPUT_FORMATS.values()}
+_EXTENSIONS["jpeg"] = OUTPUT_FORMATS["jpeg"]
+
+
+def writable_formats() -> set[str]:
+    """Names of OUTPUT_FORMATS this Pillow build can write."""
+    try:
+        # AVIF support comes from the optional pillow-avif-plugin on Pillow 10
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        pass
+
+    from PIL import Image
+
+    Image.init()
+    return {name for name, fmt in OUTPUT_FORMATS.items() if fmt.pil_format in Image.SAVE}
+
+
+def resolve_format(preferred: Sequence[str]) -> OutputFormat:
+    """First preferred format that can be written, else JPEG."""
+    supported = writable_formats()
+    for name in preferred:
+        name = name.strip().lower()
+        if name in OUTPUT_FORMATS and name in supported:
+            return OUTPUT_FORMATS[name]
+    return FALLBACK_FORMAT
+
+
+def format_for_path(path) -> OutputFormat:
+    """Format implied by a file name's extension (JPEG if unknown)."""
+    return _EXTENSIONS.get(Path(str(path)).suffix.lstrip(".").lower(), FALLBACK_FORMAT)
+
+
+def content_type_for_path(path) -> str:
+    """Content-Type for a stored object, derived from its extension."""
+    fmt = _EXTENSIONS.get(Path(str(path)).suffix.lstrip(".").lower())
+    if fmt is not None:
+        return fmt.content_type
+    return mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+
+
+def encode_image(image: "Image.Image", fmt: OutputFormat, quality: int) -> tuple[bytes, OutputFormat]:
+    """
+    Encode an image, falling back to JPEG if the encoder fails
+
+    Returns:
+        (encoded bytes, format actually used)
+    """
+    if not fmt.lossless and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = BytesIO()
+    try:
+        image.save(buffer, format=fmt.pil_format, **fmt.save_options(quality))
+    except (KeyError, OSError, ValueError):
+        if fmt == FALLBACK_FORMAT:
+            raise
+        return encode_image(image, FALLBACK_FORMAT, quality)
+
+    return buffer.getvalue(), fmt
+
+
+@dataclass(frozen=True)
+class EncodingReport:
+    """Size of one encoded result compared with a reference encoding."""
+    format: str
+    bytes_written: int
+    baseline_bytes: Optional[int] = None
+
+    @property
+    def bytes_saved(self) -> Optional[int]:
+        if self.baseline_bytes is None:
+            return None
+        return self.baseline_bytes - self.bytes_written
+
+    def summary(self) -> str:
+        text = f"{self.format.upper()} {self.bytes_written / 1024:.0f} KB"
+        if self.baseline_bytes:
+            percent = 100 * self.bytes_saved / self.baseline_bytes
+            text += f" ({self.bytes_saved / 1024:.0f} KB / {percent:.0f}% saved vs PNG)"
+        return text
+
+
+class OutputEncodingPolicy:
+    """Maps plan tiers to an output format and quality."""
+
+    def __init__(self, plan_encodings: dict[str, tuple[str, int]], default: tuple[str, int] = ("jpeg", 85)):
+        """
+        Args:
+            plan_encodings: Plan value ("free", "pro", ...) -> (format name, quality)
+            default: Used for plans without an entry
+        """
+        self._plan_encodings = dict(plan_encodings)
+        self._default_encoding = default
+        self._quality = {plan: quality for plan, (_, quality) in plan_encodings.items()}
+        self._formats = None
+        self._default = None
+
+    def _resolve(self) -> None:
+        # Deferred so building a policy at import time does not load Pillow
+        self._formats = {plan: resolve_format([name]) for plan, (name, _) in self._plan_encodings.items()}
+        self._default = (resolve_format([self._default_encoding[0]]), self._default_encoding[1])
+
+    def for_plan(self, plan) -> tuple[OutputFormat, int]:
+        """
+        Format and quality for a plan
+
+        Args:
+            plan: PlanType or its string value
+
+        Returns:
+            (OutputFormat, quality)
+        """
+        if self._formats is None:
+            self._resolve()
+        plan = getattr(plan, "value", plan)
+        if plan not in self._formats:
+            return self._default
+        return self._formats[plan], self._quality[plan]
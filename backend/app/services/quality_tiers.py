@@ -0,0 +1,117 @@
+"""
+Quality tiers for try-on generation
+
+A tier trades quality for speed. It sets:
+- the working resolution the models run at
+- the number of diffusion steps
+- the upscale factor
+- an optional cap on the output size
+- an optional encoder override
+
+Each plan has a default tier. When the queue backs up, the GPU worker drops
+jobs to cheaper tiers so the backlog drains faster. The tier actually used
+is recorded on the job.
+
+Like output_encoding, this module does not import app.config; the GPU
+worker builds its QualityPolicy from its own environment.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from app.services.output_encoding import OutputFormat, resolve_format
+
+
+@dataclass(frozen=True)
+class QualityTier:
+    """How much work one job gets."""
+    name: str
+    # Model input size (width, height)
+    working_size: tuple[int, int]
+    diffusion_steps: int
+    # Upscale factor of the generated image (1 = none)
+    upscale: int = 1
+    # Longest edge of the stored result (None keeps the input's resolution)
+    max_output_edge: Optional[int] = None
+    # (format, quality) for the full-resolution result; None uses the plan's
+    encoding: Optional[tuple[str, int]] = None
+
+    def full_output(self) -> Optional[tuple[OutputFormat, int]]:
+        """Encoder override for the full-resolution result, if any."""
+        if self.encoding is None:
+            return None
+        name, quality = self.encoding
+        return resolve_format([name]), quality
+
+
+# Cheapest first
+QUALITY_TIERS = {
+    tier.name: tier
+    for tier in (
+        QualityTier("draft", (384, 512), diffusion_steps=10, max_output_edge=1024, encoding=("jpeg", 80)),
+        QualityTier("standard", (768, 1024), diffusion_steps=20),
+        QualityTier("hd", (768, 1024), diffusion_steps=30, upscale=2),
+    )
+}
+TIER_ORDER = tuple(QUALITY_TIERS)
+
+
+def cheaper_tier(tier: QualityTier, steps: int = 1) -> QualityTier:
+    """The tier steps below tier (never below the cheapest)."""
+    index = max(0, TIER_ORDER.index(tier.name) - steps)
+    return QUALITY_TIERS[TIER_ORDER[index]]
+
+
+class QualityPolicy:
+    """
+    Picks each job's tier from its owner's plan and the queue lag
+
+    A job that waited at least downgrade_lag_seconds in the queue runs one
+    tier below its plan's default. A job that waited at least
+    draft_lag_seconds runs as a draft.
+    """
+
+    def __init__(
+        self,
+        plan_tiers: dict[str, str],
+        default_tier: str = "standard",
+        downgrade_lag_seconds: float = 30,
+        draft_lag_seconds: float = 120
+    ):
+        """
+        Args:
+            plan_tiers: Plan value ("free", "pro", ...) -> tier name
+            default_tier: Used for plans without an entry
+            downgrade_lag_seconds: Queue wait that drops a job one tier (0 = never)
+            draft_lag_seconds: Queue wait that drops a job to draft (0 = never)
+
+        Raises:
+            ValueError: If a tier name is unknown
+        """
+        for name in (default_tier, *plan_tiers.values()):
+            if name not in QUALITY_TIERS:
+                raise ValueError(f"Unknown quality tier: {name}")
+        self.plan_tiers = {plan: QUALITY_TIERS[name] for plan, name in plan_tiers.items()}
+        self.default_tier = QUALITY_TIERS[default_tier]
+        self.downgrade_lag_seconds = downgrade_lag_seconds
+        self.draft_lag_seconds = draft_lag_seconds
+
+    def for_plan(self, plan) -> QualityTier:
+        """Default tier of a plan (PlanType or its string value)."""
+        return self.plan_tiers.get(getattr(plan, "value", plan), self.default_tier)
+
+    def choose(self, plan, queue_lag_seconds: Optional[float] = None) -> QualityTier:
+        """
+        Tier for a job
+
+        Args:
+            plan: Owner's plan (PlanType or its string value)
+            queue_lag_seconds: How long the job waited in the queue (None if unknown)
+        """
+        tier = self.for_plan(plan)
+        if queue_lag_seconds is None:
+            return tier
+        if self.draft_lag_seconds and queue_lag_seconds >= self.draft_lag_seconds:
+            return QUALITY_TIERS[TIER_ORDER[0]]
+        if self.downgrade_lag_seconds and queue_lag_seconds >= self.downgrade_lag_seconds:
+            return cheaper_tier(tier)
+        return tier
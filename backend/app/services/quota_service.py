@@ -0,0 +1,299 @@
+"""
+Redis-backed quota accounting
+
+Usage counters live in one Redis hash per user (``quota:<user_id>``) and are
+checked and incremented by a single Lua script, so concurrent requests cannot
+race past the limit. Daily and monthly windows are calendar aligned (UTC): the
+hash records which day/month its counters belong to and resets them when the
+period rolls over, and the key itself expires at the end of the month.
+The user's limits are cached in the same hash, so a reservation needs no
+database read: when the hash or its limits are missing the script asks the
+caller for a seed (counters and limits from the ``quotas`` table), and
+``QuotaCounter.forget_limits`` drops cached limits when a plan or limit
+changes so the next request reloads them.
+
+The ``quotas`` table stays the durable record. Every mutation adds the user to
+a dirty set, and ``QuotaCounter.sync_dirty`` writes those users back in
+batches from a background task.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import uuid
+
+
+DIRTY_SET_KEY = "quota:dirty"
+
+# Result codes returned by the reserve script
+RESERVED = 1
+NEEDS_SEED = -1
+DAILY_LIMIT_REACHED = -2
+MONTHLY_LIMIT_REACHED = -3
+
+# KEYS[1] = quota hash, KEYS[2] = dirty set
+# ARGV = day, month, expire_at, amount, user_id, seeded, seed_daily_used,
+#        seed_monthly_used, seed_daily_limit, seed_monthly_limit
+# Counters are only seeded into a missing hash; limits are (re)written by
+# every seeded call, since they are missing after forget_limits.
+_RESERVE_SCRIPT = """
+if ARGV[6] == '1' then
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        redis.call('HSET', KEYS[1],
+            'day', ARGV[1], 'daily_used', ARGV[7],
+            'month', ARGV[2], 'monthly_used', ARGV[8])
+    end
+    redis.call('HSET', KEYS[1], 'daily_limit', ARGV[9], 'monthly_limit', ARGV[10])
+end
+
+local limits = redis.call('HMGET', KEYS[1], 'daily_limit', 'monthly_limit')
+if not limits[1] or not limits[2] then
+    return {-1, 0, 0, 0, 0}
+end
+local daily_limit = tonumber(limits[1])
+local monthly_limit = tonumber(limits[2])
+
+local q = redis.call('HMGET', KEYS[1], 'day', 'daily_used', 'month', 'monthly_used')
+local daily_used = tonumber(q[2]) or 0
+local monthly_used = tonumber(q[4]) or 0
+local amount = tonumber(ARGV[4])
+
+if q[1] ~= ARGV[1] then
+    daily_used = 0
+    redis.call('HSET', KEYS[1], 'day', ARGV[1], 'daily_used', 0)
+end
+if q[3] ~= ARGV[2] then
+    monthly_used = 0
+    redis.call('HSET', KEYS[1], 'month', ARGV[2], 'monthly_used', 0)
+end
+redis.call('EXPIREAT', KEYS[1], ARGV[3])
+
+if daily_used + amount > daily_limit then
+    return {-2, daily_used, monthly_used, daily_limit, monthly_limit}
+end
+if monthly_used + amount > monthly_limit then
+    return {-3, daily_used, monthly_used, daily_limit, monthly_limit}
+end
+
+daily_used = redis.call('HINCRBY', KEYS[1], 'daily_used', amount)
+monthly_used = redis.call('HINCRBY', KEYS[1], 'monthly_used', amount)
+redis.call('SADD', KEYS[2], ARGV[5])
+return {1, daily_used, monthly_used, daily_limit, monthly_limit}
+"""
+
+# KEYS[1] = quota hash, KEYS[2] = dirty set
+# ARGV = day, month, amount, user_id
+# Only refunds counters that still belong to the period the usage was charged in.
+_REFUND_SCRIPT = """
+local q = redis.call('HMGET', KEYS[1], 'day', 'daily_used', 'month', 'monthly_used')
+local amount = tonumber(ARGV[3])
+local changed = 0
+if q[1] == ARGV[1] and (tonumber(q[2]) or 0) > 0 then
+    redis.call('HSET', KEYS[1], 'daily_used', math.max(0, tonumber(q[2]) - amount))
+    changed = 1
+end
+if q[3] == ARGV[2] and (tonumber(q[4]) or 0) > 0 then
+    redis.call('HSET', KEYS[1], 'monthly_used', math.max(0, tonumber(q[4]) - amount))
+    changed = 1
+end
+if changed == 1 then
+    redis.call('SADD', KEYS[2], ARGV[4])
+end
+return changed
+"""
+
+
+def day_id(moment: datetime) -> str:
+    return moment.strftime("%Y%m%d")
+
+
+def month_id(moment: datetime) -> str:
+    return moment.strftime("%Y%m")
+
+
+def start_of_day(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def start_of_month(moment: datetime) -> datetime:
+    return start_of_day(moment).replace(day=1)
+
+
+def start_of_next_month(moment: datetime) -> datetime:
+    first = start_of_month(moment)
+    return (first + timedelta(days=32)).replace(day=1)
+
+
+class QuotaCounter:
+    """Atomic per-user quota counters in Redis"""
+
+    def __init__(self, redis_client):
+        """
+        Args:
+            redis_client: Redis client created with decode_responses=True
+        """
+        self.redis = redis_client
+        self._reserve = redis_client.register_script(_RESERVE_SCRIPT)
+        self._refund = redis_client.register_script(_REFUND_SCRIPT)
+
+    @staticmethod
+    def key(user_id: str) -> str:
+        return f"quota:{user_id}"
+
+    def reserve(
+        self,
+        user_id: str,
+        now: datetime,
+        amount: int = 1,
+        seed: Optional[dict] = None
+    ) -> tuple[int, dict]:
+        """
+        Check and consume quota in one round trip
+
+        Args:
+            user_id: User UUID
+            now: Current UTC time
+            amount: Units to consume
+            seed: The user's quota row, for a retry after NEEDS_SEED (keys:
+                daily_used, monthly_used, daily_limit, monthly_limit); the
+                counters only initialise a missing hash
+
+        Returns:
+            (code, usage) where code is RESERVED, NEEDS_SEED,
+            DAILY_LIMIT_REACHED or MONTHLY_LIMIT_REACHED
+        """
+        expire_at = int((start_of_next_month(now) + timedelta(days=1)).timestamp())
+        args = [
+            day_id(now), month_id(now), expire_at, amount, user_id,
+        ]
+        if seed is None:
+            args.extend(["0", 0, 0, 0, 0])
+        else:
+            args.extend([
+                "1", seed["daily_used"], seed["monthly_used"],
+                seed["daily_limit"], seed["monthly_limit"],
+            ])
+
+        code, daily_used, monthly_used, daily_limit, monthly_limit = self._reserve(
+            keys=[self.key(user_id), DIRTY_SET_KEY],
+            args=args,
+        )
+        return int(code), {
+            "daily_used": int(daily_used),
+            "monthly_used": int(monthly_used),
+            "daily_limit": int(daily_limit),
+            "monthly_limit": int(monthly_limit),
+        }
+
+    def forget_limits(self, *user_ids: str) -> None:
+        """
+        Drop cached limits so the next reservation reloads them
+
+        Counters are kept; only the limits are read from the database again.
+        """
+        if not user_ids:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.hdel(self.key(user_id), "daily_limit", "monthly_limit")
+        pipe.execute()
+
+    def refund(self, user_id: str, charged_at: datetime, amount: int = 1) -> bool:
+        """
+        Give back quota consumed at ``charged_at``
+
+        Usage from a previous day/month is not refunded, since those counters
+        have already rolled over.
+
+        Returns:
+            True if any counter was decremented
+        """
+        charged_at = charged_at.astimezone(timezone.utc) if charged_at.tzinfo else charged_at
+        try:
+            return bool(self._refund(
+                keys=[self.key(user_id), DIRTY_SET_KEY],
+                args=[day_id(charged_at), month_id(charged_at), amount, user_id],
+            ))
+        except Exception:
+            return False
+
+    def usage(self, user_id: str, now: datetime) -> Optional[dict]:
+        """
+        Get live usage counters for the current period
+
+        Returns:
+            Dict with daily_used/monthly_used, or None if not cached
+        """
+        try:
+            raw = self.redis.hgetall(self.key(user_id))
+        except Exception:
+            return None
+        if not raw:
+            return None
+
+        return {
+            "daily_used": int(raw.get("daily_used", 0)) if raw.get("day") == day_id(now) else 0,
+            "monthly_used": int(raw.get("monthly_used", 0)) if raw.get("month") == month_id(now) else 0,
+        }
+
+    def apply_usage(self, user_id: str, quota: dict, now: datetime) -> dict:
+        """Overlay live counters onto a Quota.to_dict() payload."""
+        usage = self.usage(user_id, now)
+        if usage is None:
+            return quota
+
+        for period, used in (("daily", usage["daily_used"]), ("monthly", usage["monthly_used"])):
+            quota[period]["used"] = used
+            quota[period]["remaining"] = max(0, quota[period]["limit"] - used)
+        return quota
+
+    def sync_dirty(self, db, batch_size: int = 500) -> int:
+        """
+        Write counters of recently charged users back to the quotas table
+
+        Users are popped from the dirty set so concurrent API processes split
+        the work; on a database error they are put back for the next run.
+
+        Args:
+            db: Database session
+            batch_size: Maximum number of users to reconcile in this call
+
+        Returns:
+            Number of quota rows updated
+        """
+        # Imported lazily so the GPU worker can refund quota without loading
+        # the API settings.
+        from sqlalchemy import update
+        from app.models import Quota
+
+        user_ids = self.redis.spop(DIRTY_SET_KEY, batch_size)
+        if not user_ids:
+            return 0
+
+        pipe = self.redis.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.hmget(self.key(user_id), "day", "daily_used", "month", "monthly_used")
+        rows = pipe.execute()
+
+        mappings = []
+        for user_id, (day, daily_used, month, monthly_used) in zip(user_ids, rows):
+            if day is None or month is None:
+                continue
+            mappings.append({
+                "user_id": uuid.UUID(user_id),
+                "daily_used": int(daily_used),
+                "monthly_used": int(monthly_used),
+                "last_daily_reset": datetime.strptime(day, "%Y%m%d").replace(tzinfo=timezone.utc),
+                "last_monthly_reset": datetime.strptime(month, "%Y%m").replace(tzinfo=timezone.utc),
+            })
+
+        if not mappings:
+            return 0
+
+        try:
+            db.execute(update(Quota), mappings)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.redis.sadd(DIRTY_SET_KEY, *user_ids)
+            raise
+
+        return len(mappings)
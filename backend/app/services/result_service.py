@@ -0,0 +1,105 @@
+"""
+Result service for the gallery of generated images
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Result, User
+from app.utils.pagination import apply_keyset, split_page
+from datetime import datetime, timezone
+import uuid
+
+
+class ResultService:
+    """Service for gallery results"""
+
+    @staticmethod
+    def _result_uuid(result_id) -> uuid.UUID:
+        """Parse a result id from a URL."""
+        try:
+            return uuid.UUID(str(result_id))
+        except ValueError:
+            raise ValueError("Result not found")
+
+    @staticmethod
+    async def _get_live_result(db: AsyncSession, result_id: str, user: User) -> Result:
+        """Load one of the user's results that has not been deleted."""
+        result = await db.scalar(
+            select(Result).where(
+                Result.id == ResultService._result_uuid(result_id),
+                Result.user_id == user.id,
+                Result.deleted_at.is_(None)
+            )
+        )
+
+        if not result:
+            raise ValueError("Result not found")
+
+        return result
+
+    @staticmethod
+    async def list_results(
+        db: AsyncSession,
+        user: User,
+        cursor: str = None,
+        limit: int = 20,
+        favorites_only: bool = False
+    ) -> tuple[list, str]:
+        """
+        List user's live results, newest first, with keyset pagination
+
+        The filters mirror the predicates of the partial indexes on results,
+        so each page is a range scan over live (or favorite) rows only.
+
+        Args:
+            db: Database session
+            user: User object
+            cursor: Cursor returned with the previous page (None for the first)
+            limit: Results per page
+            favorites_only: Only return favorited results
+
+        Returns:
+            (results, next_cursor)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = select(Result).where(
+            Result.user_id == user.id,
+            Result.deleted_at.is_(None)
+        )
+        if favorites_only:
+            query = query.where(Result.is_favorite.is_(True))
+        query = apply_keyset(query, Result.created_at, Result.id, cursor, limit)
+
+        rows = await db.scalars(query)
+        return split_page(rows.all(), limit)
+
+    @staticmethod
+    async def toggle_favorite(db: AsyncSession, result_id: str, user: User) -> bool:
+        """
+        Flip the favorite flag of a result
+
+        Returns:
+            The new favorite state
+        """
+        result = await ResultService._get_live_result(db, result_id, user)
+
+        result.is_favorite = not result.is_favorite
+        await db.commit()
+
+        return result.is_favorite
+
+    @staticmethod
+    async def delete_result(db: AsyncSession, result_id: str, user: User) -> bool:
+        """
+        Delete a result (soft delete by setting deleted_at)
+
+        Returns:
+            True if successful
+        """
+        result = await ResultService._get_live_result(db, result_id, user)
+
+        result.deleted_at = datetime.now(timezone.utc)
+        await db.commit()
+
+        return True
@@ -0,0 +1,203 @@
+"""
+S3 transfer manager
+
+Wraps one boto3 client with a connection pool sized for concurrent transfers
+and a TransferConfig tuned for our objects: inputs and results are a few MB,
+so they go up and down in a single request. Only unusually large objects are
+split into parts, and those parts are transferred in parallel.
+
+Used by the GPU worker to fetch both job inputs at once and to upload result
+derivatives concurrently. It does not import app.config, so the worker can
+configure it from its own environment. boto3 is imported and the client
+created on first use, which keeps it out of the worker's startup path.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+from typing import Iterable, Optional
+from urllib.parse import urlparse, unquote
+
+MB = 1024 * 1024
+
+
+class S3TransferManager:
+    """Pooled, concurrent S3 downloads and uploads for one bucket."""
+
+    def __init__(
+        self,
+        bucket: str,
+        region: str = "us-east-1",
+        aws_access_key_id: str = None,
+        aws_secret_access_key: str = None,
+        endpoint_url: str = None,
+        max_pool_connections: int = 32,
+        multipart_threshold_mb: int = 16,
+        multipart_chunksize_mb: int = 8,
+        max_concurrency: int = 8
+    ):
+        """
+        Args:
+            bucket: S3 bucket
+            region: AWS region
+            endpoint_url: Custom S3 endpoint (MinIO, LocalStack, moto); None for AWS
+            max_pool_connections: HTTP connections kept open to S3
+            multipart_threshold_mb: Objects at least this large use multipart
+            multipart_chunksize_mb: Part size for multipart transfers
+            max_concurrency: Threads per transfer and for batch transfers
+        """
+        self.bucket = bucket
+        self.region = region
+        self.endpoint_url = endpoint_url.rstrip("/") if endpoint_url else None
+
+        self._client_options = {
+            "aws_access_key_id": aws_access_key_id,
+            "aws_secret_access_key": aws_secret_access_key,
+            "region_name": region,
+            "endpoint_url": self.endpoint_url,
+        }
+        self._max_pool_connections = max_pool_connections
+        self._transfer_options = {
+            "multipart_threshold": multipart_threshold_mb * MB,
+            "multipart_chunksize": multipart_chunksize_mb * MB,
+            "max_concurrency": max_concurrency,
+            "use_threads": True,
+        }
+        self._client = None
+        self._transfer_config = None
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def _connect(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                return
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+
+            self._transfer_config = TransferConfig(**self._transfer_options)
+            self._client = boto3.client(
+                "s3",
+                config=Config(
+                    max_pool_connections=self._max_pool_connections,
+                    retries={"max_attempts": 5, "mode": "adaptive"},
+                    tcp_keepalive=True,
+                ),
+                **self._client_options,
+            )
+
+    @property
+    def client(self):
+        """boto3 S3 client, created on first use"""
+        if self._client is None:
+            self._connect()
+        return self._client
+
+    @property
+    def transfer_config(self):
+        if self._client is None:
+            self._connect()
+        return self._transfer_config
+
+    def url_for_key(self, key: str) -> str:
+        """Public URL of an object (path-style for custom endpoints)."""
+        if self.endpoint_url:
+            return f"{self.endpoint_url}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    def key_from_url(self, url: str) -> str:
+        """
+        Object key of a URL in this bucket
+
+        Accepts virtual-hosted and path-style URLs, including ones on the
+        custom endpoint.
+
+        Raises:
+            ValueError: If the URL does not point into this bucket
+        """
+        parsed = urlparse(url)
+        path = unquote(parsed.path).lstrip("/")
+        host = parsed.netloc.split(":")[0]
+
+        if host.startswith(f"{self.bucket}.s3"):
+            key = path
+        elif path.startswith(f"{self.bucket}/"):
+            key = path[len(self.bucket) + 1:]
+        else:
+            key = ""
+
+        if not key:
+            raise ValueError(f"Not an object URL in bucket {self.bucket}: {url}")
+        return key
+
+    def download_file(self, key: str, local_path: str, bucket: str = None) -> str:
+        """Download an object to a file."""
+        self.client.download_file(bucket or self.bucket, key, local_path, Config=self.transfer_config)
+        return local_path
+
+    def download_bytes(self, key: str, bucket: str = None) -> bytes:
+        """Download an object into memory (no temp file)."""
+        buffer = BytesIO()
+        self.client.download_fileobj(bucket or self.bucket, key, buffer, Config=self.transfer_config)
+        return buffer.getvalue()
+
+    def download_many(
+        self,
+        keys: Iterable[str],
+        local_paths: Optional[Iterable[str]] = None,
+        bucket: str = None
+    ) -> list:
+        """
+        Download several objects concurrently
+
+        Args:
+            keys: Object keys
+            local_paths: Target files, one per key; None downloads into memory
+            bucket: Source bucket (defaults to this manager's bucket)
+
+        Returns:
+            Local paths, or bytes when downloading into memory, in key order
+        """
+        keys = list(keys)
+        if local_paths is None:
+            futures = [self._executor.submit(self.download_bytes, key, bucket) for key in keys]
+        else:
+            futures = [
+                self._executor.submit(self.download_file, key, path, bucket)
+                for key, path in zip(keys, local_paths)
+            ]
+        return [future.result() for future in futures]
+
+    def upload_bytes(self, key: str, data: bytes, content_type: str, cache_control: str = None) -> str:
+        """
+        Upload bytes to an object
+
+        Returns:
+            URL of the object
+        """
+        extra_args = {"ContentType": content_type}
+        if cache_control:
+            extra_args["CacheControl"] = cache_control
+        self.client.upload_fileobj(
+            BytesIO(data), self.bucket, key, ExtraArgs=extra_args, Config=self.transfer_config
+        )
+        return self.url_for_key(key)
+
+    def upload_many(self, uploads: Iterable[tuple], cache_control: str = None) -> list[str]:
+        """
+        Upload several objects concurrently
+
+        Args:
+            uploads: (key, data, content_type) tuples
+
+        Returns:
+            Object URLs in input order
+        """
+        futures = [
+            self._executor.submit(self.upload_bytes, key, data, content_type, cache_control)
+            for key, data, content_type in uploads
+        ]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
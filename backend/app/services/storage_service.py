@@ -1,16 +1,79 @@
 """
 S3 storage service
+
+boto3 is imported and the S3 client created on first use, so processes that
+only use local storage (or never touch storage) do not pay for it at startup.
 """
-import boto3
-from botocore.exceptions import ClientError
 from app.config import settings
+from app.utils.metrics import record_cache
 from typing import Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from urllib.parse import quote
 import uuid
+import time
+import hashlib
+import hmac
 from datetime import datetime, timedelta
 from pathlib import Path
 import shutil
 
 
+@dataclass(frozen=True)
+class StoredObject:
+    """Where an uploaded object lives and what it contains."""
+    bucket: Optional[str]
+    key: str
+    url: str
+    sha256: bytes
+    size: int
+
+
+class PresignedUrlCache:
+    """
+    In-memory LRU of presigned download URLs keyed by object key
+    
+    Entries expire well before the URL itself, so a cached URL always has at
+    least (expiration - ttl) seconds of validity left when handed out.
+    Returning the same URL for repeated requests also lets browsers reuse
+    their cached copy of the image.
+    """
+    
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+    
+    def get(self, cache_key) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[cache_key]
+                record_cache("presigned_url", False)
+                return None
+            self._entries.move_to_end(cache_key)
+            record_cache("presigned_url", True)
+            return entry[0]
+    
+    def put(self, cache_key, url: str, expiration: int):
+        # Never keep a URL for more than half of its lifetime
+        ttl = min(self.ttl_seconds, expiration // 2)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[cache_key] = (url, time.monotonic() + ttl)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class StorageService:
     """Service for handling file storage in S3"""
     
@@ -23,13 +86,34 @@ class StorageService:
         self.local_storage_dir = Path(__file__).resolve().parents[2] / "local_storage"
         self.local_storage_dir.mkdir(parents=True, exist_ok=True)
 
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
-        )
+        self._s3_client = None
+        self._s3_client_lock = Lock()
         self.bucket = settings.AWS_S3_BUCKET
+        self.presigned_urls = PresignedUrlCache(
+            ttl_seconds=settings.PRESIGNED_URL_CACHE_TTL_SECONDS,
+            max_entries=settings.PRESIGNED_URL_CACHE_MAX_ENTRIES
+        )
+    
+    @property
+    def s3_client(self):
+        """S3 client, created on first use"""
+        if self._s3_client is None:
+            with self._s3_client_lock:
+                if self._s3_client is None:
+                    import boto3
+
+                    self._s3_client = boto3.client(
+                        's3',
+                        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                        region_name=settings.AWS_REGION,
+                        endpoint_url=settings.AWS_S3_ENDPOINT_URL or None
+                    )
+        return self._s3_client
+    
+    @s3_client.setter
+    def s3_client(self, client):
+        self._s3_client = client
     
     def generate_presigned_upload_url(
         self,
@@ -48,6 +132,8 @@ class StorageService:
         Returns:
             Dict with 'url' and 'fields' for upload
         """
+        from botocore.exceptions import ClientError
+
         try:
             response = self.s3_client.generate_presigned_post(
                 Bucket=self.bucket,
@@ -83,6 +169,8 @@ class StorageService:
                 shutil.copyfileobj(file_obj, output_file)
             return f"/local-storage/{key}"
 
+        from botocore.exceptions import ClientError
+
         try:
             self.s3_client.upload_fileobj(
                 file_obj,
@@ -90,10 +178,44 @@ class StorageService:
                 key,
                 ExtraArgs={'ContentType': content_type}
             )
-            return f"https://{self.bucket}.s3.{settings.AWS_REGION}.amazonaws.com/{key}"
+            return self.url_for_key(key)
         except ClientError as e:
             raise Exception(f"Failed to upload file: {str(e)}")
     
+    @staticmethod
+    def file_digest(file_obj) -> tuple[bytes, int]:
+        """
+        SHA-256 digest and size of a file object (rewound afterwards)
+        
+        Returns:
+            (raw 32-byte digest, size in bytes)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        file_obj.seek(0)
+        for chunk in iter(lambda: file_obj.read(1024 * 1024), b""):
+            digest.update(chunk)
+            size += len(chunk)
+        file_obj.seek(0)
+        return digest.digest(), size
+    
+    def upload_input(self, file_obj, key: str, content_type: str = "image/jpeg") -> StoredObject:
+        """
+        Upload a job input and record its location and fingerprint
+        
+        Args:
+            file_obj: File object to upload
+            key: S3 object key
+            content_type: File content type
+        
+        Returns:
+            StoredObject (bucket is None for local storage)
+        """
+        sha256, size = self.file_digest(file_obj)
+        url = self.upload_file(file_obj, key, content_type)
+        bucket = None if self.use_local_storage else self.bucket
+        return StoredObject(bucket=bucket, key=key, url=url, sha256=sha256, size=size)
+    
     def download_file(self, key: str) -> bytes:
         """
         Download file from S3
@@ -108,6 +230,8 @@ class StorageService:
             local_path = self.local_storage_dir / key
             return local_path.read_bytes()
 
+        from botocore.exceptions import ClientError
+
         try:
             response = self.s3_client.get_object(Bucket=self.bucket, Key=key)
             return response['Body'].read()
@@ -130,16 +254,21 @@ class StorageService:
                 local_path.unlink()
             return True
 
+        from botocore.exceptions import ClientError
+
         try:
             self.s3_client.delete_object(Bucket=self.bucket, Key=key)
             return True
         except ClientError as e:
             raise Exception(f"Failed to delete file: {str(e)}")
     
-    def generate_download_url(self, key: str, expiration: int = 3600) -> str:
+    def generate_download_url(self, key: str, expiration: int = None) -> str:
         """
         Generate presigned URL for downloading from S3
         
+        URLs are reused from an LRU until PRESIGNED_URL_CACHE_TTL_SECONDS
+        (capped at half of expiration) has passed.
+        
         Args:
             key: S3 object key
             expiration: URL expiration in seconds
@@ -150,15 +279,82 @@ class StorageService:
         if self.use_local_storage:
             return f"/local-storage/{key}"
 
+        expiration = expiration or settings.PRESIGNED_URL_EXPIRATION_SECONDS
+        cache_key = (key, expiration)
+        url = self.presigned_urls.get(cache_key)
+        if url is not None:
+            return url
+
+        from botocore.exceptions import ClientError
+
         try:
             url = self.s3_client.generate_presigned_url(
                 'get_object',
                 Params={'Bucket': self.bucket, 'Key': key},
                 ExpiresIn=expiration
             )
-            return url
         except ClientError as e:
             raise Exception(f"Failed to generate download URL: {str(e)}")
+
+        self.presigned_urls.put(cache_key, url, expiration)
+        return url
+    
+    def url_for_key(self, key: str) -> str:
+        """Stored URL of an object (path-style on a custom endpoint)."""
+        if settings.AWS_S3_ENDPOINT_URL:
+            return f"{settings.AWS_S3_ENDPOINT_URL.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{settings.AWS_REGION}.amazonaws.com/{key}"
+    
+    @staticmethod
+    def _storage_signature(key: str, expires: int) -> str:
+        message = f"storage:{key}:{expires}".encode("utf-8")
+        return hmac.new(settings.JWT_SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+    
+    def storage_proxy_url(self, key: str, expiration: int = None) -> str:
+        """
+        Signed, expiring URL of an object served by the /storage proxy
+        
+        The expiry is rounded up to a whole window of `expiration` seconds,
+        so every call in the same window returns the same URL and browsers
+        reuse their cached copy. URLs stay valid for 1-2x expiration.
+        
+        Args:
+            key: Object key
+            expiration: Minimum URL lifetime in seconds
+        
+        Returns:
+            "/storage/<key>?expires=...&signature=..."
+        """
+        expiration = expiration or settings.PRESIGNED_URL_EXPIRATION_SECONDS
+        expires = (int(time.time()) // expiration + 2) * expiration
+        signature = self._storage_signature(key, expires)
+        return f"/storage/{quote(key)}?expires={expires}&signature={signature}"
+    
+    def verify_storage_signature(self, key: str, expires: Optional[int], signature: Optional[str]) -> bool:
+        """True if a /storage URL's signature is valid for key and has not expired."""
+        if expires is None or not signature or expires < time.time():
+            return False
+        return hmac.compare_digest(self._storage_signature(key, expires), signature)
+    
+    def signed_url(self, key: Optional[str], url: Optional[str] = None, expiration: int = None) -> Optional[str]:
+        """
+        Download URL for a stored object
+        
+        A signed /storage proxy URL when STORAGE_PROXY_DOWNLOADS is set
+        (immutable caching, ETags and ranges), otherwise a presigned (cached)
+        S3 URL. Local storage objects get their /local-storage URL.
+        
+        Args:
+            key: Object key stored on the row (e.g. Job.result_image_key)
+            url: URL stored alongside it, returned unchanged when the row has
+                no key
+            expiration: URL expiration in seconds
+        """
+        if not key:
+            return url
+        if settings.STORAGE_PROXY_DOWNLOADS and not self.use_local_storage:
+            return self.storage_proxy_url(key, expiration)
+        return self.generate_download_url(key, expiration)
     
     def generate_job_key(self, user_id: str, job_id: str, filename: str) -> str:
         """Generate S3 key for job uploads"""
@@ -3,22 +3,51 @@ Authentication dependencies
 """
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_db
 from app.models import User
-from app.utils.jwt import verify_token
-from typing import Optional
+from app.utils.jwt import verify_token, decode_token
+from app.utils.auth_cache import auth_cache, claims_outdated, UserSnapshot, TokenUser
+from app.models import PlanType
+from typing import Optional, Union
+import uuid
 
 security = HTTPBearer()
 
 
+async def _load_user(db: AsyncSession, user_id: str) -> Optional[UserSnapshot]:
+    """Get a user snapshot from the auth cache, loading it on a miss."""
+    snapshot = auth_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+    
+    try:
+        user_uuid = uuid.UUID(str(user_id))
+    except ValueError:
+        return None
+    
+    result = await db.execute(select(User).where(User.id == user_uuid))
+    user = result.scalar_one_or_none()
+    if user is None:
+        return None
+    
+    snapshot = UserSnapshot.from_user(user)
+    auth_cache.put(snapshot)
+    return snapshot
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> UserSnapshot:
     """
     Dependency to get current authenticated user
     
+    Returns a cached, read-only snapshot of the user. Load the User row
+    explicitly if it needs to be modified.
+    
     Usage:
         current_user: User = Depends(get_current_user)
     """
@@ -33,7 +62,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await _load_user(db, user_id)
     
     if user is None:
         raise HTTPException(
@@ -45,9 +74,62 @@ async def get_current_user(
     return user
 
 
+async def get_token_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Union[TokenUser, UserSnapshot]:
+    """
+    Dependency for read-only endpoints that only need the user's id and plan
+    
+    Trusts the plan claim of the signed access token unless the user changed
+    (plan, credits, profile) or was deleted after the token was issued; that
+    costs one Redis GET instead of a user lookup. Outdated tokens, tokens
+    issued before the plan claim existed, and requests made while Redis is
+    unreachable fall back to get_current_user, which reloads the user.
+    
+    Usage:
+        current_user: User = Depends(get_token_user)
+    """
+    payload = decode_token(credentials.credentials, token_type="access")
+    
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    try:
+        token_user = TokenUser(id=uuid.UUID(payload["sub"]), plan=PlanType(payload["plan"]))
+    except (KeyError, ValueError):
+        return await get_current_user(credentials, db)
+    
+    if claims_outdated(payload["sub"], payload.get("iat")):
+        return await get_current_user(credentials, db)
+    return token_user
+
+
+async def get_admin_user(
+    current_user: UserSnapshot = Depends(get_current_user)
+) -> UserSnapshot:
+    """
+    Dependency for admin-only endpoints (users listed in ADMIN_EMAILS)
+    
+    Usage:
+        admin: User = Depends(get_admin_user)
+    """
+    admins = {email.lower() for email in settings.ADMIN_EMAILS}
+    if current_user.email.lower() not in admins:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Optional[User]:
     """
     Dependency to get current user if authenticated, None otherwise
@@ -64,5 +146,4 @@ async def get_optional_user(
     if user_id is None:
         return None
     
-    user = db.query(User).filter(User.id == user_id).first()
-    return user
+    return await _load_user(db, user_id)
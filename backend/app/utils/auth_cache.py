@@ -0,0 +1,205 @@
+"""
+In-process cache of authenticated users
+
+get_current_user would otherwise SELECT the user row on every request,
+including every status poll. Users are cached as lightweight, detached
+snapshots in a short-TTL LRU. When a user's plan or credits change, the
+change is published on a Redis channel after commit and every API process
+evicts its copy.
+
+The same change (or the user's deletion) records its time under
+``auth:changed:<user_id>`` for the lifetime of an access token, so
+get_token_user stops trusting the plan claim of tokens issued before it.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+import threading
+import time
+import uuid
+
+import redis
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import User, PlanType
+from app.utils.metrics import record_cache
+
+INVALIDATION_CHANNEL = "auth:invalidate"
+CHANGED_KEY_PREFIX = "auth:changed:"
+
+# Columns whose change must reach every process immediately
+_WATCHED_ATTRIBUTES = ("plan", "credits_remaining", "email", "name", "profile_picture_url")
+
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only copy of the User columns routes need"""
+    id: uuid.UUID
+    email: str
+    name: Optional[str]
+    profile_picture_url: Optional[str]
+    plan: PlanType
+    credits_remaining: int
+    created_at: Optional[datetime]
+    last_login: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            profile_picture_url=user.profile_picture_url,
+            plan=user.plan,
+            credits_remaining=user.credits_remaining,
+            created_at=user.created_at,
+            last_login=user.last_login,
+        )
+
+    to_dict = User.to_dict
+
+
+@dataclass(frozen=True)
+class TokenUser:
+    """User identity built from access token claims alone (no DB access)"""
+    id: uuid.UUID
+    plan: PlanType
+
+
+class AuthCache:
+    """Thread-safe LRU of user id -> UserSnapshot with a per-entry TTL"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, UserSnapshot]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[UserSnapshot]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                record_cache("auth_user", False)
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= now:
+                del self._entries[user_id]
+                record_cache("auth_user", False)
+                return None
+            self._entries.move_to_end(user_id)
+            record_cache("auth_user", True)
+            return snapshot
+
+    def put(self, snapshot: UserSnapshot) -> None:
+        user_id = str(snapshot.id)
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+auth_cache = AuthCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES)
+
+
+def invalidate_user(user_id: str) -> None:
+    """
+    Evict a user locally and tell every other API process to do the same
+
+    Also records the change time, which outdates the claims of access tokens
+    issued before it.
+    """
+    user_id = str(user_id)
+    auth_cache.evict(user_id)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(
+            f"{CHANGED_KEY_PREFIX}{user_id}",
+            time.time(),
+            ex=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        )
+        pipe.publish(INVALIDATION_CHANNEL, user_id)
+        pipe.execute()
+    except Exception:
+        # Other processes fall back to the TTL
+        pass
+
+
+def claims_outdated(user_id: str, issued_at: Optional[float]) -> bool:
+    """
+    Whether a token issued at issued_at predates the user's last change
+
+    Returns True when Redis cannot answer, so callers fall back to loading
+    the user.
+    """
+    try:
+        changed_at = redis_client.get(f"{CHANGED_KEY_PREFIX}{user_id}")
+    except Exception:
+        return True
+    if changed_at is None:
+        return False
+    return issued_at is None or float(issued_at) <= float(changed_at)
+
+
+def start_invalidation_listener():
+    """
+    Subscribe to user invalidations in a background thread
+
+    Returns:
+        The listener thread (call .stop() on shutdown), or None if Redis is
+        unavailable
+    """
+    def handle(message):
+        auth_cache.evict(message["data"])
+
+    try:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: handle})
+        return pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+    except Exception as e:
+        print(f"⚠️  Auth cache invalidation listener not started: {e}")
+        return None
+
+
+@event.listens_for(User, "after_update")
+def _track_watched_changes(mapper, connection, target: User):
+    """Remember users whose plan/credits changed in this transaction."""
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _WATCHED_ATTRIBUTES):
+        session = state.session
+        if session is not None:
+            session.info.setdefault("auth_invalidations", set()).add(str(target.id))
+
+
+@event.listens_for(User, "after_delete")
+def _track_deletion(mapper, connection, target: User):
+    """Deleted users must lose access before their tokens expire."""
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault("auth_invalidations", set()).add(str(target.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_invalidations(session: Session):
+    """Publish only once the change is durable, so reloads see new values."""
+    for user_id in session.info.pop("auth_invalidations", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session: Session):
+    session.info.pop("auth_invalidations", None)
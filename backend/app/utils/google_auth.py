@@ -0,0 +1,147 @@
+"""
+Google ID token verification with cached certificates
+
+google.oauth2.id_token.verify_oauth2_token fetches Google's signing
+certificates over a fresh HTTPS connection on every call. This verifier keeps
+one pooled HTTP session, caches the certificates for as long as Google's
+Cache-Control max-age allows, and only refetches early when a token is signed
+with a key id it has not seen (key rotation).
+
+requests and google-auth are imported on first verification, so they stay
+out of the API's startup path.
+"""
+from typing import Optional
+import re
+import threading
+import time
+
+from app.config import settings
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Used when the certs response carries no usable max-age
+DEFAULT_CERTS_MAX_AGE = 300
+
+# Unknown key ids may not trigger refetches more often than this
+MIN_FORCED_REFRESH_INTERVAL = 60
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def parse_max_age(cache_control: Optional[str]) -> Optional[int]:
+    """Extract max-age seconds from a Cache-Control header value."""
+    if not cache_control:
+        return None
+    match = _MAX_AGE_RE.search(cache_control)
+    return int(match.group(1)) if match else None
+
+
+class GoogleTokenVerifier:
+    """Verifies Google OAuth ID tokens against cached signing certificates"""
+
+    def __init__(
+        self,
+        client_id: str,
+        certs_url: str,
+        pool_size: int = 4,
+        timeout: float = 5.0,
+        clock_skew_seconds: int = 10
+    ):
+        self.client_id = client_id
+        self.certs_url = certs_url
+        self.timeout = timeout
+        self.clock_skew_seconds = clock_skew_seconds
+        self.pool_size = pool_size
+        self.session = None
+
+        self._certs: dict = {}
+        self._expires_at = 0.0
+        self._last_forced_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def _create_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(500, 502, 503, 504)),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _fetch_certs(self) -> None:
+        # Called with self._lock held
+        if self.session is None:
+            self.session = self._create_session()
+        response = self.session.get(self.certs_url, timeout=self.timeout)
+        response.raise_for_status()
+        max_age = parse_max_age(response.headers.get("Cache-Control"))
+
+        self._certs = response.json()
+        self._expires_at = time.monotonic() + (max_age if max_age is not None else DEFAULT_CERTS_MAX_AGE)
+
+    def get_certs(self, key_id: Optional[str] = None) -> dict:
+        """
+        Get Google's signing certificates, refetching when expired
+
+        Args:
+            key_id: Key id the caller needs; an unknown id forces a
+                (rate-limited) refetch to pick up rotated keys
+
+        Returns:
+            Mapping of key id -> PEM certificate
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not self._certs or now >= self._expires_at:
+                self._fetch_certs()
+            elif (
+                key_id is not None
+                and key_id not in self._certs
+                and now - self._last_forced_refresh >= MIN_FORCED_REFRESH_INTERVAL
+            ):
+                self._last_forced_refresh = now
+                self._fetch_certs()
+            return self._certs
+
+    def verify(self, token: str) -> dict:
+        """
+        Verify a Google ID token
+
+        Blocking (may fetch certificates); call from a thread pool in async
+        code.
+
+        Returns:
+            The token's claims
+
+        Raises:
+            ValueError: If the token is invalid, expired, for another
+                audience or from another issuer
+        """
+        from google.auth import jwt as google_jwt
+
+        key_id = google_jwt.decode_header(token).get("kid")
+        certs = self.get_certs(key_id)
+
+        idinfo = google_jwt.decode(
+            token,
+            certs=certs,
+            audience=self.client_id,
+            clock_skew_in_seconds=self.clock_skew_seconds,
+        )
+
+        if idinfo.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {idinfo.get('iss')}")
+
+        return idinfo
+
+
+google_verifier = GoogleTokenVerifier(
+    client_id=settings.GOOGLE_CLIENT_ID,
+    certs_url=settings.GOOGLE_OAUTH_CERTS_URL,
+)
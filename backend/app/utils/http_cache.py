@@ -0,0 +1,155 @@
+"""
+HTTP caching helpers for immutable stored objects
+
+Result and upload keys embed the job id and are never rewritten, so objects
+can be cached by browsers and CDNs indefinitely. These helpers build the
+cache headers, content-hash ETags, conditional-GET checks and byte ranges
+used by the storage router.
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+import hashlib
+import os
+import re
+
+from app.utils.metrics import record_cache
+
+HASH_CHUNK_BYTES = 1024 * 1024
+# One "bytes=first-last" range; either position may be omitted
+_BYTE_RANGE = re.compile(r"bytes=([0-9]*)-([0-9]*)")
+
+
+def immutable_cache_control(max_age: int) -> str:
+    return f"public, max-age={max_age}, immutable"
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+class FileETagCache:
+    """
+    Content-hash ETags for local files
+
+    Hashing a file on every request would cost more than sending it, so
+    hashes are remembered per (path, mtime, size) in a small LRU.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, path: Path, stat_result: os.stat_result) -> str:
+        """
+        ETag for a file (blocking; call from a thread when not cached)
+
+        Returns:
+            Quoted strong ETag, e.g. '"9f86d081..."'
+        """
+        key = (str(path), stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            etag = self._entries.get(key)
+            if etag is not None:
+                self._entries.move_to_end(key)
+                record_cache("storage_etag", True)
+                return etag
+        record_cache("storage_etag", False)
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as source:
+            for chunk in iter(lambda: source.read(HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        etag = f'"{digest.hexdigest()}"'
+
+        with self._lock:
+            self._entries[key] = etag
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified_since(if_modified_since: Optional[str], mtime: float) -> bool:
+    """True when If-Modified-Since is at or after mtime (second precision)."""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return int(mtime) <= since.timestamp()
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single "bytes=" range
+
+    Multiple ranges are not supported and, like malformed or invalid ranges
+    (e.g. "bytes=5-2"), are treated as no range: the full object is sent,
+    which RFC 9110 allows.
+
+    Returns:
+        (start, end) inclusive, or None to send the whole object
+
+    Raises:
+        ValueError: If the range cannot be satisfied (respond 416)
+    """
+    if not range_header or size <= 0:
+        return None
+    match = _BYTE_RANGE.fullmatch(range_header.strip())
+    if match is None:
+        return None
+
+    start_text, end_text = match.groups()
+    if start_text == "":
+        # Suffix range: the last N bytes ("bytes=-0" selects nothing)
+        if end_text == "":
+            return None
+        length = int(end_text)
+        if length == 0:
+            raise ValueError("Range not satisfiable")
+        return max(0, size - length), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if end_text and start > end:
+        return None
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+
+def iter_file_range(path: Path, start: int, end: int, chunk_size: int = 64 * 1024):
+    """Yield bytes start..end (inclusive) of a file."""
+    remaining = end - start + 1
+    with open(path, "rb") as source:
+        source.seek(start)
+        while remaining > 0:
+            chunk = source.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def last_modified(dt: Optional[datetime]) -> Optional[str]:
+    """Format a datetime (e.g. S3 LastModified) as an HTTP date."""
+    if dt is None:
+        return None
+    return http_date(dt.timestamp())
@@ -3,17 +3,24 @@ JWT token utilities
 """
 from datetime import datetime, timedelta
 from typing import Optional
+import time
 from jose import JWTError, jwt
 from app.config import settings
 
 
-def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(
+    user_id: str,
+    expires_delta: Optional[timedelta] = None,
+    plan: Optional[str] = None
+) -> str:
     """
     Create JWT access token
     
     Args:
         user_id: User UUID as string
         expires_delta: Optional custom expiration time
+        plan: User's plan, embedded so read-only endpoints can authorize
+            without loading the user
     
     Returns:
         Encoded JWT token
@@ -26,8 +33,12 @@ def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None)
     to_encode = {
         "sub": user_id,
         "exp": expire,
+        # Issue time, compared with the user's last change (see auth_cache)
+        "iat": int(time.time()),
         "type": "access"
     }
+    if plan:
+        to_encode["plan"] = plan
     
     encoded_jwt = jwt.encode(
         to_encode,
@@ -65,16 +76,16 @@ def create_refresh_token(user_id: str) -> str:
     return encoded_jwt
 
 
-def verify_token(token: str, token_type: str = "access") -> Optional[str]:
+def decode_token(token: str, token_type: str = "access") -> Optional[dict]:
     """
-    Verify JWT token and extract user_id
+    Verify JWT token and return its claims
     
     Args:
         token: JWT token string
         token_type: Expected token type ("access" or "refresh")
     
     Returns:
-        User ID if valid, None otherwise
+        Claims dict if valid, None otherwise
     """
     try:
         payload = jwt.decode(
@@ -82,14 +93,25 @@ def verify_token(token: str, token_type: str = "access") -> Optional[str]:
             settings.JWT_SECRET_KEY,
             algorithms=[settings.JWT_ALGORITHM]
         )
-        
-        user_id: str = payload.get("sub")
-        token_type_claim: str = payload.get("type")
-        
-        if user_id is None or token_type_claim != token_type:
-            return None
-        
-        return user_id
-        
     except JWTError:
         return None
+    
+    if payload.get("sub") is None or payload.get("type") != token_type:
+        return None
+    
+    return payload
+
+
+def verify_token(token: str, token_type: str = "access") -> Optional[str]:
+    """
+    Verify JWT token and extract user_id
+    
+    Args:
+        token: JWT token string
+        token_type: Expected token type ("access" or "refresh")
+    
+    Returns:
+        User ID if valid, None otherwise
+    """
+    payload = decode_token(token, token_type)
+    return payload["sub"] if payload else None
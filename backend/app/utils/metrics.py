@@ -0,0 +1,214 @@
+"""
+Prometheus metrics shared by the API and the GPU worker
+
+Each process exposes its own registry: the API on GET /metrics and the worker
+on WORKER_METRICS_PORT. This module does not import app.config so the
+worker can use it before its environment is loaded.
+"""
+from contextlib import contextmanager
+from typing import Optional
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+
+from app.utils.tracing import span
+
+# Pipeline stages, in the order a job goes through them
+STAGES = (
+    "download",
+    "preview",
+    "schp",
+    "pose",
+    "agnostic",
+    "warp",
+    "vton",
+    "composite",
+    "upscale",
+    "local_tryon",
+    "encode",
+    "upload",
+)
+
+# Stages range from tens of milliseconds (uploads) to a minute (diffusion)
+STAGE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "tryon_stage_seconds",
+    "Time spent in each pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_IN_FLIGHT = Gauge(
+    "tryon_stage_in_flight",
+    "Jobs currently inside each pipeline stage",
+    ["stage"],
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "tryon_queue_wait_seconds",
+    "Time between enqueue in the API and pickup by a worker",
+    buckets=STAGE_BUCKETS,
+)
+JOB_SECONDS = Histogram(
+    "tryon_job_seconds",
+    "Worker processing time per job, by final status",
+    ["status"],
+    buckets=STAGE_BUCKETS,
+)
+JOBS_IN_FLIGHT = Gauge(
+    "tryon_jobs_in_flight",
+    "Jobs currently being processed by this worker",
+)
+RESULT_BYTES = Counter(
+    "tryon_result_bytes_total",
+    "Bytes of full-resolution results written, and bytes saved vs lossless PNG",
+    ["kind"],
+)
+TIME_TO_FIRST_IMAGE_SECONDS = Histogram(
+    "tryon_time_to_first_image_seconds",
+    "Time from enqueue until the user can see an image (draft preview or full result)",
+    ["kind"],
+    buckets=STAGE_BUCKETS,
+)
+JOB_TIERS = Counter(
+    "tryon_job_tiers_total",
+    "Jobs started per quality tier, and whether queue lag downgraded them",
+    ["tier", "downgraded"],
+)
+MODEL_LOADS = Counter(
+    "tryon_model_loads_total",
+    "Stage models loaded into memory",
+    ["model"],
+)
+MODEL_EVICTIONS = Counter(
+    "tryon_model_evictions_total",
+    "Stage models evicted to stay under the memory budget",
+    ["model"],
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "tryon_model_load_seconds",
+    "Time to load a stage model",
+    ["model"],
+    buckets=STAGE_BUCKETS,
+)
+MODEL_RESIDENT_BYTES = Gauge(
+    "tryon_model_resident_bytes",
+    "Memory held by each resident stage model (0 when not loaded)",
+    ["model"],
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hash_in_flight",
+    "bcrypt hashes/verifications running or queued in the password pool",
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time spent in one bcrypt hash or verification",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Hash requests shed with 503 because the password pool was full",
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and outcome",
+    ["cache", "result"],
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count one lookup in a named cache."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Observe one stage's duration and in-flight count."""
+    gauge = STAGE_IN_FLIGHT.labels(stage=stage)
+    gauge.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
+        gauge.dec()
+
+
+class StageTimer:
+    """
+    Per-job stage breakdown
+
+    Every stage is also observed in the Prometheus histograms and traced as
+    a ``stage.<name>`` span; ``timings`` keeps the job's own milliseconds per
+    stage for storage on the Job row.
+    """
+
+    def __init__(self):
+        self.timings: dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            with span(f"stage.{name}", stage=name), track_stage(name):
+                yield
+        finally:
+            elapsed_ms = int((time.perf_counter() - start) * 1000)
+            self.timings[name] = self.timings.get(name, 0) + elapsed_ms
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add a duration measured elsewhere (e.g. queue wait)."""
+        self.timings[name] = self.timings.get(name, 0) + int(seconds * 1000)
+
+
+def observe_queue_wait(enqueued_at: Optional[float], timer: StageTimer = None) -> Optional[float]:
+    """
+    Observe the queue wait of a job enqueued at a Unix timestamp
+
+    Returns:
+        Wait in seconds, or None if the enqueue time is unknown
+    """
+    if enqueued_at is None:
+        return None
+    wait = max(0.0, time.time() - enqueued_at)
+    QUEUE_WAIT_SECONDS.observe(wait)
+    if timer is not None:
+        timer.record("queue_wait", wait)
+    return wait
+
+
+def observe_first_image(kind: str, since: float) -> float:
+    """
+    Observe a job's time to first image
+
+    Args:
+        kind: "preview" or "result", whichever the user saw first
+        since: Unix timestamp the job was enqueued at
+
+    Returns:
+        Seconds since enqueue
+    """
+    elapsed = max(0.0, time.time() - since)
+    TIME_TO_FIRST_IMAGE_SECONDS.labels(kind=kind).observe(elapsed)
+    return elapsed
+
+
+def start_metrics_server(port: int) -> None:
+    """Serve /metrics on a background thread (used by the worker)."""
+    start_http_server(port)
+
+
+def latest_metrics() -> tuple[bytes, str]:
+    """
+    Render the registry in the Prometheus text format
+
+    Returns:
+        (body, content type)
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,65 @@
+"""
+Keyset (cursor) pagination helpers
+
+Lists are ordered by (created_at DESC, id DESC) and a page continues strictly
+after the last row of the previous one, so fetching page N costs the same as
+page 1 regardless of how much history a user has. Cursors are opaque to
+clients: url-safe base64 of "<created_at ISO>|<id>".
+"""
+from datetime import datetime
+from typing import Optional
+import base64
+import binascii
+import uuid
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    """Build the cursor that continues after a row."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """
+    Parse a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def apply_keyset(query, created_at_column, id_column, cursor: Optional[str], page_size: int):
+    """
+    Order a select newest-first and continue after ``cursor``
+
+    Fetches one extra row so callers can tell whether another page exists
+    (see split_page).
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(created_at_column, id_column) < tuple_(created_at, row_id))
+
+    return query.order_by(created_at_column.desc(), id_column.desc()).limit(page_size + 1)
+
+
+def split_page(rows: list, page_size: int) -> tuple[list, Optional[str]]:
+    """
+    Trim the look-ahead row and build the next cursor
+
+    Returns:
+        (rows for this page, cursor for the next page or None)
+    """
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
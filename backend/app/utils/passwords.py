@@ -0,0 +1,97 @@
+"""
+Password hashing off the event loop
+
+bcrypt is deliberately slow (~250ms at cost 12) and would block every other
+request on the worker if called inline from an async route. Hashing and
+verification run in a small dedicated thread pool instead (bcrypt releases
+the GIL), with an admission limit so a login flood queues a bounded amount of
+work and sheds the rest with 503.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.utils.metrics import PASSWORD_HASH_IN_FLIGHT, PASSWORD_HASH_REJECTED, PASSWORD_HASH_SECONDS
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+
+# Admission count (running + queued); exported as password_hash_in_flight
+_admission_lock = threading.Lock()
+_in_flight = 0
+
+
+def _timed(func, *args):
+    with PASSWORD_HASH_SECONDS.time():
+        return func(*args)
+
+
+async def _run(func, *args):
+    global _in_flight
+    with _admission_lock:
+        if _in_flight >= settings.PASSWORD_HASH_MAX_PENDING:
+            PASSWORD_HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        _in_flight += 1
+        PASSWORD_HASH_IN_FLIGHT.inc()
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, _timed, func, *args)
+    finally:
+        with _admission_lock:
+            _in_flight -= 1
+            PASSWORD_HASH_IN_FLIGHT.dec()
+
+
+def _hash(password: str) -> str:
+    import bcrypt
+
+    return bcrypt.hashpw(
+        password.encode("utf-8"),
+        bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    ).decode("utf-8")
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    import bcrypt
+
+    return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hash a password with the configured bcrypt cost
+
+    Raises:
+        HTTPException(503) if too many hashes are already queued
+    """
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    """
+    Check a password against a stored bcrypt hash
+
+    Raises:
+        HTTPException(503) if too many hashes are already queued
+    """
+    return await _run(_verify, password, password_hash)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True if the hash was made with a different cost than BCRYPT_ROUNDS."""
+    try:
+        # Format: $2b$<cost>$<salt+hash>
+        return int(password_hash.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,184 @@
+"""
+Opt-in sampling profiler for the API and the GPU worker
+
+A background thread samples one thread's Python stack at a fixed interval and
+counts the stacks in the collapsed format ("outer;inner;leaf count") used by
+flamegraph.pl and speedscope. Sampling every few milliseconds costs around 1%
+of a core, so a sampled fraction of production jobs and requests can be
+profiled.
+
+Whether to profile is decided by a ProfilingPolicy. Its defaults come from
+the environment, and an admin can override them through Redis, which
+switches every API and worker process at once. This module does not import
+app.config, so the worker can use it before its environment is loaded.
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+import random
+import sys
+import threading
+import time
+
+PROFILING_KEY = "profiling:config"
+
+
+def _frame_label(code) -> str:
+    """'package/module.py:Qualified.name' for a code object."""
+    parts = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    path = "/".join(parts[-2:])
+    return f"{path}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse_stack(frame) -> str:
+    """Collapsed stack of a frame, outermost call first."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack from a background thread
+
+    Usage:
+        with StackSampler() as sampler:
+            work()
+        folded = sampler.collapsed()
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval_seconds: float = 0.005):
+        """
+        Args:
+            thread_id: Thread to sample (defaults to the calling thread)
+            interval_seconds: Time between samples
+        """
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.duration_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+    def start(self) -> None:
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration_seconds = time.perf_counter() - self._started_at
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def __enter__(self) -> "StackSampler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed (folded) format, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfilingPolicy:
+    """
+    Decides which jobs and requests are profiled
+
+    The environment gives the defaults. An admin override is stored in the
+    Redis hash ``profiling:config`` with an expiry, so a forgotten override
+    turns itself off. Each process re-reads the override every
+    refresh_seconds.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        enabled: bool = False,
+        sample_rate: float = 0.01,
+        refresh_seconds: float = 5.0
+    ):
+        """
+        Args:
+            redis_client: Redis client created with decode_responses=True
+            enabled: Default when no override is set
+            sample_rate: Default fraction of jobs/requests to profile
+            refresh_seconds: How long a process trusts its copy of the override
+        """
+        self.redis = redis_client
+        self.default = (enabled, sample_rate)
+        self.refresh_seconds = refresh_seconds
+        self._current = self.default
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def current(self) -> tuple[bool, float]:
+        """(enabled, sample_rate), from the Redis override when present."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.refresh_seconds:
+                return self._current
+            self._checked_at = now
+
+        try:
+            override = self.redis.hgetall(PROFILING_KEY)
+        except Exception:
+            override = None
+        if override:
+            current = (override.get("enabled") == "1", float(override.get("sample_rate") or 0))
+        else:
+            current = self.default
+
+        with self._lock:
+            self._current = current
+        return current
+
+    def status(self) -> dict:
+        """Effective settings, and the seconds left on the override (None if unset)."""
+        self._checked_at = float("-inf")
+        enabled, sample_rate = self.current()
+        ttl = self.redis.ttl(PROFILING_KEY)
+        return {
+            "enabled": enabled,
+            "sample_rate": sample_rate,
+            "override_expires_in_seconds": ttl if ttl and ttl > 0 else None,
+        }
+
+    def override(self, enabled: bool, sample_rate: float, duration_seconds: int) -> None:
+        """Switch profiling on or off in every process for duration_seconds."""
+        pipe = self.redis.pipeline()
+        pipe.hset(PROFILING_KEY, mapping={"enabled": "1" if enabled else "0", "sample_rate": str(sample_rate)})
+        pipe.expire(PROFILING_KEY, duration_seconds)
+        pipe.execute()
+        self._checked_at = float("-inf")
+
+    def clear(self) -> None:
+        """Drop the override; processes go back to their environment defaults."""
+        self.redis.delete(PROFILING_KEY)
+        self._checked_at = float("-inf")
+
+    def should_profile(self) -> bool:
+        enabled, sample_rate = self.current()
+        return enabled and random.random() < sample_rate
+
+
+def profile_key(kind: str, identifier: str) -> str:
+    """Storage key of a profile, e.g. profiles/20240101/jobs/<job_id>.folded"""
+    timestamp = datetime.now().strftime("%Y%m%d")
+    return f"profiles/{timestamp}/{kind}/{identifier}.folded"
+
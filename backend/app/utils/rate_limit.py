@@ -1,76 +1,269 @@
 """
 Rate limiting utilities using Redis
+
+Limits are enforced with a sliding-window counter: each window keeps a counter
+for the current and the previous fixed bucket, and the previous bucket is
+weighted by how much of it still overlaps the sliding window. All windows of a
+plan (per minute and per day) are checked and incremented by one Lua script,
+so a request costs a single Redis round trip and concurrent requests cannot
+race past the limit.
+
+An optional in-process token bucket sheds abusive bursts before they reach
+Redis at all.
 """
+from collections import OrderedDict
+from dataclasses import dataclass
+import math
+import threading
+import time
+from typing import Optional
+
 import redis
+from fastapi import Depends, HTTPException, Response, status
+
 from app.config import settings
-from typing import Optional
+from app.models import User, PlanType
+from app.utils.auth import get_current_user
 
 # Redis client
 redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
 
+WINDOWS = {
+    "per_minute": 60,
+    "per_day": 86400,
+}
+
+# KEYS = (current, previous) bucket key per window
+# ARGV[1] = now (seconds, float), then (window_seconds, limit) per window
+# Returns {allowed, limit, remaining, reset_seconds, retry_after_seconds} for
+# the most restrictive window.
+_SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local n = #KEYS / 2
+local allowed = 1
+local best = nil
+
+for i = 1, n do
+    local window = tonumber(ARGV[2 * i])
+    local limit = tonumber(ARGV[2 * i + 1])
+    local cur = tonumber(redis.call('GET', KEYS[2 * i - 1]) or '0')
+    local prev = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    local elapsed = now - math.floor(now / window) * window
+    local estimated = prev * ((window - elapsed) / window) + cur
+    local reset = math.ceil(window - elapsed)
+    local retry_after = 0
+
+    if estimated + 1 > limit then
+        allowed = 0
+        if prev > 0 and cur + 1 <= limit then
+            retry_after = math.ceil((estimated + 1 - limit) * window / prev)
+        else
+            retry_after = reset
+        end
+    end
+
+    local remaining = math.max(0, math.floor(limit - estimated - 1))
+    if best == nil or retry_after > best[5] or (retry_after == best[5] and remaining < best[3]) then
+        best = {0, limit, remaining, reset, retry_after}
+    end
+end
+
+if allowed == 1 then
+    for i = 1, n do
+        local window = tonumber(ARGV[2 * i])
+        redis.call('INCR', KEYS[2 * i - 1])
+        redis.call('EXPIRE', KEYS[2 * i - 1], window * 2)
+    end
+else
+    best[3] = 0
+end
+
+best[1] = allowed
+return best
+"""
+_sliding_window = redis_client.register_script(_SLIDING_WINDOW_SCRIPT)
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int
+    retry_after: int = 0
+
+    def headers(self) -> dict:
+        """Standard RateLimit-* response headers."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class LocalTokenBucket:
+    """
+    In-process token bucket per user
+
+    Cheap pre-filter that rejects bursts without touching Redis. State is
+    bounded by an LRU of recently seen users.
+    """
+
+    def __init__(self, burst: int, refill_per_second: float, max_entries: int = 10000):
+        self.burst = burst
+        self.refill_per_second = refill_per_second
+        self.max_entries = max_entries
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> tuple[bool, int]:
+        """
+        Take one token for ``key``
+
+        Returns:
+            (allowed, seconds until the next token is available)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(self.burst), now))
+            tokens = min(self.burst, tokens + (now - updated) * self.refill_per_second)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+
+        retry_after = 0 if allowed else math.ceil((1 - tokens) / self.refill_per_second)
+        return allowed, retry_after
+
 
-def check_rate_limit(user_id: str, limit_type: str = "per_minute") -> bool:
+local_bucket = (
+    LocalTokenBucket(settings.RATE_LIMIT_LOCAL_BURST, settings.RATE_LIMIT_LOCAL_REFILL_PER_SECOND)
+    if settings.RATE_LIMIT_LOCAL_BURST > 0
+    else None
+)
+
+
+def get_plan_limits(plan: PlanType) -> dict:
+    """
+    Get rate limits for a plan
+
+    Returns:
+        Dict of limit_type -> max requests in that window
+    """
+    if plan == PlanType.FREE:
+        return {
+            "per_minute": settings.RATE_LIMIT_FREE_PER_MINUTE,
+            "per_day": settings.RATE_LIMIT_FREE_PER_DAY,
+        }
+    return {
+        "per_minute": settings.RATE_LIMIT_PRO_PER_MINUTE,
+        "per_day": settings.RATE_LIMIT_PRO_PER_DAY,
+    }
+
+
+def _bucket_keys(user_id: str, window: int, now: float) -> tuple[str, str]:
+    bucket = int(now // window)
+    # Hash tag keeps all of a user's keys in one cluster slot
+    prefix = f"rate_limit:{{{user_id}}}:{window}"
+    return f"{prefix}:{bucket}", f"{prefix}:{bucket - 1}"
+
+
+def check_rate_limit(user_id: str, plan: PlanType = PlanType.FREE) -> RateLimitResult:
     """
-    Check if user has exceeded rate limit
-    
+    Check and count a request against all of the plan's windows
+
     Args:
         user_id: User UUID
-        limit_type: Type of limit ("per_minute", "per_day")
-    
+        plan: User's subscription plan
+
     Returns:
-        True if allowed, False if rate limit exceeded
+        RateLimitResult for the most restrictive window
     """
-    key = f"rate_limit:{user_id}:{limit_type}"
-    
-    current = redis_client.get(key)
-    
-    if limit_type == "per_minute":
-        limit = settings.RATE_LIMIT_FREE_PER_MINUTE
-        expiry = 60
-    elif limit_type == "per_day":
-        limit = settings.RATE_LIMIT_FREE_PER_DAY
-        expiry = 86400
-    else:
-        return True
-    
-    if current is None:
-        redis_client.setex(key, expiry, 1)
-        return True
-    
-    if int(current) >= limit:
-        return False
-    
-    redis_client.incr(key)
-    return True
+    now = time.time()
+    keys = []
+    args = [now]
+    for limit_type, limit in get_plan_limits(plan).items():
+        window = WINDOWS[limit_type]
+        keys.extend(_bucket_keys(user_id, window, now))
+        args.extend([window, limit])
+
+    allowed, limit, remaining, reset, retry_after = _sliding_window(keys=keys, args=args)
+    return RateLimitResult(bool(allowed), int(limit), int(remaining), int(reset), int(retry_after))
 
 
 def reset_rate_limit(user_id: str, limit_type: str = "per_minute"):
     """Reset rate limit for a user"""
-    key = f"rate_limit:{user_id}:{limit_type}"
-    redis_client.delete(key)
+    window = WINDOWS[limit_type]
+    redis_client.delete(*_bucket_keys(user_id, window, time.time()))
 
 
-def get_rate_limit_status(user_id: str, limit_type: str = "per_minute") -> dict:
+def get_rate_limit_status(user_id: str, limit_type: str = "per_minute", plan: PlanType = PlanType.FREE) -> dict:
     """
     Get current rate limit status
-    
+
     Returns:
         Dict with 'used', 'limit', 'remaining'
     """
-    key = f"rate_limit:{user_id}:{limit_type}"
-    current = redis_client.get(key)
-    
-    if limit_type == "per_minute":
-        limit = settings.RATE_LIMIT_FREE_PER_MINUTE
-    elif limit_type == "per_day":
-        limit = settings.RATE_LIMIT_FREE_PER_DAY
-    else:
-        limit = 0
-    
-    used = int(current) if current else 0
-    
+    now = time.time()
+    window = WINDOWS[limit_type]
+    limit = get_plan_limits(plan).get(limit_type, 0)
+    current_key, previous_key = _bucket_keys(user_id, window, now)
+    current, previous = redis_client.mget(current_key, previous_key)
+
+    elapsed = now - (now // window) * window
+    used = int((int(previous or 0) * (window - elapsed) / window) + int(current or 0))
+
     return {
         "used": used,
         "limit": limit,
         "remaining": max(0, limit - used)
     }
+
+
+async def enforce_rate_limit(
+    response: Response,
+    current_user: User = Depends(get_current_user)
+) -> Optional[RateLimitResult]:
+    """
+    Dependency enforcing the current user's plan rate limits
+
+    Sets RateLimit-* headers on the response and raises 429 when the limit
+    is exceeded.
+
+    Usage:
+        @router.post("/create", dependencies=[Depends(enforce_rate_limit)])
+    """
+    user_id = str(current_user.id)
+
+    if local_bucket is not None:
+        allowed, retry_after = local_bucket.allow(user_id)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+    try:
+        result = check_rate_limit(user_id, current_user.plan)
+    except redis.RedisError:
+        # Fail open: quota accounting still bounds usage if Redis is flaky
+        return None
+
+    if not result.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded. Please slow down.",
+            headers=result.headers(),
+        )
+
+    response.headers.update(result.headers())
+    return result
@@ -0,0 +1,144 @@
+"""
+OpenTelemetry tracing shared by the API and the GPU worker
+
+A job's trace starts with the API request that creates it. The trace context
+travels in the Redis queue payload (``trace_context``), and the worker
+continues the trace with a queue wait span, a job span and one span per
+pipeline stage.
+
+Tracing is off unless configure_tracing() installs a provider. Until then,
+span() and friends are no-ops. The OpenTelemetry SDK and exporters are only
+imported when tracing is enabled. This module does not import app.config,
+so the worker can use it before its environment is loaded.
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterable, Mapping, Optional
+
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+TRACING_EXPORTERS = ("none", "console", "otlp")
+
+tracer = trace.get_tracer("virtual-tryon")
+
+
+def configure_tracing(
+    service_name: str,
+    exporter: str = "none",
+    otlp_endpoint: str = "http://localhost:4318",
+    sample_rate: float = 0.1
+) -> bool:
+    """
+    Install the process-wide tracer provider
+
+    New traces are sampled at sample_rate. Spans that continue a trace (the
+    worker's job spans) follow the caller's decision, so a sampled request
+    is traced end to end.
+
+    Args:
+        service_name: service.name resource attribute ("api", "gpu-worker")
+        exporter: "none", "console" (stdout) or "otlp" (OTLP/HTTP)
+        otlp_endpoint: Collector base URL; spans go to <endpoint>/v1/traces
+        sample_rate: Fraction of new traces to record (0.0 - 1.0)
+
+    Returns:
+        True if tracing was enabled
+    """
+    exporter = (exporter or "none").lower()
+    if exporter not in TRACING_EXPORTERS:
+        raise ValueError(f"Unknown tracing exporter: {exporter}")
+    if exporter == "none":
+        return False
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(sample_rate)),
+    )
+    if exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+    else:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        span_exporter = OTLPSpanExporter(endpoint=f"{otlp_endpoint.rstrip('/')}/v1/traces")
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush and stop the exporter (no-op when tracing is off)."""
+    # Only the SDK provider installed by configure_tracing() has shutdown()
+    shutdown = getattr(trace.get_tracer_provider(), "shutdown", None)
+    if shutdown is not None:
+        shutdown()
+
+
+def inject_context() -> dict:
+    """W3C trace context of the current span, for a queue payload."""
+    carrier: dict = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+def extract_context(carrier: Optional[Mapping]):
+    """Context to continue a trace from a payload or request headers."""
+    return propagate.extract(carrier or {})
+
+
+@contextmanager
+def span(name: str, kind: SpanKind = SpanKind.INTERNAL, context=None, **attributes):
+    """
+    Run a block inside a span
+
+    Exceptions escaping the block are recorded on the span and mark it as
+    failed.
+    """
+    with tracer.start_as_current_span(name, context=context, kind=kind, attributes=attributes) as current:
+        yield current
+
+
+def record_span(name: str, start_time: float, end_time: float, context=None, **attributes) -> None:
+    """
+    Record a span for an interval that has already happened
+
+    Args:
+        start_time: Unix timestamp (seconds)
+        end_time: Unix timestamp (seconds)
+    """
+    past = tracer.start_span(
+        name, context=context, attributes=attributes, start_time=int(start_time * 1e9)
+    )
+    past.end(end_time=int(end_time * 1e9))
+
+
+def record_error(error: BaseException) -> None:
+    """Mark the current span as failed (for errors that are handled)."""
+    current = trace.get_current_span()
+    current.record_exception(error)
+    current.set_status(Status(StatusCode.ERROR, str(error)))
+
+
+def sentry_traces_sampler(sample_rate: float, ignored_paths: Iterable[str] = ()) -> Callable[[dict], float]:
+    """
+    Sentry sampling policy
+
+    Continues the caller's decision when there is one, never traces
+    ignored paths (health checks, metrics scrapes), and samples everything
+    else at sample_rate.
+    """
+    ignored = frozenset(ignored_paths)
+
+    def sampler(sampling_context: dict) -> float:
+        parent_sampled = sampling_context.get("parent_sampled")
+        if parent_sampled is not None:
+            return float(parent_sampled)
+        path = (sampling_context.get("asgi_scope") or {}).get("path")
+        if path in ignored:
+            return 0.0
+        return sample_rate
+
+    return sampler
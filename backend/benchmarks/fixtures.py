@@ -0,0 +1,114 @@
+"""
+Synthetic fixtures for the pipeline benchmarks
+
+Draws a front-facing person (hair, face, upper clothes, arms, pants) and the
+matching SCHP/LIP label map, plus a garment on a near-white studio
+background, at any resolution. The images are deterministic and have enough
+texture that encoders and inpainting do realistic amounts of work.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+# Named benchmark resolutions (width, height), portrait like real uploads
+RESOLUTIONS = {
+    "sd": (384, 512),
+    "hd": (768, 1024),
+    "fhd": (1536, 2048),
+}
+
+# LIP label ids (see gpu_inference/mask_utils.py)
+HAIR, UPPER_CLOTHES, PANTS, FACE, LEFT_ARM, RIGHT_ARM = 2, 5, 9, 13, 14, 15
+
+LABEL_COLORS = {
+    0: (92, 110, 128),
+    HAIR: (48, 32, 24),
+    UPPER_CLOTHES: (170, 40, 52),
+    PANTS: (40, 52, 96),
+    FACE: (224, 182, 150),
+    LEFT_ARM: (214, 170, 138),
+    RIGHT_ARM: (214, 170, 138),
+}
+
+
+@dataclass(frozen=True)
+class FixturePaths:
+    person: str
+    garment: str
+    labels: str
+
+
+def _ellipse(height: int, width: int, cx: float, cy: float, rx: float, ry: float) -> np.ndarray:
+    yy, xx = np.ogrid[:height, :width]
+    return ((xx - cx * width) / (rx * width)) ** 2 + ((yy - cy * height) / (ry * height)) ** 2 <= 1
+
+
+def _box(height: int, width: int, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+    mask = np.zeros((height, width), dtype=bool)
+    mask[int(y0 * height):int(y1 * height), int(x0 * width):int(x1 * width)] = True
+    return mask
+
+
+def synthetic_label_map(width: int, height: int) -> np.ndarray:
+    """SCHP-style label map (uint8 LIP ids) of the synthetic person."""
+    labels = np.zeros((height, width), dtype=np.uint8)
+    labels[_box(height, width, 0.32, 0.70, 0.68, 0.96)] = PANTS
+    labels[_box(height, width, 0.18, 0.36, 0.30, 0.68)] = LEFT_ARM
+    labels[_box(height, width, 0.70, 0.36, 0.82, 0.68)] = RIGHT_ARM
+    labels[_box(height, width, 0.30, 0.34, 0.70, 0.72)] = UPPER_CLOTHES
+    labels[_ellipse(height, width, 0.50, 0.17, 0.15, 0.11)] = HAIR
+    labels[_ellipse(height, width, 0.50, 0.23, 0.11, 0.10)] = FACE
+    return labels
+
+
+def synthetic_person(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """RGB person photo (uint8) matching synthetic_label_map."""
+    rng = np.random.default_rng(seed)
+    labels = synthetic_label_map(width, height)
+    palette = np.zeros((256, 3), dtype=np.float32)
+    for label, color in LABEL_COLORS.items():
+        palette[label] = color
+
+    image = palette[labels]
+    # Lighting gradient and sensor noise
+    image *= np.linspace(1.1, 0.85, height, dtype=np.float32)[:, None, None]
+    image += rng.normal(0, 6, size=image.shape).astype(np.float32)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def synthetic_garment(width: int, height: int, seed: int = 1) -> np.ndarray:
+    """RGB garment photo (uint8): a striped shirt on a near-white background."""
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 250, dtype=np.float32)
+
+    shirt = (
+        _box(height, width, 0.25, 0.20, 0.75, 0.90)
+        | _box(height, width, 0.08, 0.20, 0.25, 0.50)
+        | _box(height, width, 0.75, 0.20, 0.92, 0.50)
+    )
+    stripes = (np.arange(height)[:, None] // max(1, height // 40)) % 2 == 0
+    color = np.where(stripes[..., None], (28, 84, 160), (236, 236, 236)).astype(np.float32)
+    image[shirt] = np.broadcast_to(color, image.shape)[shirt]
+    image += rng.normal(0, 3, size=image.shape).astype(np.float32)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def write_fixtures(directory: str, width: int, height: int) -> FixturePaths:
+    """
+    Write person.jpg, garment.jpg and labels.png for one resolution
+
+    Returns:
+        FixturePaths of the written files
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = FixturePaths(
+        person=os.path.join(directory, "person.jpg"),
+        garment=os.path.join(directory, "garment.jpg"),
+        labels=os.path.join(directory, "labels.png"),
+    )
+    Image.fromarray(synthetic_person(width, height)).save(paths.person, quality=92)
+    Image.fromarray(synthetic_garment(width, height)).save(paths.garment, quality=92)
+    Image.fromarray(synthetic_label_map(width, height)).save(paths.labels)
+    return paths
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Model residency check and benchmark
+
+Exercises ModelRegistry (gpu_inference/model_registry.py) with tiny CPU
+dummy models (torch Linear layers of a given size) instead of real
+checkpoints:
+
+1. Checks: loads, LRU eviction order, warm-up skipping and the oversized
+   model case give the expected results. Exits 1 on a mismatch.
+2. Sweep: replays the legacy pipeline's access pattern (schp, pose, vton,
+   upscale per job) under each --budgets value, with the stage models scaled
+   by --scale, and reports loads and evictions per job and time spent loading.
+
+Use the sweep to size MODEL_MEMORY_BUDGET_MB: below the sum of the stage
+models every job reloads something; at or above it nothing is reloaded after
+warm-up.
+
+Usage:
+    python benchmarks/model_residency.py
+    python benchmarks/model_residency.py --budgets 0,100,200,400 --jobs 50 --load-ms 20
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+# Add backend and gpu_inference directories to path
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "gpu_inference"))
+
+import torch
+
+from model_registry import MB, ModelRegistry
+from pipeline import MODEL_SIZE_ESTIMATES_MB
+
+STAGE_ORDER = ("schp", "pose", "vton", "upscale")
+
+
+def dummy_model(size_mb: float, load_ms: float = 0):
+    """A loader for a float32 CPU Linear layer of about size_mb."""
+    features = max(1, int(math.sqrt(size_mb * MB / 4)))
+
+    def load():
+        if load_ms:
+            time.sleep(load_ms / 1000)
+        return torch.nn.Linear(features, features, bias=False).eval()
+
+    return load
+
+
+def registry_with(sizes_mb: dict[str, float], budget_mb: float, load_ms: float = 0) -> ModelRegistry:
+    registry = ModelRegistry(budget_bytes=int(budget_mb * MB))
+    for name, size_mb in sizes_mb.items():
+        registry.register(name, dummy_model(size_mb, load_ms), size_bytes=int(size_mb * MB))
+    return registry
+
+
+def run_checks() -> list[str]:
+    """Return a description of each failed check (empty when all pass)."""
+    failures = []
+
+    def check(description: str, condition: bool):
+        print(f"  {'✅' if condition else '❌'} {description}")
+        if not condition:
+            failures.append(description)
+
+    # Two of the three 4 MB models fit in 10 MB
+    registry = registry_with({"a": 4, "b": 4, "c": 4}, budget_mb=10)
+    first = registry.get("a")
+    registry.get("b")
+    check("models are loaded lazily, once", registry.get("a") is first and registry.loads == 2)
+    registry.get("c")
+    check("the least recently used model is evicted", list(registry.resident()) == ["a", "c"])
+    check("resident bytes stay within the budget", registry.resident_bytes <= registry.budget_bytes)
+    registry.get("b")
+    check("a reload evicts the next LRU model", list(registry.resident()) == ["c", "b"] and registry.evictions == 2)
+    check("measured size replaces the estimate", abs(registry.resident()["b"] - 4 * MB) < 0.01 * MB)
+
+    # Warm-up loads what fits and leaves the rest for first use
+    registry = registry_with({"a": 4, "b": 4, "c": 4}, budget_mb=10)
+    check("warm-up skips models that do not fit", registry.warm_up() == ["a", "b"] and registry.evictions == 0)
+
+    # A model larger than the whole budget still loads, alone
+    registry = registry_with({"small": 2, "huge": 12}, budget_mb=10)
+    registry.get("small")
+    registry.get("huge")
+    check("an oversized model evicts everything else", list(registry.resident()) == ["huge"])
+
+    # An unlimited budget never evicts
+    registry = registry_with({"a": 4, "b": 4, "c": 4}, budget_mb=0)
+    for name in ("a", "b", "c", "a"):
+        registry.get(name)
+    check("budget 0 never evicts", registry.evictions == 0 and len(registry.resident()) == 3)
+
+    registry.clear()
+    check("clear unloads everything", registry.resident_bytes == 0)
+    return failures
+
+
+def sweep(budgets_mb: list[float], scale: float, jobs: int, load_ms: float) -> list[dict]:
+    """Replay the stage access pattern under each budget."""
+    sizes_mb = {name: MODEL_SIZE_ESTIMATES_MB[name] * scale for name in STAGE_ORDER}
+    results = []
+    for budget_mb in budgets_mb:
+        registry = registry_with(sizes_mb, budget_mb, load_ms)
+        with contextlib.redirect_stdout(io.StringIO()):
+            registry.warm_up()
+            warm_loads = registry.loads
+            start = time.perf_counter()
+            for _ in range(jobs):
+                for name in STAGE_ORDER:
+                    registry.get(name)
+            elapsed = time.perf_counter() - start
+        results.append({
+            "budget_mb": budget_mb,
+            "warm_up_loads": warm_loads,
+            "loads_per_job": (registry.loads - warm_loads) / jobs,
+            "evictions_per_job": registry.evictions / jobs,
+            "model_ms_per_job": elapsed * 1000 / jobs,
+            "resident_mb": registry.resident_bytes / MB,
+        })
+        registry.clear()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=0.01, help="Dummy model size as a fraction of the real estimate")
+    parser.add_argument("--budgets", default="0,10,35,60,80", help="Comma-separated budgets in MB (0 = unlimited)")
+    parser.add_argument("--jobs", type=int, default=20, help="Jobs replayed per budget")
+    parser.add_argument("--load-ms", type=float, default=10, help="Extra delay per load, standing in for checkpoint reads")
+    parser.add_argument("--json", default=None, help="Write sweep results to this file")
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+
+    print("🔎 Registry checks")
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        failures = run_checks()
+    print("\n".join(line for line in log.getvalue().splitlines() if line.startswith("  ")))
+
+    total_mb = sum(MODEL_SIZE_ESTIMATES_MB[name] * args.scale for name in STAGE_ORDER)
+    print(f"\n📊 Stage access sweep ({args.jobs} jobs, stage models {total_mb:.1f} MB in total)")
+    print(f"{'budget MB':>10} {'warm loads':>11} {'loads/job':>10} {'evict/job':>10} {'ms/job':>8} {'resident MB':>12}")
+    results = sweep([float(b) for b in args.budgets.split(",")], args.scale, args.jobs, args.load_ms)
+    for row in results:
+        budget = "unlimited" if not row["budget_mb"] else f"{row['budget_mb']:.0f}"
+        print(
+            f"{budget:>10} {row['warm_up_loads']:>11} {row['loads_per_job']:>10.2f} "
+            f"{row['evictions_per_job']:>10.2f} {row['model_ms_per_job']:>8.1f} {row['resident_mb']:>12.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"scale": args.scale, "jobs": args.jobs, "sweep": results}, output, indent=2)
+        print(f"\n📄 Results: {args.json}")
+
+    if failures:
+        print(f"\n❌ {len(failures)} check(s) failed")
+        sys.exit(1)
+    print("\n✅ All checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Try-on pipeline benchmark suite
+
+Groups:
+    masks       mask_utils functions on synthetic label maps
+    local       LocalTryonService.generate (the local development generator)
+    production  ProductionTryonPipeline.run with stub SCHP/pose/VTON commands
+                (benchmarks/stub_models.py), so our own pre/post-processing
+                and the subprocess overhead are what is measured
+    batch       VirtualTryonPipeline.run pair by pair vs run_batch over the
+                same pairs (placeholder stage models, CPU)
+    worker      process_job end to end (download, pipeline, encode, upload,
+                status updates) against moto S3, fakeredis and SQLite
+
+Every case runs on synthetic fixtures (benchmarks/fixtures.py) at each of
+--resolutions: sd 384x512, hd 768x1024, fhd 1536x2048. A group that fails
+(e.g. batch without torch installed) is reported with its error instead of
+stopping the run. Results can be written as JSON (--json) for regression
+tracking. --compare checks a run
+against an earlier JSON file and exits with status 1 when any case's median
+is more than --threshold slower.
+
+Usage:
+    python benchmarks/pipeline_stages.py --json baseline.json
+    # after a change
+    python benchmarks/pipeline_stages.py --compare baseline.json --threshold 0.10
+    # worker end to end (pip install "moto[server]" "fakeredis[lua]")
+    python benchmarks/pipeline_stages.py --groups worker --jobs 20
+    python benchmarks/pipeline_stages.py --groups batch --batch-size 8
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import shlex
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+# Add backend and gpu_inference directories to path
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "gpu_inference"))
+
+from fixtures import (
+    RESOLUTIONS,
+    FixturePaths,
+    synthetic_garment,
+    synthetic_label_map,
+    synthetic_person,
+    write_fixtures,
+)
+from stats import percentile
+
+GROUPS = ("masks", "local", "production", "batch", "worker")
+BUCKET = "bench-bucket"
+REGION = "us-east-1"
+
+
+def measure(fn, repeat: int, warmup: int) -> list[float]:
+    """Call fn warmup + repeat times; return the timed runs in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(name: str, resolution: str, timings: list[float], **extra) -> dict:
+    return {
+        "name": name,
+        "resolution": resolution,
+        "runs": len(timings),
+        "mean_ms": round(statistics.mean(timings), 2),
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "min_ms": round(min(timings), 2),
+        **extra,
+    }
+
+
+def run_group(group: str, resolution: str, fn) -> list[dict]:
+    """
+    Run one group's cases at one resolution
+    
+    Returns:
+        The group's results, or a single entry with the error if it failed
+    """
+    try:
+        return fn()
+    except Exception as e:
+        print(f"  ⚠️  {group} failed at {resolution}: {e}")
+        return [{"name": group, "resolution": resolution, "error": f"{type(e).__name__}: {e}"}]
+
+
+def mean_stages(stage_runs: dict) -> dict:
+    return {stage: round(statistics.mean(values), 1) for stage, values in stage_runs.items()}
+
+
+def stub_command_env(delay_ms: int) -> dict:
+    """Command templates that point ProductionTryonPipeline at stub_models.py."""
+    stub = " ".join(shlex.quote(part) for part in (sys.executable, os.path.join(BENCH_DIR, "stub_models.py")))
+    stub = f"{stub} --delay-ms {delay_ms}"
+    return {
+        "SCHP_LABELMAP_COMMAND_TEMPLATE": f"{stub} schp {{person_image}} {{output_labelmap}}",
+        "POSE_MAP_COMMAND_TEMPLATE": f"{stub} pose {{person_image}} {{output_pose}}",
+        "VTON_COMMAND_TEMPLATE": f"{stub} vton {{person_agnostic}} {{garment_image}} {{edit_mask}} {{output_path}}",
+    }
+
+
+def bench_masks(resolution: str, repeat: int, warmup: int) -> list[dict]:
+    from mask_utils import (
+        build_agnostic_person,
+        build_face_protected_output,
+        extract_tryon_masks,
+        preprocess_garment_mask,
+        validate_output_constraints,
+    )
+
+    width, height = RESOLUTIONS[resolution]
+    labels = synthetic_label_map(width, height)
+    person = synthetic_person(width, height)
+    generated = synthetic_person(width, height, seed=2)
+    garment = synthetic_garment(width, height)
+    masks = extract_tryon_masks(labels)
+    protected = build_face_protected_output(person, generated, masks)
+
+    cases = {
+        "mask_utils.extract_tryon_masks": lambda: extract_tryon_masks(labels),
+        "mask_utils.build_agnostic_person": lambda: build_agnostic_person(person, masks),
+        "mask_utils.build_face_protected_output": lambda: build_face_protected_output(person, generated, masks),
+        "mask_utils.validate_output_constraints": lambda: validate_output_constraints(person, protected, masks),
+        "mask_utils.preprocess_garment_mask": lambda: preprocess_garment_mask(garment),
+    }
+    return [summarize(name, resolution, measure(fn, repeat, warmup)) for name, fn in cases.items()]
+
+
+def bench_local(resolution: str, fixtures: FixturePaths, work_dir: str, repeat: int, warmup: int) -> list[dict]:
+    from app.services.local_tryon_service import LocalTryonService
+
+    output_path = os.path.join(work_dir, "local_result.png")
+
+    def run():
+        LocalTryonService.generate(
+            person_image_path=fixtures.person,
+            garment_image_path=fixtures.garment,
+            output_path=output_path,
+        )
+
+    return [summarize("LocalTryonService.generate", resolution, measure(run, repeat, warmup))]
+
+
+def bench_production(
+    resolution: str,
+    fixtures: FixturePaths,
+    work_dir: str,
+    repeat: int,
+    warmup: int,
+    delay_ms: int
+) -> list[dict]:
+    os.environ.update(stub_command_env(delay_ms))
+    from production_pipeline import ProductionTryonPipeline
+    from app.utils.metrics import StageTimer
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = ProductionTryonPipeline()
+    output_path = os.path.join(work_dir, "production_result.png")
+    stage_runs = defaultdict(list)
+
+    def run():
+        timer = StageTimer()
+        pipeline.run(fixtures.person, fixtures.garment, output_path, timer=timer)
+        for stage, elapsed_ms in timer.timings.items():
+            stage_runs[stage].append(elapsed_ms)
+
+    timings = measure(run, repeat, warmup)
+    stages = {stage: values[warmup:] for stage, values in stage_runs.items()}
+    return [summarize("ProductionTryonPipeline.run", resolution, timings, stages=mean_stages(stages))]
+
+
+def bench_batch(resolution: str, fixtures: FixturePaths, repeat: int, warmup: int, batch_size: int) -> list[dict]:
+    from pipeline import VirtualTryonPipeline
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = VirtualTryonPipeline(device="cpu")
+        pipeline.warm_up()
+    pairs = [(fixtures.person, fixtures.garment)] * (2 * batch_size)
+
+    def sequential():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for person, garment in pairs:
+                pipeline.run(person, garment)
+
+    def batched():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in pipeline.run_batch(pairs, batch_size=batch_size):
+                pass
+
+    results = []
+    for name, fn in (
+        (f"VirtualTryonPipeline.run x{len(pairs)}", sequential),
+        (f"VirtualTryonPipeline.run_batch x{len(pairs)} (batch {batch_size})", batched),
+    ):
+        timings = measure(fn, repeat, warmup)
+        pairs_per_second = round(len(pairs) / (statistics.median(timings) / 1000), 2)
+        results.append(summarize(name, resolution, timings, pairs_per_second=pairs_per_second))
+    return results
+
+
+class WorkerHarness:
+    """
+    The GPU worker wired to local stand-ins
+
+    moto serves S3 on localhost, fakeredis replaces the queue/cache client
+    and the database is a SQLite file. The worker module reads its
+    configuration at import, so it is imported once per harness.
+    """
+
+    def __init__(self, work_dir: str, port: int, pipeline_mode: str, delay_ms: int):
+        from moto.server import ThreadedMotoServer
+
+        self.server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+        self.server.start()
+
+        os.environ.update({
+            "DATABASE_URL": f"sqlite:///{os.path.join(work_dir, 'worker.db')}",
+            "AWS_ACCESS_KEY_ID": "bench",
+            "AWS_SECRET_ACCESS_KEY": "bench",
+            "AWS_S3_BUCKET": BUCKET,
+            "AWS_REGION": REGION,
+            "AWS_S3_ENDPOINT_URL": f"http://127.0.0.1:{port}",
+            "TRYON_PIPELINE_MODE": pipeline_mode,
+            "TRACING_EXPORTER": "none",
+            # Required by app.config, which the worker's model imports load
+            "GOOGLE_CLIENT_ID": "bench",
+            "GOOGLE_CLIENT_SECRET": "bench",
+            "JWT_SECRET_KEY": "bench",
+            **stub_command_env(delay_ms),
+        })
+
+        import fakeredis
+        with contextlib.redirect_stdout(io.StringIO()):
+            import worker
+        from app.database import Base, SessionLocal, engine
+        from app.models import PlanType, User
+
+        self.worker = worker
+        self.SessionLocal = SessionLocal
+
+        fake_redis = fakeredis.FakeRedis(decode_responses=True)
+        worker.redis_client = fake_redis
+        worker.job_state_cache = worker.JobStateCache(
+            fake_redis,
+            active_ttl=worker.JOB_CACHE_ACTIVE_TTL_SECONDS,
+            terminal_ttl=worker.JOB_CACHE_TERMINAL_TTL_SECONDS,
+        )
+        worker.quota_counter = worker.QuotaCounter(fake_redis)
+
+        Base.metadata.create_all(bind=engine)
+        worker.transfers.client.create_bucket(Bucket=BUCKET)
+
+        session = SessionLocal()
+        user = User(email="bench@example.com", name="Bench", plan=PlanType.PRO)
+        session.add(user)
+        session.commit()
+        self.user_id = user.id
+        session.close()
+
+    def seed_jobs(self, resolution: str, fixtures: FixturePaths, count: int) -> list[str]:
+        """Upload a resolution's inputs once and create count pending jobs for them."""
+        from app.models import Job, JobStatus
+
+        stored = {}
+        for name, path in (("user", fixtures.person), ("garment", fixtures.garment)):
+            key = f"uploads/bench/{resolution}/{name}.jpg"
+            with open(path, "rb") as source:
+                stored[name] = (key, self.worker.transfers.upload_bytes(key, source.read(), "image/jpeg"))
+
+        session = self.SessionLocal()
+        jobs = [
+            Job(
+                user_id=self.user_id,
+                status=JobStatus.PENDING,
+                user_image_url=stored["user"][1],
+                garment_image_url=stored["garment"][1],
+                storage_bucket=BUCKET,
+                user_image_key=stored["user"][0],
+                garment_image_key=stored["garment"][0],
+            )
+            for _ in range(count)
+        ]
+        session.add_all(jobs)
+        session.commit()
+        job_ids = [str(job.id) for job in jobs]
+        session.close()
+        return job_ids
+
+    def run(self, resolution: str, fixtures: FixturePaths, count: int) -> dict:
+        from app.models import Job, JobStatus
+
+        job_ids = self.seed_jobs(resolution, fixtures, count)
+        timings = []
+        started = time.perf_counter()
+        for job_id in job_ids:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.worker.process_job({"job_id": job_id, "enqueued_at": time.time()})
+            timings.append((time.perf_counter() - start) * 1000)
+        elapsed = time.perf_counter() - started
+
+        session = self.SessionLocal()
+        jobs = session.query(Job).filter(Job.id.in_([uuid.UUID(job_id) for job_id in job_ids])).all()
+        failed = sum(1 for job in jobs if job.status != JobStatus.COMPLETED)
+        stage_runs = defaultdict(list)
+        for job in jobs:
+            for stage, elapsed_ms in (job.stage_timings or {}).items():
+                if stage != "queue_wait":
+                    stage_runs[stage].append(elapsed_ms)
+        session.close()
+
+        return summarize(
+            "worker.process_job",
+            resolution,
+            timings,
+            jobs=count,
+            failed=failed,
+            jobs_per_second=round(count / elapsed, 2),
+            stages=mean_stages(stage_runs),
+        )
+
+    def close(self):
+        self.worker.derivative_generator.shutdown()
+        self.worker.transfers.shutdown()
+        self.server.stop()
+
+
+def compare(results: list[dict], baseline_path: str, threshold: float) -> list[dict]:
+    """
+    Compare medians against a previous run
+
+    Returns:
+        Results whose median is more than threshold slower than the baseline
+    """
+    with open(baseline_path) as source:
+        baseline = {(r["name"], r["resolution"]): r for r in json.load(source)["results"]}
+
+    regressions = []
+    print(f"\n{'case':<48} {'res':>4} {'base p50':>10} {'p50':>10} {'change':>8}")
+    for result in results:
+        if "error" in result:
+            continue
+        previous = baseline.get((result["name"], result["resolution"]))
+        if previous is None or not previous.get("p50_ms"):
+            print(f"{result['name']:<48} {result['resolution']:>4} {'-':>10} {result['p50_ms']:>10} {'new':>8}")
+            continue
+        change = result["p50_ms"] / previous["p50_ms"] - 1
+        marker = ""
+        if change > threshold:
+            marker = "  🐢 slower"
+            regressions.append({**result, "baseline_p50_ms": previous["p50_ms"], "change": round(change, 3)})
+        elif change < -threshold:
+            marker = "  ⚡ faster"
+        print(
+            f"{result['name']:<48} {result['resolution']:>4} {previous['p50_ms']:>10} "
+            f"{result['p50_ms']:>10} {change:>+8.1%}{marker}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", default="masks,local,production", help=f"Comma-separated: {','.join(GROUPS)}")
+    parser.add_argument("--resolutions", default="sd,hd", help=f"Comma-separated: {','.join(RESOLUTIONS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per case")
+    parser.add_argument("--jobs", type=int, default=10, help="Jobs per resolution for the worker group")
+    parser.add_argument("--batch-size", type=int, default=4, help="Pairs per run_batch batch for the batch group")
+    parser.add_argument("--worker-pipeline", choices=("local", "production"), default="local")
+    parser.add_argument("--stub-delay-ms", type=int, default=0, help="Simulated model time per stub command")
+    parser.add_argument("--port", type=int, default=5056, help="moto S3 port for the worker group")
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    parser.add_argument("--compare", dest="baseline_path", help="Previous results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed median slowdown (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    groups = [group.strip() for group in args.groups.split(",") if group.strip()]
+    resolutions = [name.strip() for name in args.resolutions.split(",") if name.strip()]
+    for name in groups:
+        if name not in GROUPS:
+            parser.error(f"unknown group: {name}")
+    for name in resolutions:
+        if name not in RESOLUTIONS:
+            parser.error(f"unknown resolution: {name}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        fixtures = {
+            name: write_fixtures(os.path.join(work_dir, name), *RESOLUTIONS[name])
+            for name in resolutions
+        }
+        harness = None
+        if "worker" in groups:
+            # The moto server logs every request through werkzeug
+            logging.getLogger("werkzeug").setLevel(logging.ERROR)
+            try:
+                harness = WorkerHarness(work_dir, args.port, args.worker_pipeline, args.stub_delay_ms)
+            except Exception as e:
+                print(f"  ⚠️  worker harness failed to start: {e}")
+                results.append({"name": "worker", "resolution": "all", "error": f"{type(e).__name__}: {e}"})
+        try:
+            for resolution in resolutions:
+                print(f"📐 {resolution} {RESOLUTIONS[resolution][0]}x{RESOLUTIONS[resolution][1]}")
+                paths = fixtures[resolution]
+                cases = {
+                    "masks": lambda: bench_masks(resolution, args.repeat, args.warmup),
+                    "local": lambda: bench_local(resolution, paths, work_dir, args.repeat, args.warmup),
+                    "production": lambda: bench_production(
+                        resolution, paths, work_dir, args.repeat, args.warmup, args.stub_delay_ms
+                    ),
+                    "batch": lambda: bench_batch(resolution, paths, args.repeat, args.warmup, args.batch_size),
+                    "worker": lambda: [harness.run(resolution, paths, args.jobs)],
+                }
+                for group in groups:
+                    if group == "worker" and harness is None:
+                        continue
+                    results += run_group(group, resolution, cases[group])
+        finally:
+            if harness is not None:
+                harness.close()
+
+    print(f"\n{'case':<48} {'res':>4} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['name']:<48} {result['resolution']:>4} ❌ {result['error']}")
+            continue
+        print(
+            f"{result['name']:<48} {result['resolution']:>4} {result['mean_ms']:>10} "
+            f"{result['p50_ms']:>10} {result['p95_ms']:>10}"
+        )
+        if "pairs_per_second" in result:
+            print(f"{'':<4}⚡ {result['pairs_per_second']} pairs/s")
+        if "jobs_per_second" in result:
+            print(f"{'':<4}⚡ {result['jobs_per_second']} jobs/s, {result['failed']} failed")
+        if result.get("stages"):
+            print(f"{'':<4}📊 {result['stages']}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as output:
+            json.dump({
+                "benchmark": "pipeline_stages",
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "settings": {"repeat": args.repeat, "warmup": args.warmup, "stub_delay_ms": args.stub_delay_ms},
+                "results": results,
+            }, output, indent=2)
+
+    if args.baseline_path:
+        regressions = compare(results, args.baseline_path, args.threshold)
+        if regressions:
+            print(f"\n🐢 {len(regressions)} case(s) more than {args.threshold:.0%} slower than the baseline")
+            sys.exit(1)
+        print(f"\n✅ No case more than {args.threshold:.0%} slower than the baseline")
+
+
+if __name__ == "__main__":
+    main()
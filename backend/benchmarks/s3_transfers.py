@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Worker S3 transfers: sequential default client vs S3TransferManager
+
+Starts moto's S3 server on localhost as a stand-in for S3 and replays the
+worker's I/O for --jobs jobs: download a person and a garment image, then
+upload three result derivatives. The baseline does this one object at a
+time with a default boto3 client (what the worker used to do); the tuned
+path uses S3TransferManager's pooled client and concurrent transfers, both
+to temp files and in memory.
+
+moto answers from memory, so this measures client-side overhead
+(connection reuse, serialization of requests) rather than network latency;
+use --latency-ms to add a per-request delay that makes overlap visible.
+
+Usage:
+    pip install "moto[server]"
+    python benchmarks/s3_transfers.py --jobs 20 --latency-ms 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import boto3
+from moto.server import ThreadedMotoServer
+
+from app.services.s3_transfer import S3TransferManager
+
+from stats import percentile
+
+BUCKET = "bench-bucket"
+REGION = "us-east-1"
+CREDENTIALS = {"aws_access_key_id": "bench", "aws_secret_access_key": "bench"}
+
+
+def add_latency(client, latency_ms: int):
+    """Delay every request, roughly emulating a round trip to S3."""
+    if latency_ms <= 0:
+        return
+
+    def delay(**kwargs):
+        time.sleep(latency_ms / 1000)
+
+    client.meta.events.register("before-send.s3", delay)
+
+
+def seed_inputs(endpoint: str, jobs: int, input_kb: int) -> list[tuple[str, str]]:
+    client = boto3.client("s3", region_name=REGION, endpoint_url=endpoint, **CREDENTIALS)
+    client.create_bucket(Bucket=BUCKET)
+    payload = os.urandom(input_kb * 1024)
+    pairs = []
+    for job in range(jobs):
+        user_key = f"uploads/bench/{job}/user.jpg"
+        garment_key = f"uploads/bench/{job}/garment.jpg"
+        client.put_object(Bucket=BUCKET, Key=user_key, Body=payload)
+        client.put_object(Bucket=BUCKET, Key=garment_key, Body=payload)
+        pairs.append((user_key, garment_key))
+    return pairs
+
+
+def derivatives(result_kb: int) -> list[tuple[str, bytes, str]]:
+    return [
+        ("thumbnail.webp", os.urandom(20 * 1024), "image/webp"),
+        ("preview.webp", os.urandom(result_kb * 1024 // 3), "image/webp"),
+        ("full.webp", os.urandom(result_kb * 1024), "image/webp"),
+    ]
+
+
+def run_baseline(endpoint: str, pairs, outputs, latency_ms: int, temp_dir: str) -> list[float]:
+    client = boto3.client("s3", region_name=REGION, endpoint_url=endpoint, **CREDENTIALS)
+    add_latency(client, latency_ms)
+    timings = []
+    for job, (user_key, garment_key) in enumerate(pairs):
+        start = time.perf_counter()
+        client.download_file(BUCKET, user_key, os.path.join(temp_dir, f"{job}_user.jpg"))
+        client.download_file(BUCKET, garment_key, os.path.join(temp_dir, f"{job}_garment.jpg"))
+        for name, data, content_type in outputs:
+            client.put_object(
+                Bucket=BUCKET, Key=f"results/baseline/{job}/{name}", Body=data, ContentType=content_type
+            )
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run_manager(endpoint: str, pairs, outputs, latency_ms: int, temp_dir: str, in_memory: bool) -> list[float]:
+    transfers = S3TransferManager(BUCKET, region=REGION, endpoint_url=endpoint, **CREDENTIALS)
+    add_latency(transfers.client, latency_ms)
+    timings = []
+    for job, keys in enumerate(pairs):
+        start = time.perf_counter()
+        local_paths = None if in_memory else [
+            os.path.join(temp_dir, f"{job}_user.jpg"),
+            os.path.join(temp_dir, f"{job}_garment.jpg"),
+        ]
+        transfers.download_many(keys, local_paths)
+        transfers.upload_many((f"results/manager/{job}/{name}", data, content_type) for name, data, content_type in outputs)
+        timings.append((time.perf_counter() - start) * 1000)
+    transfers.shutdown()
+    return timings
+
+
+def summarize(name: str, timings: list[float]) -> dict:
+    return {
+        "name": name,
+        "jobs": len(timings),
+        "mean_ms": round(statistics.mean(timings), 2),
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--input-kb", type=int, default=1500, help="Size of each input image")
+    parser.add_argument("--result-kb", type=int, default=600, help="Size of the full-resolution result")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Added per-request latency")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    args = parser.parse_args()
+
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=args.port, verbose=False)
+    server.start()
+    endpoint = f"http://127.0.0.1:{args.port}"
+
+    try:
+        pairs = seed_inputs(endpoint, args.jobs, args.input_kb)
+        outputs = derivatives(args.result_kb)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results = [
+                summarize("sequential", run_baseline(endpoint, pairs, outputs, args.latency_ms, temp_dir)),
+                summarize("manager", run_manager(endpoint, pairs, outputs, args.latency_ms, temp_dir, False)),
+                summarize("manager_in_memory", run_manager(endpoint, pairs, outputs, args.latency_ms, temp_dir, True)),
+            ]
+    finally:
+        server.stop()
+
+    print(f"\n{'transfer':<20} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for result in results:
+        print(f"{result['name']:<20} {result['mean_ms']:>9} {result['p50_ms']:>9} {result['p95_ms']:>9}")
+    print(f"\n⚡ Per-job speedup: {results[0]['mean_ms'] / results[1]['mean_ms']:.1f}x")
+
+    if args.json_path:
+        with open(args.json_path, "w") as output:
+            json.dump({"benchmark": "s3_transfers", "results": results}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
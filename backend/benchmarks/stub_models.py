@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Stub SCHP, pose and VTON commands for benchmarking ProductionTryonPipeline
+
+Each subcommand reads and writes files the way the real model commands do.
+It produces deterministic output and can add a fixed delay to stand in for
+model time. The pipeline is pointed at these through its usual command
+templates:
+
+    SCHP_LABELMAP_COMMAND_TEMPLATE="python stub_models.py schp {person_image} {output_labelmap}"
+    POSE_MAP_COMMAND_TEMPLATE="python stub_models.py pose {person_image} {output_pose}"
+    VTON_COMMAND_TEMPLATE="python stub_models.py vton {person_agnostic} {garment_image} {edit_mask} {output_path}"
+"""
+import argparse
+import time
+
+import numpy as np
+from PIL import Image
+
+from fixtures import LEFT_ARM, RIGHT_ARM, UPPER_CLOTHES, synthetic_label_map
+
+
+def schp(person_image: str, output_labelmap: str):
+    width, height = Image.open(person_image).size
+    Image.fromarray(synthetic_label_map(width, height)).save(output_labelmap)
+
+
+def pose(person_image: str, output_pose: str):
+    width, height = Image.open(person_image).size
+    labels = synthetic_label_map(width, height)
+    body = np.isin(labels, [UPPER_CLOTHES, LEFT_ARM, RIGHT_ARM])
+    Image.fromarray(body.astype(np.uint8) * 255).save(output_pose)
+
+
+def vton(person_agnostic: str, garment_image: str, edit_mask: str, output_path: str):
+    person = np.array(Image.open(person_agnostic).convert("RGB"), dtype=np.float32)
+    size = (person.shape[1], person.shape[0])
+    garment = np.array(Image.open(garment_image).convert("RGB").resize(size), dtype=np.float32)
+    mask = np.array(Image.open(edit_mask).convert("L").resize(size), dtype=np.float32)[..., None] / 255
+    blended = person * (1 - mask) + garment * mask
+    Image.fromarray(blended.astype(np.uint8)).save(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay-ms", type=int, default=0, help="Simulated model time")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("schp").add_argument("paths", nargs=2)
+    commands.add_parser("pose").add_argument("paths", nargs=2)
+    commands.add_parser("vton").add_argument("paths", nargs=4)
+    args = parser.parse_args()
+
+    if args.delay_ms:
+        time.sleep(args.delay_ms / 1000)
+    {"schp": schp, "pose": pose, "vton": vton}[args.command](*args.paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Model residency for the in-process try-on pipeline
+
+Stage models (human parser, pose estimator, diffusion try-on, upscaler) are
+loaded the first time a stage needs them and then stay resident while they
+fit in a memory budget. When a load would exceed the budget, the least
+recently used models are evicted first. Loads, evictions, load times and
+resident bytes are exported as Prometheus metrics, and registry lookups are
+counted as the "model" cache.
+
+torch is not imported here. A model's size is measured from its parameters
+and buffers when it is a torch module (or from ``nbytes`` for arrays), and
+the registered estimate is used until then.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+import gc
+import sys
+import threading
+import time
+
+from app.utils.metrics import (
+    MODEL_EVICTIONS,
+    MODEL_LOAD_SECONDS,
+    MODEL_LOADS,
+    MODEL_RESIDENT_BYTES,
+    record_cache,
+)
+
+MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """How to load one model, and its expected size before it is measured."""
+    name: str
+    loader: Callable[[], Any]
+    size_bytes: int = 0
+
+
+def model_nbytes(model) -> int:
+    """
+    Memory held by a model
+
+    Sums parameters and buffers of torch modules; falls back to ``nbytes``
+    (numpy arrays, tensors).
+
+    Returns:
+        Size in bytes, or 0 if it cannot be measured
+    """
+    total = 0
+    for attribute in ("parameters", "buffers"):
+        tensors = getattr(model, attribute, None)
+        if callable(tensors):
+            total += sum(t.numel() * t.element_size() for t in tensors())
+    if not total:
+        total = getattr(model, "nbytes", 0) or 0
+    return int(total)
+
+
+def _release_memory() -> None:
+    """Return freed memory to the device after an eviction."""
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class ModelRegistry:
+    """
+    Lazily loaded models kept resident under a memory budget (LRU)
+
+    Usage:
+        registry = ModelRegistry(budget_bytes=8 * 1024 ** 3)
+        registry.register("schp", load_schp, size_bytes=300 * MB)
+        registry.warm_up()
+        model = registry.get("schp")
+
+    Loads happen under the registry lock, so concurrent callers never load
+    the same model twice.
+    """
+
+    def __init__(self, budget_bytes: int = 0):
+        """
+        Args:
+            budget_bytes: Memory the resident models may use (0 = unlimited)
+        """
+        self.budget_bytes = budget_bytes
+        self._specs: dict[str, ModelSpec] = {}
+        # name -> (model, bytes), least recently used first
+        self._resident: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+        self.loads = 0
+        self.evictions = 0
+
+    def register(self, name: str, loader: Callable[[], Any], size_bytes: int = 0) -> None:
+        """
+        Register how to load a model
+
+        Args:
+            name: Model name (the pipeline stage that uses it)
+            loader: Returns the loaded model, already on its device
+            size_bytes: Expected size; used until the loaded model is measured
+        """
+        with self._lock:
+            self._specs[name] = ModelSpec(name, loader, size_bytes)
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._specs)
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(size for _, size in self._resident.values())
+
+    def resident(self) -> dict[str, int]:
+        """Resident models and their sizes, least recently used first."""
+        with self._lock:
+            return {name: size for name, (_, size) in self._resident.items()}
+
+    def is_resident(self, name: str) -> bool:
+        with self._lock:
+            return name in self._resident
+
+    def get(self, name: str) -> Any:
+        """
+        A model, loaded (and other models evicted) if needed
+
+        Raises:
+            KeyError: If no model is registered under name
+        """
+        with self._lock:
+            entry = self._resident.get(name)
+            if entry is not None:
+                self._resident.move_to_end(name)
+                record_cache("model", True)
+                return entry[0]
+
+            record_cache("model", False)
+            return self._load(self._specs[name])
+
+    def _load(self, spec: ModelSpec) -> Any:
+        self._make_room(spec.size_bytes)
+
+        start = time.perf_counter()
+        model = spec.loader()
+        elapsed = time.perf_counter() - start
+        size = model_nbytes(model) or spec.size_bytes
+
+        self._resident[spec.name] = (model, size)
+        self.loads += 1
+        MODEL_LOADS.labels(model=spec.name).inc()
+        MODEL_LOAD_SECONDS.labels(model=spec.name).observe(elapsed)
+        MODEL_RESIDENT_BYTES.labels(model=spec.name).set(size)
+        print(f"📦 Loaded {spec.name} ({size / MB:.0f} MB, {elapsed:.1f}s)")
+
+        # The estimate may have been low; evict others until the real size fits
+        self._make_room(0, keep=spec.name)
+        if self.budget_bytes and size > self.budget_bytes:
+            print(f"⚠️  Model {spec.name} ({size / MB:.0f} MB) is larger than the whole budget")
+        return model
+
+    def _make_room(self, needed_bytes: int, keep: Optional[str] = None) -> None:
+        if not self.budget_bytes:
+            return
+        while self._resident and self.resident_bytes + needed_bytes > self.budget_bytes:
+            victim = next((name for name in self._resident if name != keep), None)
+            if victim is None:
+                return
+            self._evict(victim)
+
+    def _evict(self, name: str) -> None:
+        _, size = self._resident.pop(name)
+        self.evictions += 1
+        MODEL_EVICTIONS.labels(model=name).inc()
+        MODEL_RESIDENT_BYTES.labels(model=name).set(0)
+        print(f"♻️  Evicted {name} ({size / MB:.0f} MB)")
+        _release_memory()
+
+    def evict(self, name: str) -> bool:
+        """Unload a model; returns False if it was not resident."""
+        with self._lock:
+            if name not in self._resident:
+                return False
+            self._evict(name)
+            return True
+
+    def clear(self) -> None:
+        """Unload every model."""
+        with self._lock:
+            for name in list(self._resident):
+                self._evict(name)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> list[str]:
+        """
+        Load models before the first job
+
+        Loads in the given order (default: registration order) and skips
+        models whose expected size would push an already warmed model out of
+        the budget; those are loaded on first use instead.
+
+        Returns:
+            Names of the models resident afterwards
+        """
+        names = list(names) if names is not None else self.names
+        with self._lock:
+            for name in names:
+                if name in self._resident:
+                    continue
+                spec = self._specs[name]
+                if self.budget_bytes and self.resident_bytes + spec.size_bytes > self.budget_bytes:
+                    print(f"⏭️  Not warming {name}: {spec.size_bytes / MB:.0f} MB does not fit the budget")
+                    continue
+                self._load(spec)
+            return list(self._resident)
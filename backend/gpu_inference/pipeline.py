@@ -1,14 +1,52 @@
 """
 AI Virtual Try-On Pipeline
 Orchestrates all AI models for realistic garment try-on
+
+torch is imported when the pipeline first runs, not when this module loads.
+Stage models are loaded on first use and kept resident under a memory budget
+by a ModelRegistry (see model_registry).
 """
-import torch
 import cv2
 import numpy as np
 from PIL import Image
-from typing import Tuple
+from typing import Iterable, Iterator, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+import os
+import sys
 import time
 
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_registry import MB, ModelRegistry
+
+# Expected model sizes, used for the budget until a loaded model is measured
+MODEL_SIZE_ESTIMATES_MB = {
+    "schp": 270,
+    "pose": 210,
+    "vton": 6800,
+    "upscale": 70,
+}
+
+
+@contextmanager
+def _untimed(name: str):
+    yield
+
+
+def _resize_upscale(image: np.ndarray, scale: int) -> np.ndarray:
+    """Placeholder upscaler shared by run and run_batch, so both give the same pixels."""
+    h, w = image.shape[:2]
+    return cv2.resize(image, (w * scale, h * scale), interpolation=cv2.INTER_CUBIC)
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
 
 class VirtualTryonPipeline:
     """
@@ -22,49 +60,48 @@ class VirtualTryonPipeline:
     5. Refinement (RealESRGAN) - Upscale to HD
     """
     
-    def __init__(self, device="cuda"):
+    def __init__(self, device="cuda", memory_budget_mb: int = 0, registry: ModelRegistry = None):
         """
         Initialize AI pipeline
         
         Args:
             device: torch device ("cuda" or "cpu")
+            memory_budget_mb: Memory the resident stage models may use (0 = unlimited)
+            registry: Registry to load models into (a new one by default)
         """
         self.device = device
         print(f"🔧 Initializing AI pipeline on {device}...")
         
-        # Load models (lazy loading in production)
-        self.schp_model = None
-        self.pose_model = None
-        self.tryon_model = None
-        self.upscaler_model = None
+        # Models are loaded lazily by the stages that use them
+        self.models = registry or ModelRegistry(budget_bytes=memory_budget_mb * MB)
+        for name, loader in (
+            ("schp", self._load_schp),
+            ("pose", self._load_pose_estimator),
+            ("vton", self._load_idm_vton),
+            ("upscale", self._load_realesrgan),
+        ):
+            self.models.register(name, loader, size_bytes=MODEL_SIZE_ESTIMATES_MB[name] * MB)
         
         print("✅ AI pipeline initialized")
     
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> list[str]:
+        """
+        Load stage models before the first job
+        
+        Args:
+            names: Models to load, in order (default: all, in stage order)
+        
+        Returns:
+            Names of the resident models
+        """
+        print("🔥 Warming up models...")
+        resident = self.models.warm_up(names)
+        print(f"✅ Resident models: {', '.join(resident) or 'none'} ({self.models.resident_bytes / MB:.0f} MB)")
+        return resident
+    
     def load_models(self):
-        """Load all AI models into memory"""
-        if self.schp_model is None:
-            print("📦 Loading SCHP (human parsing)...")
-            # self.schp_model = self._load_schp()
-            # Placeholder - actual implementation would load from checkpoint
-            print("✅ SCHP loaded")
-        
-        if self.pose_model is None:
-            print("📦 Loading Pose Estimation...")
-            # self.pose_model = self._load_pose_estimator()
-            # Placeholder - actual implementation
-            print("✅ Pose model loaded")
-        
-        if self.tryon_model is None:
-            print("📦 Loading IDM-VTON (diffusion try-on)...")
-            # self.tryon_model = self._load_idm_vton()
-            # Placeholder - actual implementation
-            print("✅ IDM-VTON loaded")
-        
-        if self.upscaler_model is None:
-            print("📦 Loading RealESRGAN (upscaler)...")
-            # self.upscaler_model = self._load_realesrgan()
-            # Placeholder - actual implementation
-            print("✅ RealESRGAN loaded")
+        """Load all AI models into memory (models that fit the budget)"""
+        return self.warm_up()
     
     def _load_schp(self):
         """Load SCHP model for human parsing"""
@@ -127,10 +164,10 @@ class VirtualTryonPipeline:
         """
         print("  📍 Stage 1: Human parsing...")
         start_time = time.time()
+        self.models.get("schp")
         
         # TODO: Implement actual SCHP inference
-        # with torch.no_grad():
-        #     mask = self.schp_model.predict(image)
+        # mask = self.models.get("schp").predict(image)
         
         # Placeholder: return dummy mask
         mask = np.zeros((image.shape[0], image.shape[1]), dtype=np.uint8)
@@ -152,9 +189,10 @@ class VirtualTryonPipeline:
         """
         print("  📍 Stage 2: Pose estimation...")
         start_time = time.time()
+        self.models.get("pose")
         
         # TODO: Implement actual pose estimation
-        # keypoints = self.pose_model.detect(image)
+        # keypoints = self.models.get("pose").detect(image)
         
         # Placeholder: return dummy keypoints
         keypoints = np.zeros((18, 3), dtype=np.float32)
@@ -220,9 +258,10 @@ class VirtualTryonPipeline:
         """
         print(f"  📍 Stage 4: Diffusion try-on ({num_steps} steps)...")
         start_time = time.time()
+        self.models.get("vton")
         
         # TODO: Implement actual IDM-VTON inference
-        # result = self.tryon_model(
+        # result = self.models.get("vton")(
         #     image=person_img,
         #     garment=garment_img,
         #     pose=pose,
@@ -252,25 +291,82 @@ class VirtualTryonPipeline:
         """
         print(f"  📍 Stage 5: Upscaling ({scale}x)...")
         start_time = time.time()
+        self.models.get("upscale")
         
         # TODO: Implement actual RealESRGAN inference
-        # upscaled = self.upscaler_model.enhance(image, outscale=scale)
+        # upscaled = self.models.get("upscale").enhance(image, outscale=scale)
         
         # Placeholder: simple resize
-        h, w = image.shape[:2]
-        upscaled = cv2.resize(image, (w * scale, h * scale), interpolation=cv2.INTER_CUBIC)
+        upscaled = _resize_upscale(image, scale)
         
         elapsed = (time.time() - start_time) * 1000
         print(f"  ✅ Upscaling complete ({elapsed:.0f}ms)")
         
         return upscaled
     
-    @torch.inference_mode()
+    # Batched stages: (N, H, W, C) uint8 tensors on self.device. Each one
+    # gets its model from the registry, so batches load models like run does.
+    
+    def parse_human_batch(self, persons):
+        """
+        Stage 1 over a batch
+        
+        Returns:
+            (N, H, W) uint8 segmentation masks
+        """
+        self.models.get("schp")
+        return persons.new_zeros(persons.shape[:3])
+    
+    def estimate_pose_batch(self, persons):
+        """
+        Stage 2 over a batch
+        
+        Returns:
+            (N, 18, 3) float keypoints - [x, y, confidence]
+        """
+        self.models.get("pose")
+        return persons.new_zeros((persons.shape[0], 18, 3)).float()
+    
+    def warp_garment_batch(self, garments, keypoints, masks):
+        """Stage 3 over a batch: garments aligned to each pose"""
+        return garments.clone()
+    
+    def diffusion_tryon_batch(self, persons, garments, keypoints, masks, num_steps: int = 20):
+        """
+        Stage 4 over a batch
+        
+        Returns:
+            (N, H, W, C) uint8 try-on results
+        """
+        self.models.get("vton")
+        
+        # Placeholder: simple blend (matches diffusion_tryon)
+        blended = (persons.float() + garments.float()) * 0.5
+        return blended.round().to(persons.dtype)
+    
+    def upscale_batch(self, images, scale: int = 2):
+        """
+        Stage 5 over a batch
+        
+        Returns:
+            (N, H * scale, W * scale, C) uint8 images
+        """
+        import torch
+        
+        self.models.get("upscale")
+        
+        # Placeholder: the same per-image resize as upscale_result
+        upscaled = np.stack([_resize_upscale(image, scale) for image in images.cpu().numpy()])
+        return torch.from_numpy(upscaled).to(images.device)
+    
     def run(
         self,
         person_img_path: str,
         garment_img_path: str,
-        num_diffusion_steps: int = 20
+        num_diffusion_steps: int = 20,
+        timer=None,
+        size: Tuple[int, int] = (512, 768),
+        upscale: int = 2
     ) -> np.ndarray:
         """
         Run complete virtual try-on pipeline
@@ -279,41 +375,63 @@ class VirtualTryonPipeline:
             person_img_path: Path to person image
             garment_img_path: Path to garment image
             num_diffusion_steps: Diffusion quality (20=fast, 30=balanced, 50=best)
+            timer: Optional StageTimer (app.utils.metrics) recording each stage
+            size: Model input size (width, height)
+            upscale: Upscale factor of the result (1 skips the upscaler)
         
         Returns:
             Final try-on result as numpy array
         """
+        import torch
+
+        with torch.inference_mode():
+            return self._run_stages(person_img_path, garment_img_path, num_diffusion_steps, timer, size, upscale)
+
+    def _run_stages(
+        self,
+        person_img_path: str,
+        garment_img_path: str,
+        num_diffusion_steps: int,
+        timer,
+        size: Tuple[int, int],
+        upscale: int
+    ) -> np.ndarray:
         print("\n🎨 Starting virtual try-on pipeline...")
         pipeline_start = time.time()
-        
-        # Load models if not already loaded
-        self.load_models()
+        stage = timer.stage if timer is not None else _untimed
         
         # Preprocess images
         print("📥 Loading images...")
-        person_img = self.preprocess_image(person_img_path, size=(512, 768))
-        garment_img = self.preprocess_image(garment_img_path, size=(512, 768))
+        person_img = self.preprocess_image(person_img_path, size=size)
+        garment_img = self.preprocess_image(garment_img_path, size=size)
         
         # Stage 1: Human parsing
-        mask = self.parse_human(person_img)
+        with stage("schp"):
+            mask = self.parse_human(person_img)
         
         # Stage 2: Pose estimation
-        pose = self.estimate_pose(person_img)
+        with stage("pose"):
+            pose = self.estimate_pose(person_img)
         
         # Stage 3: Garment warping
-        warped_garment = self.warp_garment(garment_img, pose, mask)
+        with stage("warp"):
+            warped_garment = self.warp_garment(garment_img, pose, mask)
         
         # Stage 4: Diffusion try-on
-        tryon_result = self.diffusion_tryon(
-            person_img,
-            warped_garment,
-            pose,
-            mask,
-            num_steps=num_diffusion_steps
-        )
+        with stage("vton"):
+            tryon_result = self.diffusion_tryon(
+                person_img,
+                warped_garment,
+                pose,
+                mask,
+                num_steps=num_diffusion_steps
+            )
         
         # Stage 5: Upscale to HD
-        final_result = self.upscale_result(tryon_result, scale=2)
+        final_result = tryon_result
+        if upscale > 1:
+            with stage("upscale"):
+                final_result = self.upscale_result(tryon_result, scale=upscale)
         
         # Calculate total time
         total_time = (time.time() - pipeline_start) * 1000
@@ -321,6 +439,78 @@ class VirtualTryonPipeline:
         
         return final_result
     
+    def run_batch(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        batch_size: int = 4,
+        num_diffusion_steps: int = 20,
+        decode_workers: int = 4,
+        size: Tuple[int, int] = (512, 768),
+        upscale: int = 2,
+        timer=None
+    ) -> Iterator[np.ndarray]:
+        """
+        Run the pipeline over many person/garment pairs
+        
+        Inputs are decoded in a thread pool, and the next batch is decoded
+        while the current one runs. Each stage processes a whole batch as one
+        (N, H, W, C) tensor on self.device. Results are yielded one at a time
+        in input order, each as its own array (not a view of the batch), so
+        at most two batches of inputs and one batch of results are held in
+        memory and callers may keep or modify results independently.
+        
+        Args:
+            pairs: (person image, garment image) paths or file objects
+            batch_size: Pairs per batch
+            num_diffusion_steps: Diffusion quality (20=fast, 30=balanced, 50=best)
+            decode_workers: Threads decoding input images
+            size: Model input size (width, height)
+            upscale: Upscale factor of the results (1 skips the upscaler)
+            timer: Optional StageTimer; stage times add up over batches
+        
+        Yields:
+            (H, W, C) uint8 try-on result per pair
+        """
+        import torch
+        
+        stage = timer.stage if timer is not None else _untimed
+        batches = _chunked(pairs, batch_size)
+        
+        with ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix="tryon-decode") as executor:
+            def decode(batch):
+                return [executor.submit(self.preprocess_image, path, size) for pair in batch for path in pair]
+            
+            pending = decode(next(batches, []))
+            while pending:
+                images = [future.result() for future in pending]
+                pending = decode(next(batches, []))
+                
+                batch_start = time.time()
+                with torch.inference_mode():
+                    persons = torch.from_numpy(np.stack(images[0::2])).to(self.device)
+                    garments = torch.from_numpy(np.stack(images[1::2])).to(self.device)
+                    del images
+                    
+                    with stage("schp"):
+                        masks = self.parse_human_batch(persons)
+                    with stage("pose"):
+                        keypoints = self.estimate_pose_batch(persons)
+                    with stage("warp"):
+                        warped = self.warp_garment_batch(garments, keypoints, masks)
+                    with stage("vton"):
+                        tryon = self.diffusion_tryon_batch(persons, warped, keypoints, masks, num_steps=num_diffusion_steps)
+                    if upscale > 1:
+                        with stage("upscale"):
+                            tryon = self.upscale_batch(tryon, scale=upscale)
+                    results = tryon.cpu().numpy()
+                    del persons, garments, masks, keypoints, warped, tryon
+                
+                elapsed = (time.time() - batch_start) * 1000
+                print(f"✨ Batch of {len(results)} complete ({elapsed:.0f}ms)")
+                for result in results:
+                    yield result.copy()
+                del results
+    
     def save_result(self, image: np.ndarray, output_path: str):
         """Save result image to file"""
         img_pil = Image.fromarray(image)
@@ -330,6 +520,8 @@ class VirtualTryonPipeline:
 
 # Example usage
 if __name__ == "__main__":
+    import torch
+
     # Initialize pipeline
     pipeline = VirtualTryonPipeline(device="cuda" if torch.cuda.is_available() else "cpu")
     
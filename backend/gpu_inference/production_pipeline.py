@@ -5,6 +5,7 @@ from __future__ import annotations
 
 import os
 import tempfile
+from contextlib import contextmanager
 from pathlib import Path
 import subprocess
 
@@ -23,6 +24,11 @@ from mask_utils import (
 from vton_adapter import VtonInputPaths, build_vton_adapter
 
 
+@contextmanager
+def _untimed(name: str):
+    yield
+
+
 class ProductionTryonPipeline:
     """
     Implements a correct virtual try-on preprocessing + synthesis flow.
@@ -31,11 +37,16 @@ class ProductionTryonPipeline:
     - SCHP parser callable
     - Pose estimator callable
     - VTON backend command (IDM-VTON/CatVTON)
+
+    Optional:
+    - Upscaler command (e.g. RealESRGAN); without it upscaled tiers are
+      resized with bicubic interpolation
     """
 
     def __init__(self):
         self.schp_command_template = os.getenv("SCHP_LABELMAP_COMMAND_TEMPLATE", "").strip()
         self.pose_command_template = os.getenv("POSE_MAP_COMMAND_TEMPLATE", "").strip()
+        self.upscale_command_template = os.getenv("UPSCALE_COMMAND_TEMPLATE", "").strip()
         if not self.schp_command_template:
             raise RuntimeError("SCHP_LABELMAP_COMMAND_TEMPLATE is required in production mode")
         if not self.pose_command_template:
@@ -114,23 +125,131 @@ class ProductionTryonPipeline:
             pose = np.array(Image.open(pose_path).convert("L"))
             return (pose > 0).astype(np.uint8)
 
-    def run(self, person_image_path: str, garment_image_path: str, output_path: str) -> str:
+    def _run_upscale(self, image_rgb: np.ndarray, scale: int) -> np.ndarray:
+        """
+        Upscale the generated image by scale.
+
+        Uses UPSCALE_COMMAND_TEMPLATE when set, with placeholders:
+        - {input_image}
+        - {output_image}
+        - {scale}
+        """
+        if not self.upscale_command_template:
+            height, width = image_rgb.shape[:2]
+            return cv2.resize(image_rgb, (width * scale, height * scale), interpolation=cv2.INTER_CUBIC)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_path = str(Path(temp_dir) / "input.png")
+            output_path = str(Path(temp_dir) / "upscaled.png")
+            self._save_rgb(image_rgb, input_path)
+
+            command = self.upscale_command_template.format(
+                input_image=input_path, output_image=output_path, scale=scale
+            )
+            result = subprocess.run(command, shell=True, capture_output=True, text=True, check=False)
+            if result.returncode != 0 or not Path(output_path).exists():
+                raise RuntimeError(
+                    "Upscale command failed. "
+                    f"exit={result.returncode} stdout={result.stdout} stderr={result.stderr}"
+                )
+            return np.array(Image.open(output_path).convert("RGB"))
+
+    @staticmethod
+    def _output_edge(original_edge: int, working_size: tuple[int, int], upscale: int, max_output_edge: int | None) -> int:
+        """Longest edge of the result: the person photo's, raised to working size x upscale, capped at max_output_edge."""
+        edge = original_edge
+        if upscale > 1:
+            edge = max(edge, max(working_size) * upscale)
+        if max_output_edge:
+            edge = min(edge, max_output_edge)
+        return edge
+
+    def _protect(self, person_rgb, generated_path: str, masks: TryonMasks) -> np.ndarray:
+        """Face-protect the generated image at working resolution."""
+        working_h, working_w = person_rgb.shape[:2]
+        generated_rgb = np.array(Image.open(generated_path).convert("RGB").resize((working_w, working_h)))
+        safe_output = build_face_protected_output(person_rgb, generated_rgb, masks)
+        validate_output_constraints(person_rgb, safe_output, masks)
+        return safe_output
+
+    def _composite(self, safe_output, person_original_rgb, masks: TryonMasks, output_path: str):
+        """Write the face-protected image at the output resolution."""
+        original_h, original_w = person_original_rgb.shape[:2]
+
+        output_rgb = np.array(
+            Image.fromarray(safe_output).resize((original_w, original_h), Image.Resampling.LANCZOS)
+        )
+        face_hair_full = np.array(
+            Image.fromarray((masks.face_hair * 255).astype(np.uint8)).resize(
+                (original_w, original_h), Image.Resampling.NEAREST
+            )
+        ) > 0
+        output_rgb[face_hair_full] = person_original_rgb[face_hair_full]
+
+        if output_rgb.shape != person_original_rgb.shape:
+            raise ValueError(
+                f"Output shape mismatch: expected {person_original_rgb.shape}, got {output_rgb.shape}"
+            )
+        if np.any(face_hair_full):
+            if not np.array_equal(output_rgb[face_hair_full], person_original_rgb[face_hair_full]):
+                raise ValueError("Face/hair protection validation failed at original resolution")
+
+        self._save_rgb(output_rgb, output_path)
+
+    def run(
+        self,
+        person_image_path: str,
+        garment_image_path: str,
+        output_path: str,
+        timer=None,
+        working_size: tuple[int, int] = (768, 1024),
+        num_steps: int = 20,
+        upscale: int = 1,
+        max_output_edge: int | None = None,
+    ) -> str:
+        """
+        Run the pipeline and write the result to output_path.
+
+        timer: optional StageTimer (app.utils.metrics); each stage runs inside
+        ``timer.stage(name)`` so its duration is recorded.
+
+        working_size, num_steps, upscale and max_output_edge come from the
+        job's quality tier: the models run at working_size (width, height),
+        the VTON command gets num_steps, and the generated image is upscaled
+        by upscale. The result keeps the person image's resolution, raised to
+        at least working size x upscale and capped at max_output_edge.
+        """
+        stage = timer.stage if timer is not None else _untimed
+
         if not Path(person_image_path).exists():
             raise RuntimeError(f"Person image missing: {person_image_path}")
         if not Path(garment_image_path).exists():
             raise RuntimeError(f"Garment image missing: {garment_image_path}")
 
         person_original_rgb = self._load_original_rgb(person_image_path)
-        original_h, original_w = person_original_rgb.shape[:2]
-        person_rgb = self._load_rgb(person_image_path)
-        garment_rgb = self._load_rgb(garment_image_path)
+        original_edge = max(person_original_rgb.shape[:2])
+        output_edge = self._output_edge(original_edge, working_size, upscale, max_output_edge)
+        if output_edge != original_edge:
+            scale = output_edge / original_edge
+            height, width = person_original_rgb.shape[:2]
+            person_original_rgb = np.array(
+                Image.fromarray(person_original_rgb).resize(
+                    (max(1, round(width * scale)), max(1, round(height * scale))), Image.Resampling.LANCZOS
+                )
+            )
+        person_rgb = self._load_rgb(person_image_path, working_size)
+        garment_rgb = self._load_rgb(garment_image_path, working_size)
 
-        schp_labels = self._run_schp(person_rgb)
-        masks: TryonMasks = extract_tryon_masks(schp_labels)
+        with stage("schp"):
+            schp_labels = self._run_schp(person_rgb)
 
-        agnostic_person = build_agnostic_person(person_rgb, masks)
-        cloth_mask = preprocess_garment_mask(garment_rgb)
-        pose_mask = self._run_pose(person_rgb)
+        with stage("agnostic"):
+            masks: TryonMasks = extract_tryon_masks(schp_labels)
+            agnostic_person = build_agnostic_person(person_rgb, masks)
+            cloth_mask = preprocess_garment_mask(garment_rgb)
+
+        with stage("pose"):
+            pose_mask = self._run_pose(person_rgb)
 
         with tempfile.TemporaryDirectory() as temp_dir:
             agnostic_path = str(Path(temp_dir) / "agnostic.png")
@@ -140,49 +259,39 @@ class ProductionTryonPipeline:
             edit_mask_path = str(Path(temp_dir) / "edit_mask.png")
             generated_path = str(Path(temp_dir) / "generated.png")
 
-            self._save_rgb(agnostic_person, agnostic_path)
-            self._save_rgb(garment_rgb, garment_path)
-            self._save_mask(cloth_mask, cloth_mask_path)
-            self._save_mask(pose_mask, pose_path)
-            self._save_mask(masks.editable, edit_mask_path)
-
-            self.vton_adapter.generate(
-                VtonInputPaths(
-                    person_agnostic=agnostic_path,
-                    garment_image=garment_path,
-                    garment_mask=cloth_mask_path,
-                    pose_map=pose_path,
-                    edit_mask=edit_mask_path,
-                    output_path=generated_path,
+            with stage("vton"):
+                self._save_rgb(agnostic_person, agnostic_path)
+                self._save_rgb(garment_rgb, garment_path)
+                self._save_mask(cloth_mask, cloth_mask_path)
+                self._save_mask(pose_mask, pose_path)
+                self._save_mask(masks.editable, edit_mask_path)
+
+                self.vton_adapter.generate(
+                    VtonInputPaths(
+                        person_agnostic=agnostic_path,
+                        garment_image=garment_path,
+                        garment_mask=cloth_mask_path,
+                        pose_map=pose_path,
+                        edit_mask=edit_mask_path,
+                        output_path=generated_path,
+                        num_steps=num_steps,
+                        width=working_size[0],
+                        height=working_size[1],
+                    )
                 )
-            )
 
             if not Path(generated_path).exists():
                 raise RuntimeError(f"VTON did not create output image: {generated_path}")
 
-            generated_rgb = np.array(Image.open(generated_path).convert("RGB").resize((768, 1024)))
-            safe_output = build_face_protected_output(person_rgb, generated_rgb, masks)
-            validate_output_constraints(person_rgb, safe_output, masks)
+            with stage("composite"):
+                safe_output = self._protect(person_rgb, generated_path, masks)
 
-            output_rgb = np.array(
-                Image.fromarray(safe_output).resize((original_w, original_h), Image.Resampling.LANCZOS)
-            )
-            face_hair_full = np.array(
-                Image.fromarray((masks.face_hair * 255).astype(np.uint8)).resize(
-                    (original_w, original_h), Image.Resampling.NEAREST
-                )
-            ) > 0
-            output_rgb[face_hair_full] = person_original_rgb[face_hair_full]
-
-            if output_rgb.shape != person_original_rgb.shape:
-                raise ValueError(
-                    f"Output shape mismatch: expected {person_original_rgb.shape}, got {output_rgb.shape}"
-                )
-            if np.any(face_hair_full):
-                if not np.array_equal(output_rgb[face_hair_full], person_original_rgb[face_hair_full]):
-                    raise ValueError("Face/hair protection validation failed at original resolution")
+        if upscale > 1:
+            with stage("upscale"):
+                safe_output = self._run_upscale(safe_output, upscale)
 
-            self._save_rgb(output_rgb, output_path)
+        with stage("composite"):
+            self._composite(safe_output, person_original_rgb, masks, output_path)
 
         if not Path(output_path).exists():
             raise RuntimeError(f"Final output image missing: {output_path}")
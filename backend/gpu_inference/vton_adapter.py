@@ -20,6 +20,10 @@ class VtonInputPaths:
     pose_map: str
     edit_mask: str
     output_path: str
+    # Generation settings of the job's quality tier
+    num_steps: int = 20
+    width: int = 768
+    height: int = 1024
 
 
 class BaseVtonAdapter:
@@ -37,6 +41,7 @@ class CommandVtonAdapter(BaseVtonAdapter):
       python inference.py --person {person_agnostic} --cloth {garment_image}
         --cloth_mask {garment_mask} --pose {pose_map} --edit_mask {edit_mask}
         --output {output_path}
+      Optional placeholders: {num_steps}, {width}, {height} (quality tier)
     - VTON_WORKDIR (optional)
     """
 
@@ -66,6 +71,9 @@ class CommandVtonAdapter(BaseVtonAdapter):
             pose_map=data.pose_map,
             edit_mask=data.edit_mask,
             output_path=data.output_path,
+            num_steps=data.num_steps,
+            width=data.width,
+            height=data.height,
         )
 
         result = subprocess.run(
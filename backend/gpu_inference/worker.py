@@ -7,17 +7,39 @@ import time
 import os
 import sys
 from datetime import datetime
-import requests
 from io import BytesIO
-from PIL import Image
 import tempfile
+import uuid
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from production_pipeline import ProductionTryonPipeline
-from app.services.local_tryon_service import LocalTryonService
-import boto3
+from app.services.job_cache import JobStateCache
+from app.services.quota_service import QuotaCounter
+from app.services.image_derivatives import DerivativeGenerator, default_specs
+from app.services.output_encoding import OutputEncodingPolicy, EncodingReport, encode_image, resolve_format
+from app.services.quality_tiers import QualityPolicy
+from app.services.s3_transfer import S3TransferManager
+from app.utils.metrics import (
+    StageTimer,
+    JOBS_IN_FLIGHT,
+    JOB_SECONDS,
+    JOB_TIERS,
+    RESULT_BYTES,
+    observe_first_image,
+    observe_queue_wait,
+    start_metrics_server,
+)
+from app.utils.profiling import ProfilingPolicy, StackSampler, profile_key
+from app.utils.tracing import (
+    SpanKind,
+    configure_tracing,
+    extract_context,
+    record_error,
+    record_span,
+    shutdown_tracing,
+    span,
+)
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -30,75 +52,296 @@ AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_S3_BUCKET = os.getenv("AWS_S3_BUCKET")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+AWS_S3_ENDPOINT_URL = os.getenv("AWS_S3_ENDPOINT_URL") or None
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "16"))
+S3_MULTIPART_CHUNKSIZE_MB = int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", "8"))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "8"))
+# Keep inputs in memory instead of temp files (local pipeline only; the
+# production pipeline hands file paths to external commands)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+WORKER_DOWNLOAD_IN_MEMORY = os.getenv("WORKER_DOWNLOAD_IN_MEMORY", "false").lower() in ("1", "true", "yes")
 DATABASE_URL = os.getenv("DATABASE_URL")
 TRYON_PIPELINE_MODE = os.getenv("TRYON_PIPELINE_MODE", "local").lower()
+# Legacy (in-process) pipeline: stage model memory budget and warm-up order
+MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+MODEL_WARMUP = [m.strip().lower() for m in os.getenv("MODEL_WARMUP", "schp,pose,vton,upscale").split(",") if m.strip()]
+JOB_CACHE_ACTIVE_TTL_SECONDS = int(os.getenv("JOB_CACHE_ACTIVE_TTL_SECONDS", "900"))
+JOB_CACHE_TERMINAL_TTL_SECONDS = int(os.getenv("JOB_CACHE_TERMINAL_TTL_SECONDS", "3600"))
+QUOTA_REFUND_ON_FAILURE = os.getenv("QUOTA_REFUND_ON_FAILURE", "true").lower() in ("1", "true", "yes")
+DERIVATIVE_FORMATS = [f.strip().lower() for f in os.getenv("DERIVATIVE_FORMATS", "avif,webp").split(",") if f.strip()]
+DERIVATIVE_WORKERS = int(os.getenv("DERIVATIVE_WORKERS", "3"))
+THUMBNAIL_MAX_EDGE = int(os.getenv("THUMBNAIL_MAX_EDGE", "320"))
+PREVIEW_MAX_EDGE = int(os.getenv("PREVIEW_MAX_EDGE", "1280"))
+OUTPUT_ENCODINGS = {
+    plan: (
+        os.getenv(f"OUTPUT_FORMAT_{plan.upper()}", default_format),
+        int(os.getenv(f"OUTPUT_QUALITY_{plan.upper()}", str(default_quality))),
+    )
+    for plan, default_format, default_quality in (
+        ("free", "webp", 80),
+        ("pro", "webp", 90),
+        ("enterprise", "png", 95),
+    )
+}
+# Default quality tier per plan, and the queue waits that downgrade jobs
+QUALITY_TIERS = {
+    plan: os.getenv(f"QUALITY_TIER_{plan.upper()}", default_tier).strip().lower()
+    for plan, default_tier in (("free", "standard"), ("pro", "standard"), ("enterprise", "hd"))
+}
+QUALITY_DOWNGRADE_LAG_SECONDS = float(os.getenv("QUALITY_DOWNGRADE_LAG_SECONDS", "30"))
+QUALITY_DRAFT_LAG_SECONDS = float(os.getenv("QUALITY_DRAFT_LAG_SECONDS", "120"))
+# Quick composited draft published before the model pipeline runs
+WORKER_DRAFT_PREVIEW = os.getenv("WORKER_DRAFT_PREVIEW", "true").lower() in ("1", "true", "yes")
+DRAFT_PREVIEW_MAX_EDGE = int(os.getenv("DRAFT_PREVIEW_MAX_EDGE", "512"))
+DRAFT_PREVIEW_QUALITY = int(os.getenv("DRAFT_PREVIEW_QUALITY", "70"))
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0.01"))
+PROFILING_INTERVAL_MS = int(os.getenv("PROFILING_INTERVAL_MS", "5"))
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+TRACES_SAMPLE_RATE = float(os.getenv("TRACES_SAMPLE_RATE", "0.1"))
 
 # Redis client
 redis_client = redis.from_url(REDIS_URL, decode_responses=True)
 
-# S3 client
-s3_client = boto3.client(
-    's3',
+# Job state cache shared with the API's status endpoints
+job_state_cache = JobStateCache(
+    redis_client,
+    active_ttl=JOB_CACHE_ACTIVE_TTL_SECONDS,
+    terminal_ttl=JOB_CACHE_TERMINAL_TTL_SECONDS,
+)
+
+# Quota counters shared with the API (used to refund failed jobs)
+quota_counter = QuotaCounter(redis_client)
+
+# Which jobs are profiled (admin override shared with the API via Redis)
+profiling_policy = ProfilingPolicy(
+    redis_client,
+    enabled=PROFILING_ENABLED,
+    sample_rate=PROFILING_SAMPLE_RATE,
+)
+
+# S3 transfers (pooled connections, concurrent downloads/uploads)
+transfers = S3TransferManager(
+    AWS_S3_BUCKET,
+    region=AWS_REGION,
     aws_access_key_id=AWS_ACCESS_KEY_ID,
     aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION
+    endpoint_url=AWS_S3_ENDPOINT_URL,
+    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+    multipart_threshold_mb=S3_MULTIPART_THRESHOLD_MB,
+    multipart_chunksize_mb=S3_MULTIPART_CHUNKSIZE_MB,
+    max_concurrency=S3_MAX_CONCURRENCY,
 )
 
-# Initialize AI pipeline
-print("🚀 Initializing AI pipeline...")
-if TRYON_PIPELINE_MODE == "production":
-    print("[PIPELINE] TRYON_PIPELINE_MODE=production")
+# Thumbnail / preview / full-resolution encoding (process pool)
+derivative_generator = DerivativeGenerator(
+    specs=default_specs(THUMBNAIL_MAX_EDGE, PREVIEW_MAX_EDGE),
+    formats=DERIVATIVE_FORMATS,
+    max_workers=DERIVATIVE_WORKERS,
+)
+
+# Full-resolution result format per plan tier
+output_encoding = OutputEncodingPolicy(OUTPUT_ENCODINGS)
+
+# Quality tier per job (plan default, downgraded when the queue lags)
+quality_policy = QualityPolicy(
+    QUALITY_TIERS,
+    downgrade_lag_seconds=QUALITY_DOWNGRADE_LAG_SECONDS,
+    draft_lag_seconds=QUALITY_DRAFT_LAG_SECONDS,
+)
+
+
+# AI pipeline, created on first use (see get_pipeline) so importing this
+# module stays cheap; main() creates it before taking jobs
+_pipeline = None
+
+
+def get_pipeline():
+    """
+    The production or legacy pipeline (None in local mode)
+
+    Imported and constructed on first call; later calls reuse it.
+
+    Raises:
+        Exception: If the production pipeline is misconfigured
+    """
+    global _pipeline
+    if _pipeline is not None or TRYON_PIPELINE_MODE not in ("production", "legacy"):
+        return _pipeline
+
+    print("🚀 Initializing AI pipeline...")
+    print(f"[PIPELINE] TRYON_PIPELINE_MODE={TRYON_PIPELINE_MODE}")
+    if TRYON_PIPELINE_MODE == "legacy":
+        import torch
+        from pipeline import VirtualTryonPipeline
+
+        print("[PIPELINE] Using LEGACY in-process pipeline (placeholder stage models)")
+        _pipeline = VirtualTryonPipeline(
+            device="cuda" if torch.cuda.is_available() else "cpu",
+            memory_budget_mb=MODEL_MEMORY_BUDGET_MB,
+        )
+        return _pipeline
+
+    from production_pipeline import ProductionTryonPipeline
+
     print("[PIPELINE] Using PRODUCTION pipeline (SCHP + pose + real VTON)")
     try:
-        pipeline = ProductionTryonPipeline()
+        _pipeline = ProductionTryonPipeline()
         print("✅ Production pipeline ready")
     except Exception as exc:
         print(f"[PIPELINE][ERROR] Production pipeline misconfigured: {exc}")
         raise
-else:
-    print(f"[PIPELINE][WARNING] TRYON_PIPELINE_MODE={TRYON_PIPELINE_MODE}")
-    print("[PIPELINE][WARNING] Using LOCAL fallback generator (not production VTON)")
-    pipeline = None
-    print("✅ Local fallback pipeline ready")
-print("✅ Pipeline ready\n")
-
-
-def download_image_from_s3(s3_url: str, local_path: str):
-    """Download image from S3 URL to local file"""
-    # Extract key from S3 URL
-    # Format: https://bucket.s3.region.amazonaws.com/key
-    parts = s3_url.split('.s3.')
-    if len(parts) < 2:
-        # Try alternative format
-        parts = s3_url.split('/')
-        key = '/'.join(parts[3:])
-    else:
-        key = parts[1].split('/', 1)[1]
+    return _pipeline
+
+
+# Result keys never change, so browsers and CDNs may cache them forever
+RESULT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def input_keys(job) -> list:
+    """
+    Storage keys of a job's inputs
+    
+    Jobs store their keys at creation; rows created before that only have
+    URLs, which are resolved once here.
+    """
+    if job.user_image_key and job.garment_image_key:
+        return [job.user_image_key, job.garment_image_key]
+    return [transfers.key_from_url(job.user_image_url), transfers.key_from_url(job.garment_image_url)]
+
+
+def download_inputs_from_s3(keys: list, local_paths: list = None, bucket: str = None) -> list:
+    """
+    Download job inputs concurrently
+    
+    Args:
+        keys: Storage keys of the inputs
+        local_paths: Target files, one per key; None keeps them in memory
+        bucket: Bucket recorded on the job (defaults to AWS_S3_BUCKET)
     
-    # Download from S3
-    s3_client.download_file(AWS_S3_BUCKET, key, local_path)
-    print(f"  📥 Downloaded: {key}")
+    Returns:
+        Local paths, or BytesIO objects when downloading into memory
+    """
+    results = transfers.download_many(keys, local_paths, bucket)
+    for key in keys:
+        print(f"  📥 Downloaded: {key}")
+    
+    if local_paths is None:
+        return [BytesIO(data) for data in results]
+    return results
 
 
-def upload_result_to_s3(local_path: str, job_id: str) -> str:
-    """Upload result image to S3 and return URL"""
+def upload_results_to_s3(
+    local_path: str,
+    job_id: str,
+    plan: str = None,
+    timer: StageTimer = None,
+    full_output: tuple = None
+) -> tuple[dict, dict, EncodingReport]:
+    """
+    Encode the thumbnail, preview and full-resolution result and upload them
+    
+    Args:
+        local_path: Lossless (PNG) pipeline output
+        job_id: Job UUID
+        plan: Owner's plan, selects the full-resolution format
+        timer: Records the encode and upload stages
+        full_output: (OutputFormat, quality) overriding the plan's format
+    
+    Returns:
+        (dict of derivative name ("thumbnail", "preview", "full") -> URL,
+         dict of derivative name -> storage key,
+         size of the full-resolution result vs the lossless PNG)
+    """
+    timer = timer or StageTimer()
+    
+    with timer.stage("encode"):
+        derivatives = derivative_generator.generate(local_path, full_output or output_encoding.for_plan(plan))
+    full = derivatives["full"]
+    report = EncodingReport(full.extension, full.size, os.path.getsize(local_path))
+    RESULT_BYTES.labels(kind="written").inc(report.bytes_written)
+    RESULT_BYTES.labels(kind="saved").inc(max(0, report.bytes_saved))
     timestamp = datetime.now().strftime("%Y%m%d")
-    key = f"results/{timestamp}/{job_id}/output.png"
     
-    s3_client.upload_file(
-        local_path,
-        AWS_S3_BUCKET,
-        key,
-        ExtraArgs={'ContentType': 'image/png'}
-    )
+    keys = {
+        name: f"results/{timestamp}/{job_id}/{name}.{derivative.extension}"
+        for name, derivative in derivatives.items()
+    }
+    with timer.stage("upload"):
+        urls = transfers.upload_many(
+            ((keys[name], derivative.data, derivative.content_type) for name, derivative in derivatives.items()),
+            cache_control=RESULT_CACHE_CONTROL
+        )
+    for name, derivative in derivatives.items():
+        print(f"  📤 Uploaded {name}: {keys[name]} ({derivative.size / 1024:.0f} KB)")
     
-    url = f"https://{AWS_S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{key}"
-    print(f"  📤 Uploaded result: {key}")
-    return url
+    return dict(zip(keys, urls)), keys, report
+
+
+def publish_draft_preview(job_id: str, user_image, garment_image, timer: StageTimer = None) -> bool:
+    """
+    Composite a quick low-resolution draft and publish it as the job's preview_url
+    
+    The draft uses the local compositor (no models) on inputs decoded at
+    draft size, so users see an image within seconds while the full
+    pipeline runs. A failed draft is logged and never fails the job.
+    
+    Args:
+        job_id: Job UUID
+        user_image: Downloaded person image (path or file object)
+        garment_image: Downloaded garment image (path or file object)
+        timer: Records the preview stage
+    
+    Returns:
+        True if the draft was published
+    """
+    from app.services.local_tryon_service import LocalTryonService
+    
+    timer = timer or StageTimer()
+    try:
+        with timer.stage("preview"):
+            draft = LocalTryonService.draft(user_image, garment_image, DRAFT_PREVIEW_MAX_EDGE)
+            data, fmt = encode_image(draft, resolve_format(["jpeg"]), DRAFT_PREVIEW_QUALITY)
+            timestamp = datetime.now().strftime("%Y%m%d")
+            key = f"results/{timestamp}/{job_id}/draft.{fmt.extension}"
+            url = transfers.upload_bytes(key, data, fmt.content_type, cache_control=RESULT_CACHE_CONTROL)
+        print(f"  👀 Draft preview: {key} ({len(data) / 1024:.0f} KB)")
+        return update_job_status(job_id, "PROCESSING", preview_url=url, preview_key=key)
+    except Exception as e:
+        print(f"  ⚠️  Draft preview failed: {e}")
+        return False
+    finally:
+        # In-memory inputs are read again by the pipeline
+        for image in (user_image, garment_image):
+            if hasattr(image, "seek"):
+                image.seek(0)
 
 
-def update_job_status(job_id: str, status: str, result_url: str = None, error: str = None, processing_time_ms: int = None):
-    """Update job status in database via API"""
+def update_job_status(
+    job_id: str,
+    status: str,
+    result_urls: dict = None,
+    result_keys: dict = None,
+    error: str = None,
+    processing_time_ms: int = None,
+    stage_timings: dict = None,
+    quality_tier: str = None,
+    preview_url: str = None,
+    preview_key: str = None
+) -> bool:
+    """
+    Update job status in database and the job state cache
+    
+    When a job completes with result_urls (see upload_results_to_s3), its
+    Result row is created in the same transaction.
+    
+    Returns:
+        True if the update was applied, False if the job is missing, was
+        cancelled by the user, or the update failed
+    """
     # In production, this would call the backend API
     # For now, we'll use direct database access
     
@@ -109,12 +352,15 @@ def update_job_status(job_id: str, status: str, result_url: str = None, error: s
     Session = sessionmaker(bind=engine)
     session = Session()
     
+    applied = False
     try:
-        from app.models import Job, JobStatus
+        from app.models import Job, JobStatus, Result
         
-        job = session.query(Job).filter(Job.id == job_id).first()
+        job = session.query(Job).filter(Job.id == uuid.UUID(job_id)).first()
         
-        if job:
+        if job and job.status == JobStatus.CANCELLED:
+            print(f"  ⚠️  Job {job_id} was cancelled, skipping status update: {status}")
+        elif job:
             job.status = JobStatus[status.upper()]
             
             if status.upper() == "PROCESSING" and not job.started_at:
@@ -123,8 +369,22 @@ def update_job_status(job_id: str, status: str, result_url: str = None, error: s
             if status.upper() in ["COMPLETED", "FAILED"]:
                 job.completed_at = datetime.utcnow()
             
-            if result_url:
-                job.result_image_url = result_url
+            if result_urls:
+                job.result_image_url = result_urls["full"]
+                if result_keys:
+                    job.result_image_key = result_keys["full"]
+                
+                if status.upper() == "COMPLETED":
+                    session.add(Result(
+                        job_id=job.id,
+                        user_id=job.user_id,
+                        image_url=result_urls["full"],
+                        preview_url=result_urls.get("preview"),
+                        thumbnail_url=result_urls.get("thumbnail"),
+                        image_key=(result_keys or {}).get("full"),
+                        preview_key=(result_keys or {}).get("preview"),
+                        thumbnail_key=(result_keys or {}).get("thumbnail")
+                    ))
             
             if error:
                 job.error_message = error
@@ -132,8 +392,24 @@ def update_job_status(job_id: str, status: str, result_url: str = None, error: s
             if processing_time_ms:
                 job.processing_time_ms = processing_time_ms
             
+            if stage_timings:
+                job.stage_timings = stage_timings
+            
+            if quality_tier:
+                job.quality_tier = quality_tier
+            
+            if preview_url:
+                job.preview_url = preview_url
+                job.preview_key = preview_key
+            
             session.commit()
+            job_state_cache.write_job(job)
+            applied = True
             print(f"  ✅ Job {job_id} status updated: {status}")
+            
+            if status.upper() == "FAILED" and QUOTA_REFUND_ON_FAILURE:
+                if quota_counter.refund(str(job.user_id), job.created_at):
+                    print(f"  ↩️  Quota refunded for job {job_id}")
         else:
             print(f"  ⚠️  Job {job_id} not found in database")
     
@@ -142,25 +418,68 @@ def update_job_status(job_id: str, status: str, result_url: str = None, error: s
         session.rollback()
     finally:
         session.close()
+    
+    return applied
 
 
 def process_job(job_data: dict):
     """
     Process a single try-on job
     
+    Continues the trace of the API request that enqueued the job: a
+    queue.wait span, then worker.process_job with one span per stage.
+    
     Args:
         job_data: Dict with 'job_id' and other metadata
     """
     job_id = job_data['job_id']
+    parent = extract_context(job_data.get("trace_context"))
+    enqueued_at = job_data.get("enqueued_at")
+    if enqueued_at is not None:
+        record_span("queue.wait", enqueued_at, time.time(), context=parent, **{"job.id": job_id})
+    
+    with span("worker.process_job", kind=SpanKind.CONSUMER, context=parent, **{"job.id": job_id}):
+        if profiling_policy.should_profile():
+            _profile_job(job_data)
+        else:
+            _run_job(job_data)
+
+
+def _profile_job(job_data: dict):
+    """Run a job under the sampling profiler and store its collapsed stacks."""
+    job_id = job_data['job_id']
+    with StackSampler(interval_seconds=PROFILING_INTERVAL_MS / 1000) as sampler:
+        _run_job(job_data)
+    
+    key = profile_key("jobs", job_id)
+    try:
+        transfers.upload_bytes(key, sampler.collapsed().encode("utf-8"), "text/plain")
+        print(f"🔬 Profile ({sampler.samples} samples): {key}")
+    except Exception as e:
+        print(f"⚠️  Failed to upload profile: {e}")
+
+
+def _run_job(job_data: dict):
+    """Download inputs, run the pipeline, then encode and upload results."""
+    job_id = job_data['job_id']
     print(f"\n{'='*60}")
     print(f"🎬 Processing job: {job_id}")
     print(f"{'='*60}")
     
     start_time = time.time()
+    timer = StageTimer()
+    queue_wait = observe_queue_wait(job_data.get("enqueued_at"), timer)
+    tier = None
+    # Time to first image counts from enqueue when the API recorded it
+    first_image_since = job_data.get("enqueued_at") or start_time
+    preview_published = False
     
     try:
-        # Update status to PROCESSING
-        update_job_status(job_id, "PROCESSING")
+        # Update status to PROCESSING (refused if the user cancelled meanwhile)
+        if not update_job_status(job_id, "PROCESSING"):
+            print(f"⏭️  Skipping job {job_id}")
+            JOB_SECONDS.labels(status="cancelled").observe(time.time() - start_time)
+            return
         
         # Get job details from database
         from sqlalchemy import create_engine
@@ -170,45 +489,87 @@ def process_job(job_data: dict):
         Session = sessionmaker(bind=engine)
         session = Session()
         
-        from app.models import Job
-        job = session.query(Job).filter(Job.id == job_id).first()
+        from app.models import Job, User
+        job = session.query(Job).filter(Job.id == uuid.UUID(job_id)).first()
+        plan = session.query(User.plan).filter(User.id == job.user_id).scalar() if job else None
         session.close()
         
         if not job:
             raise Exception("Job not found in database")
         
-        print(f"📋 User image: {job.user_image_url[:50]}...")
-        print(f"📋 Garment image: {job.garment_image_url[:50]}...")
+        # Quality tier: the plan's default, cheaper when the queue lags
+        tier = quality_policy.choose(plan, queue_wait)
+        downgraded = tier != quality_policy.for_plan(plan)
+        JOB_TIERS.labels(tier=tier.name, downgraded=str(downgraded).lower()).inc()
+        print(f"🎚️  Quality tier: {tier.name}" + (f" (downgraded, queue wait {queue_wait:.0f}s)" if downgraded else ""))
+        
+        print(f"📋 User image: {(job.user_image_key or job.user_image_url)[:50]}...")
+        print(f"📋 Garment image: {(job.garment_image_key or job.garment_image_url)[:50]}...")
         
-        # Download images from S3
+        # Download both images from S3 at once
         print("\n📥 Downloading images from S3...")
         temp_dir = tempfile.gettempdir()
-        user_img_path = os.path.join(temp_dir, f"{job_id}_user.jpg")
-        garment_img_path = os.path.join(temp_dir, f"{job_id}_garment.jpg")
+        in_memory = WORKER_DOWNLOAD_IN_MEMORY and TRYON_PIPELINE_MODE != "production"
+        local_paths = None if in_memory else [
+            os.path.join(temp_dir, f"{job_id}_user.jpg"),
+            os.path.join(temp_dir, f"{job_id}_garment.jpg"),
+        ]
+        with timer.stage("download"):
+            user_img_path, garment_img_path = download_inputs_from_s3(
+                input_keys(job),
+                local_paths,
+                job.storage_bucket
+            )
         
-        download_image_from_s3(job.user_image_url, user_img_path)
-        download_image_from_s3(job.garment_image_url, garment_img_path)
+        # The local compositor is already as fast as a draft; model pipelines publish one first
+        if WORKER_DRAFT_PREVIEW and TRYON_PIPELINE_MODE != "local":
+            print("\n👀 Publishing draft preview...")
+            preview_published = publish_draft_preview(job_id, user_img_path, garment_img_path, timer)
+            if preview_published:
+                observe_first_image("preview", first_image_since)
         
         # Run AI pipeline
         print("\n🎨 Running AI pipeline...")
         result_path = os.path.join(temp_dir, f"{job_id}_result.png")
 
         if TRYON_PIPELINE_MODE == "production":
-            pipeline.run(
+            get_pipeline().run(
                 person_image_path=user_img_path,
                 garment_image_path=garment_img_path,
                 output_path=result_path,
+                timer=timer,
+                working_size=tier.working_size,
+                num_steps=tier.diffusion_steps,
+                upscale=tier.upscale,
+                max_output_edge=tier.max_output_edge,
             )
-        else:
-            LocalTryonService.generate(
-                person_image_path=user_img_path,
-                garment_image_path=garment_img_path,
-                output_path=result_path,
+        elif TRYON_PIPELINE_MODE == "legacy":
+            pipeline = get_pipeline()
+            result = pipeline.run(
+                person_img_path=user_img_path,
+                garment_img_path=garment_img_path,
+                num_diffusion_steps=tier.diffusion_steps,
+                timer=timer,
+                size=tier.working_size,
+                upscale=tier.upscale,
             )
+            pipeline.save_result(result, result_path)
+        else:
+            from app.services.local_tryon_service import LocalTryonService
+
+            with timer.stage("local_tryon"):
+                LocalTryonService.generate(
+                    person_image_path=user_img_path,
+                    garment_image_path=garment_img_path,
+                    output_path=result_path,
+                )
         
-        # Upload result to S3
+        # Encode derivatives and upload them to S3
         print("\n📤 Uploading result to S3...")
-        result_url = upload_result_to_s3(result_path, job_id)
+        result_urls, result_keys, encoding_report = upload_results_to_s3(
+            result_path, job_id, plan, timer, full_output=tier.full_output()
+        )
+        print(f"  🗜️  Result: {encoding_report.summary()}")
         
         # Calculate processing time
         processing_time_ms = int((time.time() - start_time) * 1000)
@@ -217,21 +578,29 @@ def process_job(job_data: dict):
         update_job_status(
             job_id,
             "COMPLETED",
-            result_url=result_url,
-            processing_time_ms=processing_time_ms
+            result_urls=result_urls,
+            result_keys=result_keys,
+            processing_time_ms=processing_time_ms,
+            stage_timings=timer.timings,
+            quality_tier=tier.name
         )
+        JOB_SECONDS.labels(status="completed").observe(processing_time_ms / 1000)
+        if not preview_published:
+            observe_first_image("result", first_image_since)
         
         # Cleanup temporary files
         for path in [user_img_path, garment_img_path, result_path]:
-            if os.path.exists(path):
+            if isinstance(path, str) and os.path.exists(path):
                 os.remove(path)
         
         print(f"\n✅ Job completed successfully!")
         print(f"⏱️  Total time: {processing_time_ms}ms ({processing_time_ms/1000:.1f}s)")
-        print(f"🖼️  Result URL: {result_url}")
+        print(f"📊 Stages: {timer.timings}")
+        print(f"🖼️  Result URL: {result_urls['full']}")
         
     except Exception as e:
         print(f"\n❌ Job failed: {str(e)}")
+        record_error(e)
         
         # Update job status to FAILED
         processing_time_ms = int((time.time() - start_time) * 1000)
@@ -239,8 +608,11 @@ def process_job(job_data: dict):
             job_id,
             "FAILED",
             error=str(e),
-            processing_time_ms=processing_time_ms
+            processing_time_ms=processing_time_ms,
+            stage_timings=timer.timings,
+            quality_tier=tier.name if tier else None
         )
+        JOB_SECONDS.labels(status="failed").observe(processing_time_ms / 1000)
 
 
 def main():
@@ -248,9 +620,33 @@ def main():
     print("=" * 60)
     print("🤖 GPU Worker Started")
     print("=" * 60)
+
+    # Fail fast on a misconfigured pipeline instead of on the first job
+    if TRYON_PIPELINE_MODE == "production":
+        get_pipeline()
+    elif TRYON_PIPELINE_MODE == "legacy":
+        # Load stage models now so the first job does not pay for it
+        get_pipeline().warm_up(MODEL_WARMUP)
+    else:
+        print(f"[PIPELINE][WARNING] TRYON_PIPELINE_MODE={TRYON_PIPELINE_MODE}")
+        print("[PIPELINE][WARNING] Using LOCAL fallback generator (not production VTON)")
+
+    # Tracing (spans continue the API's traces; sampling follows the API)
+    configure_tracing(
+        "gpu-worker",
+        exporter=TRACING_EXPORTER,
+        otlp_endpoint=OTEL_EXPORTER_OTLP_ENDPOINT,
+        sample_rate=TRACES_SAMPLE_RATE,
+    )
+
     print(f"Redis: {REDIS_URL}")
     print(f"S3 Bucket: {AWS_S3_BUCKET}")
+    print(f"Result format: {derivative_generator.format}")
     print(f"Database: {DATABASE_URL[:30]}...")
+    if WORKER_METRICS_PORT:
+        start_metrics_server(WORKER_METRICS_PORT)
+        print(f"Metrics: http://0.0.0.0:{WORKER_METRICS_PORT}/metrics")
+    print(f"Tracing: {TRACING_EXPORTER}")
     print("=" * 60)
     print("\n👀 Watching for jobs...\n")
     
@@ -265,7 +661,8 @@ def main():
                 job_dict = json.loads(job_json)
                 
                 # Process the job
-                process_job(job_dict)
+                with JOBS_IN_FLIGHT.track_inprogress():
+                    process_job(job_dict)
             else:
                 # No jobs in queue
                 print("⏳ Waiting for jobs...", end='\r')
@@ -273,6 +670,9 @@ def main():
                 
         except KeyboardInterrupt:
             print("\n\n👋 Worker shutting down...")
+            derivative_generator.shutdown()
+            transfers.shutdown()
+            shutdown_tracing()
             break
         except Exception as e:
             print(f"\n❌ Worker error: {e}")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Google's OAuth certificate endpoint
+
+Serves a freshly generated signing certificate in the same format as
+https://www.googleapis.com/oauth2/v1/certs (with a Cache-Control max-age) and
+prints ID tokens signed by it, so Google login can be exercised offline.
+
+Usage:
+    python scripts/fake_google_certs.py --port 8765 --email dev@example.com
+    # then run the API with
+    GOOGLE_OAUTH_CERTS_URL=http://127.0.0.1:8765/oauth2/v1/certs
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+
+
+def generate_signing_key() -> tuple[str, str]:
+    """
+    Create an RSA key and a self-signed certificate for it
+
+    Returns:
+        (private key PEM, certificate PEM)
+    """
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "fake-google-certs")])
+    now = datetime.utcnow()
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=30))
+        .sign(key, hashes.SHA256())
+    )
+
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode("utf-8")
+    cert_pem = cert.public_bytes(serialization.Encoding.PEM).decode("utf-8")
+    return key_pem, cert_pem
+
+
+def mint_id_token(key_pem: str, key_id: str, client_id: str, email: str, name: str = None) -> str:
+    """Create a Google-style ID token signed with the fake key."""
+    signer = crypt.RSASigner.from_string(key_pem, key_id=key_id)
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com",
+        "aud": client_id,
+        "sub": str(uuid.uuid5(uuid.NAMESPACE_URL, email).int)[:21],
+        "email": email,
+        "email_verified": True,
+        "name": name or email.split("@")[0],
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(signer, claims).decode("utf-8")
+
+
+def make_handler(certs: dict, max_age: int):
+    body = json.dumps(certs).encode("utf-8")
+
+    class CertsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/oauth2/v1/certs":
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Cache-Control", f"public, max-age={max_age}, must-revalidate, no-transform")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            print(f"  🔑 {self.address_string()} {format % args}")
+
+    return CertsHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--client-id", default=None, help="Audience (defaults to GOOGLE_CLIENT_ID)")
+    parser.add_argument("--email", default="dev@example.com")
+    parser.add_argument("--max-age", type=int, default=19800, help="Cache-Control max-age in seconds")
+    args = parser.parse_args()
+
+    client_id = args.client_id or os.getenv("GOOGLE_CLIENT_ID", "fake-client-id.apps.googleusercontent.com")
+
+    key_id = uuid.uuid4().hex
+    key_pem, cert_pem = generate_signing_key()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler({key_id: cert_pem}, args.max_age))
+
+    print(f"🔐 Fake Google certs at http://127.0.0.1:{args.port}/oauth2/v1/certs")
+    print(f"📋 ID token for {args.email} (aud={client_id}):\n")
+    print(mint_id_token(key_pem, key_id, client_id, args.email))
+    print()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down...")
+
+
+if __name__ == "__main__":
+    main()
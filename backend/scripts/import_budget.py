@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the API and the GPU worker
+
+Imports each entry point in a fresh interpreter with ``python -X importtime``
+and checks two things:
+
+- none of the heavy modules are loaded at import time (boto3, Pillow,
+  bcrypt, google-auth, torch, OpenTelemetry SDK, ...). They must be imported
+  where they are first used, so autoscaled pods and CLI scripts start fast.
+- optionally, the cumulative import time stays under --budget-ms.
+
+Each target is imported --runs times and the fastest run counts. The script
+prints the slowest top-level packages and exits 1 on a violation, so it can
+run in CI.
+
+Required settings get placeholder values when they are not set, and no
+service is contacted: importing must not connect to anything.
+
+Usage:
+    python scripts/import_budget.py
+    python scripts/import_budget.py --target api --budget-ms 800 --runs 5
+    python scripts/import_budget.py --json import_times.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# target name -> (module, directory it is imported from)
+TARGETS = {
+    "api": ("app.main", BACKEND_DIR),
+    "worker": ("worker", os.path.join(BACKEND_DIR, "gpu_inference")),
+}
+
+# Must only be imported on first use
+FORBIDDEN_MODULES = (
+    "bcrypt",
+    "boto3",
+    "botocore",
+    "cv2",
+    "google.auth",
+    "numpy",
+    "opentelemetry.sdk",
+    "PIL",
+    "requests",
+    "sentry_sdk",
+    "torch",
+)
+
+# Placeholders for settings app.config requires; real values win
+PLACEHOLDER_ENV = {
+    # A file URL: the engines' pool options do not apply to :memory:
+    "DATABASE_URL": f"sqlite:///{os.path.join(tempfile.gettempdir(), 'import_budget.db')}",
+    "AWS_ACCESS_KEY_ID": "dummy",
+    "AWS_SECRET_ACCESS_KEY": "dummy",
+    "AWS_S3_BUCKET": "dummy-bucket",
+    "GOOGLE_CLIENT_ID": "import-budget",
+    "GOOGLE_CLIENT_SECRET": "import-budget",
+    "JWT_SECRET_KEY": "import-budget",
+}
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """
+    Parse ``-X importtime`` output
+
+    Returns:
+        (module, depth, self us, cumulative us) per imported module
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), depth, int(fields[0]), int(fields[1])))
+    return modules
+
+
+def measure(module: str, directory: str) -> list[tuple[str, int, int, int]]:
+    """Import module in a fresh interpreter and return its import times."""
+    env = {**PLACEHOLDER_ENV, **os.environ, "TRACING_EXPORTER": "none", "SENTRY_DSN": ""}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [directory, BACKEND_DIR, env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=directory,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def forbidden_imports(modules: list[tuple[str, int, int, int]]) -> list[str]:
+    names = {name for name, *_ in modules}
+    return sorted(
+        forbidden for forbidden in FORBIDDEN_MODULES
+        if forbidden in names or any(name.startswith(f"{forbidden}.") for name in names)
+    )
+
+
+def slowest_packages(modules: list[tuple[str, int, int, int]], top: int) -> list[tuple[str, float]]:
+    """Self time summed per top-level package, in ms, slowest first."""
+    totals = Counter()
+    for name, _, self_us, _ in modules:
+        totals[name.split(".")[0]] += self_us
+    return [(package, us / 1000) for package, us in totals.most_common(top)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=sorted(TARGETS), action="append", help="Entry point (default: all)")
+    parser.add_argument("--runs", type=int, default=3, help="Imports per target; the fastest counts")
+    parser.add_argument("--budget-ms", type=float, default=0, help="Fail above this import time (0 = no budget)")
+    parser.add_argument("--top", type=int, default=15, help="Packages to show")
+    parser.add_argument("--json", default=None, help="Write results to this file")
+    args = parser.parse_args()
+
+    failed = False
+    report = {}
+    for target in args.target or sorted(TARGETS):
+        module, directory = TARGETS[target]
+        runs = [measure(module, directory) for _ in range(max(1, args.runs))]
+        totals = [sum(us for _, depth, _, us in run if depth == 0) / 1000 for run in runs]
+        best = min(range(len(runs)), key=totals.__getitem__)
+        modules, total_ms = runs[best], totals[best]
+        forbidden = forbidden_imports(modules)
+
+        print(f"\n📦 {target} (import {module}): {total_ms:.0f} ms, {len(modules)} modules")
+        for package, ms in slowest_packages(modules, args.top):
+            print(f"  {ms:>8.1f} ms  {package}")
+
+        if forbidden:
+            failed = True
+            print(f"❌ Heavy modules imported at startup: {', '.join(forbidden)}")
+        if args.budget_ms and total_ms > args.budget_ms:
+            failed = True
+            print(f"❌ Over budget: {total_ms:.0f} ms > {args.budget_ms:.0f} ms")
+
+        report[target] = {
+            "module": module,
+            "import_ms": round(total_ms, 1),
+            "runs_ms": [round(ms, 1) for ms in totals],
+            "modules": len(modules),
+            "forbidden": forbidden,
+            "packages_ms": dict((package, round(ms, 1)) for package, ms in slowest_packages(modules, args.top)),
+        }
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"\n📄 Results: {args.json}")
+
+    if failed:
+        sys.exit(1)
+    print("\n✅ Import budget OK")
+
+
+if __name__ == "__main__":
+    main()
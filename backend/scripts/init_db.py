@@ -36,6 +36,54 @@ def main():
                     END IF;
                 END$$;
             """))
+            conn.execute(text("ALTER TABLE results ADD COLUMN IF NOT EXISTS preview_url TEXT;"))
+            conn.execute(text("""
+                ALTER TABLE results
+                    ADD COLUMN IF NOT EXISTS image_key TEXT,
+                    ADD COLUMN IF NOT EXISTS preview_key TEXT,
+                    ADD COLUMN IF NOT EXISTS thumbnail_key TEXT;
+            """))
+            conn.execute(text("""
+                ALTER TABLE jobs
+                    ADD COLUMN IF NOT EXISTS storage_bucket VARCHAR(63),
+                    ADD COLUMN IF NOT EXISTS user_image_key TEXT,
+                    ADD COLUMN IF NOT EXISTS garment_image_key TEXT,
+                    ADD COLUMN IF NOT EXISTS result_image_key TEXT,
+                    ADD COLUMN IF NOT EXISTS user_image_sha256 BYTEA,
+                    ADD COLUMN IF NOT EXISTS garment_image_sha256 BYTEA,
+                    ADD COLUMN IF NOT EXISTS user_image_size INTEGER,
+                    ADD COLUMN IF NOT EXISTS garment_image_size INTEGER,
+                    ADD COLUMN IF NOT EXISTS stage_timings JSON,
+                    ADD COLUMN IF NOT EXISTS quality_tier VARCHAR(16),
+                    ADD COLUMN IF NOT EXISTS preview_url TEXT,
+                    ADD COLUMN IF NOT EXISTS preview_key TEXT;
+            """))
+            # Download URLs are signed from keys; backfill keys of rows written
+            # before they were stored (every key starts with uploads/ or results/)
+            key_pattern = "'((uploads|results)/[^?]*)$'"
+            conn.execute(text(
+                f"UPDATE jobs SET result_image_key = substring(result_image_url from {key_pattern}) "
+                "WHERE result_image_key IS NULL AND result_image_url IS NOT NULL;"
+            ))
+            conn.execute(text(
+                f"UPDATE results SET image_key = substring(image_url from {key_pattern}), "
+                f"preview_key = substring(preview_url from {key_pattern}), "
+                f"thumbnail_key = substring(thumbnail_url from {key_pattern}) "
+                "WHERE image_key IS NULL;"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_jobs_user_created_id "
+                "ON jobs (user_id, created_at DESC, id DESC);"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_results_user_live_created "
+                "ON results (user_id, created_at DESC, id DESC) WHERE deleted_at IS NULL;"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_results_user_favorites_created "
+                "ON results (user_id, created_at DESC, id DESC) "
+                "WHERE deleted_at IS NULL AND is_favorite IS true;"
+            ))
         
         print("✅ Database tables created successfully!")
         print("\nCreated tables:")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Aggregate sampled profiles into hotspots
+
+Reads collapsed-stack profiles ("outer;inner;leaf count" per line) written by
+the sampling profiler. Sources are local files or directories (for example
+local_storage/profiles/) or an S3 prefix (profiles/20240101/jobs/). The
+script prints the frames with the most samples:
+
+- self: samples where the frame was running
+- total: samples where the frame was anywhere on the stack
+
+Use --output to write the merged stacks for flamegraph.pl or speedscope.
+
+Usage:
+    python scripts/profile_hotspots.py local_storage/profiles --top 30
+    python scripts/profile_hotspots.py --s3-prefix profiles/20240101/jobs/ --output jobs.folded
+    flamegraph.pl jobs.folded > jobs.svg
+"""
+import argparse
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+
+def parse_folded(text: str, stacks: Counter) -> int:
+    """Add one profile's stacks to stacks; returns its sample count."""
+    samples = 0
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+            samples += int(count)
+    return samples
+
+
+def read_local(paths: list[str]):
+    """Yield (name, text) for .folded files under the given paths."""
+    for path in map(Path, paths):
+        files = sorted(path.rglob("*.folded")) if path.is_dir() else [path]
+        for file in files:
+            yield str(file), file.read_text()
+
+
+def read_s3(prefix: str, limit: int):
+    """Yield (key, text) for .folded objects under an S3 prefix."""
+    import boto3
+
+    client = boto3.client(
+        "s3",
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("AWS_REGION", "us-east-1"),
+        endpoint_url=os.getenv("AWS_S3_ENDPOINT_URL") or None,
+    )
+    bucket = os.getenv("AWS_S3_BUCKET")
+    read = 0
+    for page in client.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if not obj["Key"].endswith(".folded"):
+                continue
+            if limit and read >= limit:
+                return
+            body = client.get_object(Bucket=bucket, Key=obj["Key"])["Body"].read()
+            read += 1
+            yield obj["Key"], body.decode("utf-8")
+
+
+def hotspots(stacks: Counter) -> tuple[Counter, Counter]:
+    """
+    Self and total samples per frame
+
+    Returns:
+        (self samples, total samples), each keyed by frame label
+    """
+    self_samples, total_samples = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_samples[frames[-1]] += count
+        for frame in set(frames):
+            total_samples[frame] += count
+    return self_samples, total_samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="Profile files or directories")
+    parser.add_argument("--s3-prefix", default=None, help="Read profiles from this prefix in AWS_S3_BUCKET")
+    parser.add_argument("--limit", type=int, default=0, help="Read at most this many S3 profiles (0 = all)")
+    parser.add_argument("--top", type=int, default=25, help="Frames to show")
+    parser.add_argument("--output", default=None, help="Write the merged collapsed stacks here")
+    args = parser.parse_args()
+
+    if not args.paths and not args.s3_prefix:
+        parser.error("give profile paths or --s3-prefix")
+
+    backend_env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+    load_dotenv(dotenv_path=backend_env_path)
+
+    stacks = Counter()
+    profiles = 0
+    sources = list(read_local(args.paths))
+    if args.s3_prefix:
+        sources += list(read_s3(args.s3_prefix, args.limit))
+    for _, text in sources:
+        if parse_folded(text, stacks):
+            profiles += 1
+
+    total = sum(stacks.values())
+    if not total:
+        print("⚠️  No samples found")
+        return
+
+    self_samples, total_samples = hotspots(stacks)
+    print(f"🔬 {profiles} profiles, {total} samples\n")
+    print(f"{'self %':>7} {'total %':>8}  frame")
+    for frame, count in self_samples.most_common(args.top):
+        print(f"{100 * count / total:>6.1f}% {100 * total_samples[frame] / total:>7.1f}%  {frame}")
+
+    print(f"\n{'total %':>8}  frame (inclusive)")
+    for frame, count in total_samples.most_common(args.top):
+        print(f"{100 * count / total:>7.1f}%  {frame}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            for stack, count in stacks.most_common():
+                output.write(f"{stack} {count}\n")
+        print(f"\n📄 Merged stacks: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
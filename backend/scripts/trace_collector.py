@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenTelemetry collector
+
+Accepts OTLP/HTTP trace exports (protobuf, optionally gzipped) on
+/v1/traces. Each span is printed as it arrives, and can also be appended to
+a JSON Lines file so a trace can be checked offline. On exit, the script
+prints the mean duration of each span name.
+
+Usage:
+    python scripts/trace_collector.py --port 4318 --output traces.jsonl
+    # then run the API and the worker with
+    TRACING_EXPORTER=otlp OTEL_EXPORTER_OTLP_ENDPOINT=http://127.0.0.1:4318 TRACES_SAMPLE_RATE=1.0
+"""
+import argparse
+import gzip
+import json
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import (
+    ExportTraceServiceRequest,
+    ExportTraceServiceResponse,
+)
+
+
+def attribute_value(value):
+    """Plain Python value of an OTLP AnyValue."""
+    kind = value.WhichOneof("value")
+    return getattr(value, kind) if kind in ("string_value", "bool_value", "int_value", "double_value") else None
+
+
+def decode_spans(request: ExportTraceServiceRequest) -> list[dict]:
+    """Flatten an export request into one dict per span."""
+    spans = []
+    for resource_spans in request.resource_spans:
+        resource = {a.key: attribute_value(a.value) for a in resource_spans.resource.attributes}
+        for scope_spans in resource_spans.scope_spans:
+            for span in scope_spans.spans:
+                spans.append({
+                    "service": resource.get("service.name", "unknown"),
+                    "trace_id": span.trace_id.hex(),
+                    "span_id": span.span_id.hex(),
+                    "parent_span_id": span.parent_span_id.hex() or None,
+                    "name": span.name,
+                    "start_time_unix_nano": span.start_time_unix_nano,
+                    "duration_ms": round((span.end_time_unix_nano - span.start_time_unix_nano) / 1e6, 3),
+                    "status": span.status.code,
+                    "attributes": {a.key: attribute_value(a.value) for a in span.attributes},
+                })
+    return spans
+
+
+def make_handler(output_path: str, durations: dict):
+    lock = threading.Lock()
+    ack = ExportTraceServiceResponse().SerializeToString()
+
+    class CollectorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path.split("?")[0] != "/v1/traces":
+                self.send_error(404)
+                return
+
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            request = ExportTraceServiceRequest()
+            request.ParseFromString(body)
+            spans = decode_spans(request)
+
+            with lock:
+                for span in spans:
+                    durations[span["name"]].append(span["duration_ms"])
+                    marker = "❌" if span["status"] == 2 else "🧵"
+                    print(f"  {marker} {span['trace_id'][:8]} {span['service']:<12} {span['name']:<40} {span['duration_ms']:>10.1f} ms")
+                if output_path:
+                    with open(output_path, "a") as output:
+                        for span in spans:
+                            output.write(json.dumps(span) + "\n")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-protobuf")
+            self.send_header("Content-Length", str(len(ack)))
+            self.end_headers()
+            self.wfile.write(ack)
+
+        def log_message(self, format, *args):
+            pass
+
+    return CollectorHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--output", default=None, help="Append spans to this JSON Lines file")
+    args = parser.parse_args()
+
+    durations = defaultdict(list)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.output, durations))
+    print(f"📡 Collecting traces at http://127.0.0.1:{args.port}/v1/traces")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down...")
+
+    if durations:
+        print(f"\n{'span':<40} {'count':>7} {'mean ms':>10}")
+        for name, values in sorted(durations.items()):
+            print(f"{name:<40} {len(values):>7} {sum(values) / len(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Shared test setup
+
+The app and the worker read their configuration at import, so the
+environment is filled in before anything from app/ or gpu_inference/ is
+imported: a SQLite database in a temporary directory, a fake S3 bucket
+(moto) and fakeredis in place of Redis.
+
+Requires: pip install "moto[server]" "fakeredis[lua]"
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "gpu_inference"))
+
+TEST_DIR = tempfile.mkdtemp(prefix="vtryon-tests-")
+BUCKET = "test-bucket"
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}",
+    "AWS_ACCESS_KEY_ID": "test",
+    "AWS_SECRET_ACCESS_KEY": "test",
+    "AWS_S3_BUCKET": BUCKET,
+    "AWS_REGION": "us-east-1",
+    "GOOGLE_CLIENT_ID": "test",
+    "GOOGLE_CLIENT_SECRET": "test",
+    "JWT_SECRET_KEY": "test-secret",
+    "TRACING_EXPORTER": "none",
+    "WORKER_METRICS_PORT": "0",
+})
+
+
+def write_person(path: str, width: int = 384, height: int = 512) -> str:
+    """A portrait-shaped person photo: light background, skin-tone head, dark body."""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (width, height), (235, 232, 228))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((int(width * 0.35), int(height * 0.08), int(width * 0.65), int(height * 0.38)), fill=(224, 182, 150))
+    draw.rectangle((int(width * 0.25), int(height * 0.40), int(width * 0.75), int(height * 0.95)), fill=(60, 70, 90))
+    image.save(path, format="JPEG", quality=90)
+    return path
+
+
+def write_garment(path: str, width: int = 384, height: int = 512) -> str:
+    """A red shirt on a white studio background."""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    draw.polygon(
+        [
+            (int(width * 0.2), int(height * 0.1)), (int(width * 0.8), int(height * 0.1)),
+            (int(width * 0.75), int(height * 0.9)), (int(width * 0.25), int(height * 0.9)),
+        ],
+        fill=(200, 30, 40),
+    )
+    image.save(path, format="JPEG", quality=90)
+    return path
+
+
+@pytest.fixture
+def tryon_images(tmp_path):
+    """(person, garment) JPEG paths."""
+    return (
+        write_person(str(tmp_path / "person.jpg")),
+        write_garment(str(tmp_path / "garment.jpg")),
+    )
+
+
+@pytest.fixture
+def database():
+    """Fresh tables in the test database."""
+    from app.database import Base, engine
+    import app.models  # noqa: F401 (registers the tables)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def fake_redis():
+    import fakeredis
+
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def s3():
+    """A moto-backed S3TransferManager with the test bucket created."""
+    from moto import mock_aws
+
+    from app.services.s3_transfer import S3TransferManager
+
+    with mock_aws():
+        transfers = S3TransferManager(BUCKET)
+        transfers.client.create_bucket(Bucket=BUCKET)
+        yield transfers
+        transfers.shutdown()
+
+
+@pytest.fixture
+def user(database):
+    """A PRO user row."""
+    from app.database import SessionLocal
+    from app.models import PlanType, User
+
+    session = SessionLocal()
+    user = User(email="test@example.com", name="Test", plan=PlanType.PRO)
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    session.expunge(user)
+    session.close()
+    return user
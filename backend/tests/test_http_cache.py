@@ -0,0 +1,37 @@
+"""
+Byte-range parsing for the storage routes
+"""
+import pytest
+
+from app.utils.http_cache import parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=95-500", (95, 99)),
+    ("bytes=-5", (95, 99)),
+    ("bytes=-500", (0, 99)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    "bytes=5-2",
+    "bytes=0-9,20-29",
+    "bytes=-",
+    "bytes=a-b",
+    "bytes=--5",
+    "items=0-9",
+])
+def test_invalid_ranges_are_ignored(header):
+    assert parse_range(header, 100) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=100-200", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
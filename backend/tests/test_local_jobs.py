@@ -0,0 +1,87 @@
+"""
+Local development mode completes jobs in the API with a real composite
+"""
+import asyncio
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import write_garment, write_person
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path, fake_redis, user):
+    from app.routers import jobs
+    from app.services import job_service
+    from app.services.storage_service import storage_service
+    from app.utils.auth import get_current_user
+    from app.utils.rate_limit import enforce_rate_limit
+
+    monkeypatch.setenv("TRYON_PIPELINE_MODE", "local")
+    monkeypatch.setattr(storage_service, "use_local_storage", True)
+    monkeypatch.setattr(storage_service, "local_storage_dir", tmp_path / "storage")
+    monkeypatch.setattr(job_service, "redis_client", fake_redis)
+    monkeypatch.setattr(job_service, "job_state_cache", job_service.JobStateCache(
+        fake_redis,
+        active_ttl=job_service.settings.JOB_CACHE_ACTIVE_TTL_SECONDS,
+        terminal_ttl=job_service.settings.JOB_CACHE_TERMINAL_TTL_SECONDS,
+    ))
+    monkeypatch.setattr(job_service, "quota_counter", job_service.QuotaCounter(fake_redis))
+
+    app = FastAPI()
+    app.include_router(jobs.router, prefix="/jobs")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[enforce_rate_limit] = lambda: None
+    return TestClient(app)
+
+
+def test_local_job_stores_the_composite_and_its_derivatives(client, tmp_path, monkeypatch):
+    from prometheus_client import REGISTRY
+
+    from app.database import SessionLocal
+    from app.models import Job, JobStatus, Result
+    from app.services.local_tryon_service import LocalTryonService
+    from app.services.storage_service import storage_service
+
+    # The composite must run off the event loop
+    generate = LocalTryonService.generate
+    loops = []
+
+    def recording_generate(*args, **kwargs):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return generate(*args, **kwargs)
+
+    monkeypatch.setattr(LocalTryonService, "generate", staticmethod(recording_generate))
+    sample = ("tryon_result_bytes_total", {"kind": "written"})
+    written_before = REGISTRY.get_sample_value(*sample) or 0
+
+    person = write_person(str(tmp_path / "person.jpg"), 600, 800)
+    garment = write_garment(str(tmp_path / "garment.jpg"), 600, 800)
+    with open(person, "rb") as user_image, open(garment, "rb") as garment_image:
+        response = client.post("/jobs/create", files={
+            "user_image": ("person.jpg", user_image, "image/jpeg"),
+            "garment_image": ("garment.jpg", garment_image, "image/jpeg"),
+        })
+
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "completed"
+    assert loops == [None]
+
+    session = SessionLocal()
+    job = session.get(Job, uuid.UUID(response.json()["job_id"]))
+    result = session.query(Result).filter(Result.job_id == job.id).one()
+    session.close()
+
+    assert job.status == JobStatus.COMPLETED
+    assert "/output." in result.image_key
+    assert result.thumbnail_key and result.preview_key
+    for key in (result.image_key, result.thumbnail_key, result.preview_key):
+        assert storage_service.local_path_for_key(key).is_file()
+
+    written = storage_service.local_path_for_key(result.image_key).stat().st_size
+    assert REGISTRY.get_sample_value(*sample) == written_before + written
@@ -0,0 +1,45 @@
+"""
+VirtualTryonPipeline.run_batch gives the same results as run on each pair
+
+Requires: pip install torch
+"""
+import numpy as np
+import pytest
+
+from conftest import write_garment, write_person
+
+pytest.importorskip("torch")
+
+
+@pytest.fixture
+def pairs(tmp_path):
+    """Five distinct (person, garment) pairs, so the last batch is partial."""
+    return [
+        (
+            write_person(str(tmp_path / f"person-{index}.jpg"), 384 + 32 * index, 512),
+            write_garment(str(tmp_path / f"garment-{index}.jpg"), 384, 512 - 32 * index),
+        )
+        for index in range(5)
+    ]
+
+
+@pytest.mark.parametrize("upscale", [1, 2])
+def test_run_batch_matches_run_per_pair(pairs, upscale):
+    from pipeline import VirtualTryonPipeline
+
+    pipeline = VirtualTryonPipeline(device="cpu")
+    size = (128, 192)
+
+    expected = [
+        pipeline.run(person, garment, num_diffusion_steps=2, size=size, upscale=upscale)
+        for person, garment in pairs
+    ]
+    batched = list(pipeline.run_batch(
+        pairs, batch_size=2, num_diffusion_steps=2, decode_workers=2, size=size, upscale=upscale
+    ))
+
+    assert len(batched) == len(expected)
+    for result, reference in zip(batched, expected):
+        assert result.shape == (size[1] * upscale, size[0] * upscale, 3)
+        assert result.dtype == reference.dtype
+        np.testing.assert_array_equal(result, reference)
@@ -0,0 +1,60 @@
+"""
+Quality tiers reach the production pipeline
+"""
+import os
+import shlex
+import sys
+
+import pytest
+from PIL import Image
+
+from app.services.quality_tiers import QUALITY_TIERS, TIER_ORDER
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB = " ".join(shlex.quote(part) for part in (sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "stub_models.py")))
+
+
+def test_every_tier_differs_from_the_next_cheaper_one():
+    def cost(tier):
+        return (tier.working_size, tier.diffusion_steps, tier.upscale)
+
+    for cheaper, richer in zip(TIER_ORDER, TIER_ORDER[1:]):
+        assert cost(QUALITY_TIERS[cheaper]) != cost(QUALITY_TIERS[richer])
+    assert QUALITY_TIERS["hd"].upscale > QUALITY_TIERS["standard"].upscale
+
+
+@pytest.fixture
+def production_pipeline(monkeypatch):
+    monkeypatch.setenv("SCHP_LABELMAP_COMMAND_TEMPLATE", f"{STUB} schp {{person_image}} {{output_labelmap}}")
+    monkeypatch.setenv("POSE_MAP_COMMAND_TEMPLATE", f"{STUB} pose {{person_image}} {{output_pose}}")
+    monkeypatch.setenv(
+        "VTON_COMMAND_TEMPLATE", f"{STUB} vton {{person_agnostic}} {{garment_image}} {{edit_mask}} {{output_path}}"
+    )
+    monkeypatch.delenv("UPSCALE_COMMAND_TEMPLATE", raising=False)
+    from production_pipeline import ProductionTryonPipeline
+
+    return ProductionTryonPipeline()
+
+
+@pytest.mark.parametrize("tier_name, expected_size, upscaled", [
+    ("standard", (384, 512), False),
+    ("hd", (1536, 2048), True),
+])
+def test_production_pipeline_applies_the_tier_upscale(production_pipeline, tryon_images, tmp_path, tier_name, expected_size, upscaled):
+    from app.utils.metrics import StageTimer
+
+    tier = QUALITY_TIERS[tier_name]
+    timer = StageTimer()
+    output_path = str(tmp_path / "result.png")
+    production_pipeline.run(
+        *tryon_images,
+        output_path,
+        timer=timer,
+        working_size=tier.working_size,
+        num_steps=tier.diffusion_steps,
+        upscale=tier.upscale,
+        max_output_edge=tier.max_output_edge,
+    )
+
+    assert Image.open(output_path).size == expected_size
+    assert ("upscale" in timer.timings) == upscaled
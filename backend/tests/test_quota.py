@@ -0,0 +1,79 @@
+"""
+Quota reservations read the quotas table only when Redis has no limits cached
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def job_service(monkeypatch, fake_redis, database):
+    from app.services import job_service as job_service_module
+
+    monkeypatch.setattr(job_service_module, "quota_counter", job_service_module.QuotaCounter(fake_redis))
+    return job_service_module
+
+
+@pytest.fixture
+def quota_queries():
+    """Statements against the quotas table, as run by the async engine."""
+    from app.database import async_engine
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "quotas" in statement:
+            statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def check_quota(job_service, user):
+    from app.database import AsyncSessionLocal
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await job_service.JobService.check_quota(db, user)
+
+    return asyncio.run(run())
+
+
+def set_daily_limit(user, limit: int):
+    from app.database import SessionLocal
+    from app.models import Quota
+
+    session = SessionLocal()
+    quota = session.query(Quota).filter(Quota.user_id == user.id).one()
+    quota.daily_limit = limit
+    session.commit()
+    session.close()
+
+
+def test_only_the_first_reservation_reads_the_database(job_service, user, quota_queries):
+    assert check_quota(job_service, user) == (True, "Quota available")
+    assert any(statement.lstrip().upper().startswith("SELECT") for statement in quota_queries)
+
+    quota_queries.clear()
+    for _ in range(3):
+        assert check_quota(job_service, user)[0]
+    assert quota_queries == []
+
+
+def test_limit_change_applies_to_the_next_reservation(job_service, user, quota_queries):
+    assert check_quota(job_service, user)[0]
+    assert check_quota(job_service, user)[0]
+
+    set_daily_limit(user, 2)
+    quota_queries.clear()
+
+    has_quota, message = check_quota(job_service, user)
+    assert not has_quota
+    assert "Daily limit reached (2)" in message
+    assert quota_queries, "limits were not reloaded after the change"
+
+    # Counters survive the reload
+    usage = job_service.quota_counter.usage(str(user.id), job_service.datetime.now(job_service.timezone.utc))
+    assert usage["daily_used"] == 2
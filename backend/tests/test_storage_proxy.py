@@ -0,0 +1,54 @@
+"""
+Signed /storage proxy URLs for S3 objects
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import storage
+from app.services.storage_service import storage_service
+
+KEY = "results/20260101/job/full.webp"
+BODY = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def client(monkeypatch, s3):
+    monkeypatch.setattr(storage_service, "_s3_client", s3.client)
+    s3.upload_bytes(KEY, BODY, "image/webp")
+    app = FastAPI()
+    app.include_router(storage.router)
+    return TestClient(app)
+
+
+def test_download_urls_are_stable_proxy_urls():
+    first = storage_service.signed_url(KEY)
+    assert first.startswith(f"/storage/{KEY}?expires=")
+    assert storage_service.signed_url(KEY) == first
+
+
+def test_proxy_serves_signed_urls_with_validators_and_ranges(client):
+    url = storage_service.signed_url(KEY)
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["cache-control"].startswith("private, max-age=")
+    etag = response.headers["etag"]
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    partial = client.get(url, headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.content == BODY[:10]
+
+    # A stale If-Range validator gets the whole object
+    stale = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == BODY
+
+
+def test_proxy_rejects_unsigned_and_tampered_urls(client):
+    assert client.get(f"/storage/{KEY}").status_code == 403
+    tampered = storage_service.signed_url(KEY).replace("full.webp", "other.webp")
+    assert client.get(tampered).status_code == 403
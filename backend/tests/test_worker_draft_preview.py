@@ -0,0 +1,101 @@
+"""
+The worker publishes a draft preview before the full-quality result
+"""
+import time
+
+import pytest
+
+from app.services.local_tryon_service import LocalTryonService
+
+
+class CompositingPipeline:
+    """Stands in for the production pipeline; writes the local composite."""
+
+    def run(self, person_image_path, garment_image_path, output_path, timer=None, **tier_options):
+        with timer.stage("vton"):
+            LocalTryonService.generate(person_image_path, garment_image_path, output_path)
+
+
+@pytest.fixture
+def worker(monkeypatch, fake_redis, s3, database):
+    import worker as worker_module
+
+    monkeypatch.setattr(worker_module, "redis_client", fake_redis)
+    monkeypatch.setattr(worker_module, "job_state_cache", worker_module.JobStateCache(
+        fake_redis,
+        active_ttl=worker_module.JOB_CACHE_ACTIVE_TTL_SECONDS,
+        terminal_ttl=worker_module.JOB_CACHE_TERMINAL_TTL_SECONDS,
+    ))
+    monkeypatch.setattr(worker_module, "quota_counter", worker_module.QuotaCounter(fake_redis))
+    monkeypatch.setattr(worker_module, "profiling_policy", worker_module.ProfilingPolicy(fake_redis, enabled=False))
+    monkeypatch.setattr(worker_module, "transfers", s3)
+    monkeypatch.setattr(worker_module, "TRYON_PIPELINE_MODE", "production")
+    monkeypatch.setattr(worker_module, "WORKER_DRAFT_PREVIEW", True)
+    monkeypatch.setattr(worker_module, "get_pipeline", lambda: CompositingPipeline())
+    return worker_module
+
+
+def seed_job(worker, user, tryon_images) -> str:
+    from app.database import SessionLocal
+    from app.models import Job, JobStatus
+
+    keys = {}
+    for name, path in zip(("user", "garment"), tryon_images):
+        keys[name] = f"uploads/test/{name}.jpg"
+        with open(path, "rb") as source:
+            worker.transfers.upload_bytes(keys[name], source.read(), "image/jpeg")
+
+    session = SessionLocal()
+    job = Job(
+        user_id=user.id,
+        status=JobStatus.PENDING,
+        user_image_url=worker.transfers.url_for_key(keys["user"]),
+        garment_image_url=worker.transfers.url_for_key(keys["garment"]),
+        storage_bucket=worker.transfers.bucket,
+        user_image_key=keys["user"],
+        garment_image_key=keys["garment"],
+    )
+    session.add(job)
+    session.commit()
+    job_id = str(job.id)
+    session.close()
+    return job_id
+
+
+def test_draft_preview_is_published_before_the_result(worker, user, tryon_images, monkeypatch):
+    from prometheus_client import REGISTRY
+
+    job_id = seed_job(worker, user, tryon_images)
+
+    # Job state as the status endpoint sees it after every update
+    states = []
+    update_job_status = worker.update_job_status
+
+    def recording_update(job_id, status, **kwargs):
+        applied = update_job_status(job_id, status, **kwargs)
+        states.append(worker.job_state_cache.read(job_id))
+        return applied
+
+    monkeypatch.setattr(worker, "update_job_status", recording_update)
+    sample = ("tryon_time_to_first_image_seconds_count", {"kind": "preview"})
+    previews_before = REGISTRY.get_sample_value(*sample) or 0
+
+    worker.process_job({"job_id": job_id, "enqueued_at": time.time()})
+
+    with_preview = [index for index, state in enumerate(states) if state["preview_url"]]
+    assert with_preview, "no preview_url was published"
+    first = states[with_preview[0]]
+    assert first["status"] == "processing"
+    assert first["result_image_url"] is None
+    assert "/draft.jpg" in first["preview_url"]
+    assert worker.transfers.client.head_object(Bucket=worker.transfers.bucket, Key=first["preview_key"])
+
+    assert states[-1]["status"] == "completed"
+    assert states[-1]["result_image_url"]
+    assert with_preview[0] < len(states) - 1
+    assert REGISTRY.get_sample_value(*sample) == previews_before + 1
+
+
+def test_draft_is_small_and_keeps_the_aspect_ratio(tryon_images):
+    draft = LocalTryonService.draft(*tryon_images, max_edge=256)
+    assert draft.size == (192, 256)
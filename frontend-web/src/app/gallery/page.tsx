@@ -1,13 +1,13 @@
 'use client'
-import { useState, useEffect } from 'react'
-import { resultsApi, getErrorMessage } from '@/lib/api'
+import { useState, useEffect, useCallback } from 'react'
+import { resultsApi, getErrorMessage, resolveApiUrl } from '@/lib/api'
 import toast from 'react-hot-toast'
 import Link from 'next/link'
 
 interface Result {
   id: string
   image_url: string
-  thumbnail_url?: string
+  thumbnail_url?: string | null
   is_favorite: boolean
   created_at: string
   job_id: string
@@ -48,13 +48,27 @@ function ResultCard({ result, onDelete, onFavorite }: {
     <div className="card-hover" style={{ overflow: 'hidden', position: 'relative' }}>
       {/* Image */}
       <div style={{ aspectRatio: '3/4', overflow: 'hidden', position: 'relative' }}>
-        <img
-          src={result.image_url}
-          alt="Try-on result"
-          style={{ width: '100%', height: '100%', objectFit: 'cover', display: 'block', transition: 'transform 0.3s ease' }}
-          onMouseEnter={e => (e.currentTarget.style.transform = 'scale(1.03)')}
-          onMouseLeave={e => (e.currentTarget.style.transform = 'scale(1)')}
-        />
+        {result.thumbnail_url ? (
+          <img
+            src={resolveApiUrl(result.thumbnail_url) ?? undefined}
+            loading="lazy"
+            alt="Try-on result"
+            style={{ width: '100%', height: '100%', objectFit: 'cover', display: 'block', transition: 'transform 0.3s ease' }}
+            onMouseEnter={e => (e.currentTarget.style.transform = 'scale(1.03)')}
+            onMouseLeave={e => (e.currentTarget.style.transform = 'scale(1)')}
+          />
+        ) : (
+          /* No thumbnail: never pull the full-resolution image into the grid */
+          <div style={{
+            width: '100%', height: '100%', background: '#f3efea',
+            display: 'flex', alignItems: 'center', justifyContent: 'center',
+          }}>
+            <svg width="28" height="28" viewBox="0 0 28 28" fill="none">
+              <rect x="4" y="4" width="20" height="20" rx="3" stroke="#d4c7b8" strokeWidth="1.5"/>
+              <path d="M4 19l6-6 5 5 3-3 6 6" stroke="#d4c7b8" strokeWidth="1.5" strokeLinejoin="round"/>
+            </svg>
+          </div>
+        )}
 
         {/* Hover overlay */}
         <div style={{
@@ -67,7 +81,7 @@ function ResultCard({ result, onDelete, onFavorite }: {
         >
           <div style={{ display: 'flex', gap: 8, width: '100%' }}>
             <a
-              href={result.image_url}
+              href={resolveApiUrl(result.image_url) ?? undefined}
               download="draped-tryon.png"
               style={{
                 flex: 1, padding: '7px 0', borderRadius: 8, textAlign: 'center',
@@ -123,26 +137,44 @@ function ResultCard({ result, onDelete, onFavorite }: {
 
 export default function GalleryPage() {
   const [results, setResults] = useState<Result[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [filter, setFilter] = useState<'all' | 'favorites'>('all')
 
+  // Favorites are filtered by the API, so each tab pages through its own results
+  const fetchPage = useCallback(async (cursor?: string) => {
+    const res = await resultsApi.list(cursor, filter === 'favorites')
+    return { page: (res.data.results || []) as Result[], next: res.data.next_cursor ?? null }
+  }, [filter])
+
   useEffect(() => {
-    async function fetchResults() {
-      try {
-        const res = await resultsApi.list()
-        setResults(res.data.results || [])
-      } catch (err) {
-        toast.error(getErrorMessage(err))
-      } finally {
-        setLoading(false)
-      }
-    }
-    fetchResults()
-  }, [])
+    let cancelled = false
+    setLoading(true)
+    fetchPage()
+      .then(({ page, next }) => {
+        if (cancelled) return
+        setResults(page)
+        setNextCursor(next)
+      })
+      .catch((err) => toast.error(getErrorMessage(err)))
+      .finally(() => !cancelled && setLoading(false))
+    return () => { cancelled = true }
+  }, [fetchPage])
 
-  const filtered = filter === 'favorites'
-    ? results.filter((r) => r.is_favorite)
-    : results
+  async function loadMore() {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const { page, next } = await fetchPage(nextCursor)
+      setResults((prev) => [...prev, ...page.filter((r) => !prev.some((p) => p.id === r.id))])
+      setNextCursor(next)
+    } catch (err) {
+      toast.error(getErrorMessage(err))
+    } finally {
+      setLoadingMore(false)
+    }
+  }
 
   function handleDelete(id: string) {
     setResults((prev) => prev.filter((r) => r.id !== id))
@@ -150,7 +182,9 @@ export default function GalleryPage() {
 
   function handleFavorite(id: string) {
     setResults((prev) =>
-      prev.map((r) => (r.id === id ? { ...r, is_favorite: !r.is_favorite } : r))
+      filter === 'favorites'
+        ? prev.filter((r) => r.id !== id)
+        : prev.map((r) => (r.id === id ? { ...r, is_favorite: !r.is_favorite } : r))
     )
   }
 
@@ -163,7 +197,7 @@ export default function GalleryPage() {
             Your Gallery
           </h1>
           <p style={{ fontSize: 14, color: '#9a8c7c' }}>
-            {results.length} try-on{results.length !== 1 ? 's' : ''} generated
+            {results.length}{nextCursor ? '+' : ''} {filter === 'favorites' ? 'favorite' : 'try-on'}{results.length !== 1 ? 's' : ''}{filter === 'favorites' ? '' : ' generated'}
           </p>
         </div>
 
@@ -203,7 +237,7 @@ export default function GalleryPage() {
             </div>
           ))}
         </div>
-      ) : filtered.length === 0 ? (
+      ) : results.length === 0 ? (
         <div style={{
           display: 'flex', flexDirection: 'column', alignItems: 'center',
           justifyContent: 'center', padding: '80px 24px', gap: 16,
@@ -240,16 +274,26 @@ export default function GalleryPage() {
           )}
         </div>
       ) : (
-        <div
-          className="animate-fade-up"
-          style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(200px, 1fr))', gap: 20 }}
-        >
-          {filtered.map((result, i) => (
-            <div key={result.id} className="animate-fade-up" style={{ animationDelay: `${i * 40}ms` }}>
-              <ResultCard result={result} onDelete={handleDelete} onFavorite={handleFavorite} />
+        <>
+          <div
+            className="animate-fade-up"
+            style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(200px, 1fr))', gap: 20 }}
+          >
+            {results.map((result, i) => (
+              <div key={result.id} className="animate-fade-up" style={{ animationDelay: `${(i % 20) * 40}ms` }}>
+                <ResultCard result={result} onDelete={handleDelete} onFavorite={handleFavorite} />
+              </div>
+            ))}
+          </div>
+
+          {nextCursor && (
+            <div style={{ display: 'flex', justifyContent: 'center', marginTop: 32 }}>
+              <button onClick={loadMore} disabled={loadingMore} className="btn-primary" style={{ padding: '8px 20px', fontSize: 13 }}>
+                {loadingMore ? 'Loading…' : 'Load more'}
+              </button>
             </div>
-          ))}
-        </div>
+          )}
+        </>
       )}
     </div>
   )
@@ -126,6 +126,20 @@ function ProcessingState({ job, onDone }: { job: Job; onDone: () => void }) {
         </p>
       </div>
 
+      {/* Draft preview, shown until the full-quality result is ready */}
+      {job.preview_url && (
+        <div style={{ width: '100%', textAlign: 'center' }}>
+          <img
+            src={job.preview_url}
+            alt="Draft preview"
+            style={{ maxWidth: '100%', maxHeight: 360, borderRadius: 12, filter: 'saturate(0.9)', opacity: 0.9 }}
+          />
+          <p style={{ fontSize: 12, color: '#9a8c7c', marginTop: 8 }}>
+            Draft preview · full quality on the way
+          </p>
+        </div>
+      )}
+
       {/* Progress bar */}
       <div style={{ width: '100%' }}>
         <div className="progress-track" style={{ height: 4 }}>
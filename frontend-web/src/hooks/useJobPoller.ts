@@ -20,9 +20,13 @@ export function useJobPoller(jobId: string | null, onComplete?: (job: Job) => vo
 
     try {
       const statusRes = await jobsApi.getStatus(jobId)
-      const { status, progress } = statusRes.data
+      const { status, progress, preview_url } = statusRes.data
 
-      updateJobStatus(jobId, { status, progress })
+      updateJobStatus(jobId, {
+        status,
+        progress,
+        ...(preview_url ? { preview_url: resolveResultUrl(preview_url) } : {}),
+      })
 
       if (status === 'completed') {
         const resultRes = await jobsApi.getResult(jobId)
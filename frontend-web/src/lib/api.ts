@@ -3,6 +3,13 @@ import { useAuthStore } from './store'
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
 
+// Storage URLs from the API may be relative (/storage/..., /local-storage/...)
+export function resolveApiUrl(url: string | null | undefined) {
+  if (!url) return url
+  if (url.startsWith('http://') || url.startsWith('https://')) return url
+  return `${API_URL}${url}`
+}
+
 export const apiClient = axios.create({
   baseURL: API_URL,
   timeout: 30000,
@@ -79,8 +86,8 @@ export const jobsApi = {
   getResult: (jobId: string) =>
     apiClient.get(`/api/v1/jobs/${jobId}/result`),
 
-  list: (page = 1, pageSize = 20) =>
-    apiClient.get('/api/v1/jobs', { params: { page, page_size: pageSize } }),
+  list: (cursor?: string, pageSize = 20) =>
+    apiClient.get('/api/v1/jobs', { params: { cursor, page_size: pageSize } }),
 
   delete: (jobId: string) =>
     apiClient.delete(`/api/v1/jobs/${jobId}`),
@@ -88,8 +95,8 @@ export const jobsApi = {
 
 /* ── Results ── */
 export const resultsApi = {
-  list: (page = 1) =>
-    apiClient.get('/api/v1/results', { params: { page, limit: 20 } }),
+  list: (cursor?: string, favorites = false, limit = 20) =>
+    apiClient.get('/api/v1/results', { params: { cursor, favorites, limit } }),
 
   favorite: (id: string) =>
     apiClient.post(`/api/v1/results/${id}/favorite`),
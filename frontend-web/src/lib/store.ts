@@ -57,6 +57,7 @@ export interface Job {
   user_image_url: string
   garment_image_url: string
   result_image_url?: string
+  preview_url?: string
   processing_time_ms?: number
   error_message?: string
   created_at: string